@@ -1,57 +1,196 @@
 import streamlit as st
-import pandas as pd
-from fyers_apiv3 import fyersModel
-from src.fyers_client import get_access_token, subscribe_to_live_data, place_order
-from src.trading_logic import calculate_moving_averages, detect_signal, check_stop_loss
+from src.token_store import clear_token, load_token, save_token
 import datetime
 import threading
+import time
 
+# pandas, numpy, the Fyers SDK and the engine are imported where they are first
+# needed, so the login screen renders without waiting for them; preload() loads
+# them on a background thread meanwhile.
 
-# ================= MODULE-LEVEL GLOBALS FOR LIVE DATA =================
-live_data_lock = threading.Lock()
-live_data = {
-    "live_price": None,
-    "live_time":[],
-    "prices": [],
-    "short_ma": None,
-    "medium_ma": None,
-    "long_ma": None,
-    "extra_long_ma":None,
-    "short_period": 11,
-    "medium_period": 23,
-    "long_period": 50,
-    "extra_long_period":89,
-    "first_print_done": False,
-}
 
-current_candle_ts = None
+@st.cache_resource
+def launch_time():
+    """When this Streamlit server process first ran the app, for time-to-first-tick."""
+    return time.time()
 
-def floor_to_timeframe(epoch_sec, minutes_tf):
-    """Pure math: floor to bucket start (no datetime/tz)"""
-    sec_per_bucket = minutes_tf * 60
-    return (epoch_sec // sec_per_bucket) * sec_per_bucket
 
+@st.cache_resource
+def preload():
+    """Import the engine, pandas and the Fyers SDK once per server process, off the script thread."""
+    def load():
+        import pandas  # noqa: F401
+        import src.engine  # noqa: F401
+        from src.fyers_client import preload_sdk
+        preload_sdk()
 
-# Global open positions and trades for use in WS thread
-open_positions_lock = threading.Lock()
-open_positions_global = {}
+    thread = threading.Thread(target=load, name="preload", daemon=True)
+    thread.start()
+    return thread
 
-executed_trades_lock = threading.Lock()
-executed_trades_global = []
 
-# Global fyers client for WS thread
-fyers_client = None
+@st.cache_resource
+def engine_holder():
+    """One engine per Streamlit server process, so it outlives reruns and tab reloads."""
+    return {"engine": None}
+
+
+@st.cache_data(show_spinner=False)
+def auth_code_url(client_id, secret_key, redirect_uri):
+    """Fyers login URL, built once per set of credentials rather than on every rerun."""
+    from fyers_apiv3 import fyersModel
+
+    session = fyersModel.SessionModel(
+        client_id=client_id,
+        secret_key=secret_key,
+        redirect_uri=redirect_uri,
+        response_type="code",
+        grant_type="authorization_code"
+    )
+    return session.generate_authcode()
+
+
+def _fmt(value):
+    return f"{value:.2f}" if value is not None and value == value else "Waiting..."
+
+
+def render_positions(open_positions):
+    import pandas as pd
+
+    if open_positions:
+        st.table(pd.DataFrame.from_dict({k: dict(v) for k, v in open_positions.items()}, orient="index"))
+    else:
+        st.write("No open positions.")
+
+
+def render_trades(executed_trades):
+    import pandas as pd
+
+    if executed_trades:
+        st.table(pd.DataFrame([dict(t) for t in executed_trades]))
+    else:
+        st.write("No trades executed yet.")
+
+
+def render_stats(conflation, latency, startup=None, api=None):
+    import pandas as pd
+
+    if startup and startup.get("start_to_first_tick_ms") is not None:
+        since_launch = startup.get("time_to_first_tick_ms")
+        st.caption(f"First tick {startup['start_to_first_tick_ms']:.0f} ms after the engine started"
+                   + (f", {since_launch / 1000:.2f} s after launch" if since_launch is not None else ""))
+    if conflation:
+        st.caption(f"Ticks received {conflation['received']}, processed {conflation['processed']}, "
+                   f"superseded {conflation['dropped']}; strategy lag {conflation['last_lag_ms']:.2f} ms "
+                   f"(max {conflation['max_lag_ms']:.2f} ms)")
+    if latency:
+        st.header("Latency (µs)")
+        st.table(pd.DataFrame.from_dict(latency, orient="index")[
+            ["count", "p50_us", "p90_us", "p99_us", "p99.9_us", "max_us"]])
+    if api:
+        st.header("Fyers API calls")
+        st.table(pd.DataFrame.from_dict(
+            {name: {"calls": e["calls"], "errors": e["errors"],
+                    "codes": ", ".join(f"{code}: {n}" for code, n in e["codes"].items()),
+                    "p50_ms": e["latency"]["p50_us"] and e["latency"]["p50_us"] / 1000,
+                    "p99_ms": e["latency"]["p99_us"] and e["latency"]["p99_us"] / 1000}
+             for name, e in api.items()}, orient="index"))
+
+
+def render_dashboard(status):
+    """Read-only view of an engine status dict (in-process engine or headless runner)."""
+    st.header("Live Data")
+    if status is None:
+        st.write("Engine not running.")
+        return
+    for ticker, symbol_status in status["symbols"].items():
+        if len(status["symbols"]) > 1:
+            st.subheader(ticker)
+        col1_m, col2_m, col3_m, col4_m = st.columns(4)
+        for col, label, key in ((col1_m, "Live Price", "live_price"), (col2_m, "Short MA", "short_ma"),
+                                (col3_m, "Medium MA", "medium_ma"), (col4_m, "Long MA", "long_ma")):
+            with col:
+                st.metric(label, _fmt(symbol_status.get(key)))
+
+    st.header("Open Positions")
+    render_positions(status["open_positions"])
+    st.header("Executed Trades")
+    render_trades(status["executed_trades"])
+    render_stats(status.get("conflation"), status.get("latency"), status.get("startup"))
+    st.button("Refresh")
+
+
+def chart_frame(bars):
+    """Price / MA columns of CHART_DTYPE bars, indexed by IST bar time."""
+    import pandas as pd
+    from src.engine_view import CHART_DTYPE
+
+    index = pd.to_datetime(bars["ts"], unit="s", utc=True).tz_convert("Asia/Kolkata")
+    return pd.DataFrame({name: bars[name] for name in CHART_DTYPE.names[1:]}, index=index)
+
+
+def api_stats(engine):
+    """Per-endpoint REST stats when the engine's client is a ProfiledFyers, else None."""
+    snapshot = getattr(engine.fyers, "snapshot", None)
+    return snapshot() if callable(snapshot) else None
+
+
+def render_live(engine, refresh_seconds=1.0):
+    """
+    Live view of an in-process engine, read from its published EngineView, so
+    no engine lock is taken. Metrics update in place every `refresh_seconds`.
+    The price/MA chart only gets the bars closed since its last update
+    (add_rows). Positions and trades are redrawn only when they change. Runs
+    until the next rerun (any widget interaction) interrupts it.
+    """
+    from src.engine_view import bars_drawn, new_bars
+
+    st.header("Live Data")
+    panels = {}
+    for ticker in engine.tickers:
+        if len(engine.tickers) > 1:
+            st.subheader(ticker)
+        panels[ticker] = {"metrics": [col.empty() for col in st.columns(4)], "chart": st.empty(),
+                          "element": None, "drawn": None}
+    st.header("Open Positions")
+    positions_slot = st.empty()
+    st.header("Executed Trades")
+    trades_slot = st.empty()
+    stats_slot = st.empty()
+
+    books = None
+    while True:
+        view = engine.view()
+        for ticker, panel in panels.items():
+            symbol = view.symbols[ticker]
+            for slot, label, value in zip(panel["metrics"], ("Live Price", "Short MA", "Medium MA", "Long MA"),
+                                          (symbol.live_price, symbol.short_ma, symbol.medium_ma, symbol.long_ma)):
+                slot.metric(label, _fmt(value))
+            rows, redraw = new_bars(symbol, panel["drawn"])
+            if redraw:
+                panel["element"] = panel["chart"].line_chart(chart_frame(rows))
+            elif len(rows):
+                panel["element"].add_rows(chart_frame(rows))
+            panel["drawn"] = bars_drawn(symbol)
+
+        # a shard's book is re-frozen only when it changes, so identity tells us
+        current = [(symbol.open_positions, symbol.executed_trades) for symbol in view.symbols.values()]
+        if books is None or any(a is not b for old, new in zip(books, current) for a, b in zip(old, new)):
+            books = current
+            with positions_slot.container():
+                render_positions({k: v for positions, _ in current for k, v in positions.items()})
+            with trades_slot.container():
+                render_trades([t for _, trades in current for t in trades])
+        with stats_slot.container():
+            render_stats(view.conflation, view.latency, view.startup, api_stats(engine))
+        time.sleep(refresh_seconds)
 
 
 # --------------- BASIC SETUP ---------------
 st.set_page_config("Directional Trading Bot", layout="wide")
 st.title("Directional Trading Bot")
-
-
-# --- Auto-refresh counter (for soft periodic rerun) ---
-if "refresh_tick" not in st.session_state:
-    st.session_state.refresh_tick = 0
-st.session_state.refresh_tick += 1
+launched_at = launch_time()
+preload()
 
 
 # --------------- SESSION STATE INIT ---------------
@@ -63,22 +202,22 @@ if 'redirect_uri' not in st.session_state:
     st.session_state.redirect_uri = "https://trade.fyers.in/api-login/redirect-uri/index.html"
 if 'access_token' not in st.session_state:
     st.session_state.access_token = None
+    st.session_state.token_from_store = False
 if 'fyers' not in st.session_state:
     st.session_state.fyers = None
 
-if 'executed_trades' not in st.session_state:
-    st.session_state.executed_trades = []
-if 'open_positions' not in st.session_state:
-    st.session_state.open_positions = {}
 
-if 'ws_started' not in st.session_state:
-    st.session_state.ws_started = False
+# --------------- ENGINE MODE ---------------
+# The engine can run headless (python -m src.runner); the app then only displays its status file.
+mode = st.sidebar.radio("Engine", ["Run in this app", "Attach to headless runner"])
+if mode == "Attach to headless runner":
+    from src.runner import read_status, DEFAULT_STATUS_FILE
 
-# sync session_state views from globals for display
-with open_positions_lock:
-    st.session_state.open_positions = dict(open_positions_global)
-with executed_trades_lock:
-    st.session_state.executed_trades = list(executed_trades_global)
+    status_file = st.sidebar.text_input("Status file", DEFAULT_STATUS_FILE)
+    render_dashboard(read_status(status_file))
+    st.stop()
+
+holder = engine_holder()
 
 
 # --------------- AUTH SECTION ---------------
@@ -92,24 +231,30 @@ if st.session_state.access_token is None:
     with col3:
         st.session_state.redirect_uri = st.text_input("Redirect URI", st.session_state.redirect_uri)
 
-    session = fyersModel.SessionModel(
-        client_id=st.session_state.client_id,
-        secret_key=st.session_state.secret_key,
-        redirect_uri=st.session_state.redirect_uri,
-        response_type="code",
-        grant_type="authorization_code"
-    )
-    auth_code_url = session.generate_authcode()
+    url = auth_code_url(st.session_state.client_id, st.session_state.secret_key, st.session_state.redirect_uri)
     with col4:
         st.markdown(
-            f"<a href='{auth_code_url}' target='_blank'>Click here to generate auth code</a>",
+            f"<a href='{url}' target='_blank'>Click here to generate auth code</a>",
             unsafe_allow_html=True
         )
 
     auth_code = st.text_input("Auth Code")
 
+    # a token saved earlier today skips the auth-code round trip; it is only read with the
+    # credentials entered above, and checked with the broker below
+    if st.button("Use Saved Token"):
+        token = load_token(st.session_state.client_id, st.session_state.secret_key)
+        if token:
+            st.session_state.access_token = token
+            st.session_state.token_from_store = True
+            st.rerun()
+        else:
+            st.error("No saved token for this Client ID and Secret Key; generate a new one.")
+
     if st.button("Generate Access Token"):
         if all([st.session_state.client_id, st.session_state.secret_key, st.session_state.redirect_uri, auth_code]):
+            from src.fyers_client import get_access_token
+
             try:
                 st.session_state.access_token = get_access_token(
                     st.session_state.client_id,
@@ -117,6 +262,10 @@ if st.session_state.access_token is None:
                     st.session_state.redirect_uri,
                     auth_code
                 )
+                if st.session_state.access_token:
+                    save_token(st.session_state.access_token, st.session_state.client_id,
+                               st.session_state.secret_key)
+                st.session_state.token_from_store = False
                 st.rerun()
             except Exception as e:
                 st.error(f"Failed to generate access token: {e}")
@@ -128,13 +277,21 @@ if st.session_state.access_token is None:
 else:
 
     if st.session_state.fyers is None:
-        st.session_state.fyers = fyersModel.FyersModel(
-            client_id=st.session_state.client_id,
-            token=st.session_state.access_token,
-            log_path=""
-        )
-    # expose fyers client to WS thread
-    fyers_client = st.session_state.fyers
+        from src.fyers_client import rest_client, token_is_valid
+
+        fyers = rest_client(st.session_state.client_id, st.session_state.access_token)
+        if st.session_state.token_from_store and not token_is_valid(fyers):
+            # revoked or from another login: forget it and show the auth screen
+            clear_token()
+            st.session_state.access_token = None
+            st.rerun()
+        st.session_state.fyers = fyers
+
+    if st.sidebar.button("Log out"):
+        clear_token()
+        st.session_state.access_token = None
+        st.session_state.fyers = None
+        st.rerun()
 
     st.success("Successfully authenticated!")
     st.header("Bot Configuration")
@@ -142,10 +299,13 @@ else:
     col1, col2, col3, col4, col5 = st.columns(5)
     with col1:
         ticker = st.text_input("Ticker", "NSE:NIFTY50-INDEX")
+        more_tickers = st.text_input("More tickers (comma separated)", "",
+                                     help="Traded side by side from one data socket, each with its own candles and positions")
         option_step = st.number_input("Strike Price Increments", 50)
         expiry_str = st.text_input(
             "Expiry (YYYY-MM-DD)",
             datetime.date.today().strftime("%Y-%m-%d"))
+        symbol_master_path = st.text_input("Symbol master CSV (optional)", "NSE_FO.csv")
 
     with col2:
         short_ma_period = st.number_input("Short MA", 11)
@@ -176,279 +336,52 @@ else:
 
         
 
-    # push MA periods to global live_data so callback can read them
-    with live_data_lock:
-        live_data["short_period"] = int(short_ma_period)
-        live_data["medium_period"] = int(medium_ma_period)
-        live_data["long_period"] = int(long_ma_period)
-        live_data["extra_long_period"] = int(extra_long_ma_period)
-
-
-    # --------------- WEBSOCKET CALLBACK USING ONLY GLOBALS ---------------
-    def on_message(msg: dict):
-        global current_candle_ts
-        
-        """
-        Runs in WebSocket thread. Uses only module-level globals; no st.session_state
-        mutation inside the thread.
-        """
-        try:
-            # ignore control messages (cn, ful, sub etc.)
-            if msg.get("type") in ("cn", "ful", "sub"):
-                return
-
-            with live_data_lock:
-                if not live_data["first_print_done"]:
-                    print("WS first message in app.py:", msg)
-                    live_data["first_print_done"] = True
-
-                live_price = msg.get("ltp")
-                live_time = msg.get("exch_feed_time")
-                if live_price is None or live_time is None:
-                    return
-
-                live_price = float(live_price)
-               
-                # ========== BUCKETING LOGIC ADDED ==========
-                minutes_tf = int(timeframe) ##live_data["timeframe_minutes"]
-                print("minute_tf ",minutes_tf )
-                candle_ts = floor_to_timeframe(live_time, minutes_tf)
-                print("candle_ts ",candle_ts )
-                print("current_candle_ts ",current_candle_ts )
-                
-                # New candle? Append PRIOR LTP as candle close
-
-                if current_candle_ts is None or candle_ts > current_candle_ts:
-                    print(f"New {minutes_tf}m candle: {candle_ts}")
-                    if current_candle_ts is not None:
-                        live_data["prices"].append(live_data["live_price"])
-                        live_data["live_time"].append(current_candle_ts)
-                        print(f"Appended candle close at {current_candle_ts}")
-                    
-                    current_candle_ts = candle_ts
-                    # Trim
-                    if len(live_data["prices"]) > 500:
-                        live_data["prices"] = live_data["prices"][-500:]
-                        live_data["live_time"] = live_data["live_time"][-500:]
-                # ===========================================
-
-                live_data["live_price"] = live_price
-
-                sp = live_data["short_period"]
-                mp = live_data["medium_period"]
-                lp = live_data["long_period"]
-                mr = live_data["extra_long_period"]
-
-            
-                short_ma_series, medium_ma_series, long_ma_series, extra_long_ma_series  = calculate_moving_averages(
-                    live_data["prices"], sp, mp, lp, mr
-                )
-
-               # print(short_ma_series, medium_ma_series, long_ma_series, extra_long_ma_series)
-
-
-                short_val = short_ma_series.iloc[-1] if hasattr(short_ma_series, "iloc") and len(short_ma_series) > 0 else None
-                print("short val ", short_val)
-                medium_val = medium_ma_series.iloc[-1] if hasattr(medium_ma_series, "iloc") and len(medium_ma_series) > 0 else None
-                print("medium val ", medium_val)
-                long_val = long_ma_series.iloc[-1] if hasattr(long_ma_series, "iloc") and len(long_ma_series) > 0 else None
-                print("long val ", long_val)
-                extra_long_val = extra_long_ma_series.iloc[-1] if hasattr(extra_long_ma_series, "iloc") and len(extra_long_ma_series) > 0 else None
-                print("long val ", extra_long_val)
-                
-
-                live_data["short_ma"] = float(short_val) if short_val is not None else None
-                live_data["medium_ma"] = float(medium_val) if medium_val is not None else None
-                live_data["long_ma"] = float(long_val) if long_val is not None else None
-                live_data["extra_long_ma"] = float(extra_long_val) if long_val is not None else None
-                print(live_data)
-
-
-            # ---------- trading logic preserved, but uses globals ----------
-            # Stop-loss on open positions
-            
-            with open_positions_lock:
-                print("open positions ", open_positions_global.items())
-                for trade_symbol, trade_info in list(open_positions_global.items()):
-                    if check_stop_loss(live_data["live_price"], long_ma_series, trade_info["side"]):
-                        place_order(
-                            fyers_client,
-                            trade_symbol,
-                            trade_info["qty"],
-                            "sell" if trade_info["side"] == "buy" else "buy",
-                            "market"
-                        )
-                        print(f"Stop-loss triggered for {trade_symbol}")
-                        del open_positions_global[trade_symbol]
-            
-
-            # Entry logic
-            with executed_trades_lock, open_positions_lock:
-                if len(executed_trades_global) < max_trades:
-                    signal = detect_signal(live_data["prices"], short_ma_series, medium_ma_series, long_ma_series,extra_long_ma_series)
-                    print("signal", signal)
-                    print("trade type", trade_type)
-
-
-                if signal:
-                     ##   side = signal
-                        ticker_local = ticker
-                        if ticker_local == "NSE:NIFTY50-INDEX":
-                            ticker_local = "NSE:NIFTY-INDEX"
-                        if ticker_local == "NSE:NIFTYBANK-INDEX":
-                            ticker_local = "NSE:BANKNIFTY-INDEX"
-                        if trade_type == "Options" and expiry_type == "Monthly":
-                            strike_price = round(live_data["live_price"]) - (round(live_data["live_price"]) % option_step)
-                            if signal == "sell" : 
-                                option_type = "Put"
-                            else : option_type = "Call"
-                            if option_type == "Put":
-                                strike_price = round(live_data["live_price"]) + (option_step - (round(live_data["live_price"]) % option_step))
-                                
-                            expiry = datetime.datetime.strptime(expiry_str, "%Y-%m-%d")
-                            base_ticker = ticker_local.split(":")[1].split("-")[0]
-                            symbol_to_trade = (
-                                f"NSE:{base_ticker}{expiry.strftime('%y%b').upper()}"
-                                f"{strike_price}{option_type[0].upper()}E"
-                            )
-                            print("symbol_to_trade", symbol_to_trade)
-                    
-                        elif trade_type == "Options" and expiry_type == "Weekly":
-                            strike_price = round(live_data["live_price"]) - (round(live_data["live_price"]) % option_step)
-                            if signal == "sell" : 
-                                option_type = "Put"
-                            else : option_type = "Call"
-                            if option_type == "Put":
-                                strike_price = round(live_data["live_price"]) + (option_step - (round(live_data["live_price"]) % option_step))
-                                
-                            expiry = datetime.datetime.strptime(expiry_str, "%Y-%m-%d")
-                            month_str = str(expiry.month)  # "1" not "01"
-                            year_2digit = expiry.strftime("%y")  # "26"
-                            date_2digit = expiry.strftime("%d")
-                            expiry1 = year_2digit+month_str+date_2digit
-                            base_ticker = ticker_local.split(":")[1].split("-")[0]
-                            symbol_to_trade = (
-                                f"NSE:{base_ticker}{expiry1.upper()}"
-                                f"{strike_price}{option_type[0].upper()}E"
-                            )
-                            print("symbol_to_trade", symbol_to_trade)
-                        
-                        else:
-                            symbol_to_trade = ticker_local
-                        print("symbol_to_trade ",symbol_to_trade)
-
-                        response = place_order(
-                            fyers_client,
-                            symbol_to_trade,
-                            quantity,
-                            side,
-                            "market"
-                        )
-
-
-                        if response.get("s") == "ok":
-                            order_id = response["id"]
-                            order_book = fyers_client.orderbook({"id": order_id})
-                            print("order book", order_book)
-                            fill_price = (
-                                order_book["orderBook"][0]["tradedPrice"]
-                                if order_book.get("s") == "ok"
-                                else live_data["live_price"]
-                            )
-
-
-                            trade = {
-                                "ticker": symbol_to_trade,
-                                "buying_price": live_data["live_price"],
-                                "executed_price": fill_price,
-                                "executed": "Yes"
-                            }
-                            executed_trades_global.append(trade)
-                            open_positions_global[symbol_to_trade] = {
-                                "qty": quantity,
-                                "side": side
-                            }
-                        else:
-                            print(f"Order placement failed: {response}")
-
-        except Exception as e:
-            print("on_message error:", e)
-
-
-    # --------------- HISTORICAL DATA ---------------
-    def fetch_data(_fyers, _ticker, _timeframe):
-        to_date = datetime.datetime.now().date()
-        from_date = to_date - datetime.timedelta(days=100)
-
-        data = {
-            "symbol": _ticker,
-            "resolution": _timeframe,
-            "date_format": "1",
-            "range_from": str(from_date),
-            "range_to": str(to_date),
-            "cont_flag": "1"
-        }
-        return _fyers.history(data=data)
+    engine = holder["engine"]
+    if engine is not None:
+        # MA periods can be changed on a running engine; everything else applies on start
+        engine.set_periods(short_ma_period, medium_ma_period, long_ma_period, extra_long_ma_period)
 
 
     # --------------- START BOT BUTTON ---------------
-    if st.button("Start Bot") and not st.session_state.ws_started:
-        st.session_state.ws_started = True
-        st.write("Bot started...")
-
-        # seed close prices so MA has history
-        historical_data = fetch_data(fyers_client, ticker, timeframe)
-        if historical_data.get("s") == "ok":
-            candles = historical_data.get("candles", [])
-            close_prices = [c[4] for c in candles]
-            live_time = [c[0] for c in candles]
-           # close_prices = [val for val in close_prices1 for _ in range(5)]
-            with live_data_lock:
-                live_data["prices"] = close_prices[-500:]
-                live_data["live_time"] = live_time[-500:]
-        else:
-            st.error(f"Failed to fetch historical data: {historical_data.get('message', 'Unknown error')}")
-
-        # subscribe via existing helper in a background thread
-        current_candle_ts = live_data["live_time"][-1]
+    if st.button("Start Bot", disabled=engine is not None and engine.started):
+        from src.engine import TradingEngine
+        from src.snapshot import DEFAULT_SNAPSHOT_FILE
+        from src.structured_log import setup_logging
+
+        engine = TradingEngine(st.session_state.fyers, {
+            "ticker": ticker,
+            "tickers": [ticker] + [t.strip() for t in more_tickers.split(",") if t.strip()],
+            "timeframe": timeframe,
+            "short_ma_period": short_ma_period,
+            "medium_ma_period": medium_ma_period,
+            "long_ma_period": long_ma_period,
+            "extra_long_ma_period": extra_long_ma_period,
+            "max_trades": max_trades,
+            "trade_type": trade_type,
+            "expiry_type": expiry_type,
+            "expiry_date": expiry_str,
+            "option_step": option_step,
+            "quantity": quantity,
+            "side": side,
+            "symbol_master_path": symbol_master_path,
+            "snapshot_path": DEFAULT_SNAPSHOT_FILE,
+            "launched_at": launched_at,
+        })
         access_token_for_ws = f"{st.session_state.client_id}:{st.session_state.access_token}"
-        threading.Thread(
-            target=subscribe_to_live_data,
-            args=(access_token_for_ws, [ticker], on_message),
-            daemon=True,
-        ).start()
+        setup_logging(level=engine.config["log_level"])
+        try:
+            problems = engine.start(access_token_for_ws)
+        except ValueError as e:
+            engine.stop(wait=False)
+            engine = holder["engine"]
+            st.error(f"Bot not started: {e}")
+        else:
+            holder["engine"] = engine
+            for problem in problems:
+                st.error(problem)
+            st.write("Bot started...")
 
-    """
-    # --------------- LIVE METRICS SECTION ---------------
-    st.header("Live Data")
-    col1_m, col2_m, col3_m, col4_m = st.columns(4)
-    with live_data_lock:
-        lp_val = live_data["live_price"]
-        s_val = live_data["short_ma"]
-        m_val = live_data["medium_ma"]
-        l_val = live_data["long_ma"]
-        print("lp_val ", lp_val, s_val, m_val, l_val)
-
-    with col1_m:
-        st.metric("Live Price", f"{lp_val:.2f}" if lp_val is not None else "Waiting...")
-    with col2_m:
-        st.metric("Short MA", f"{s_val:.2f}" if s_val is not None else "Waiting...")
-    with col3_m:
-        st.metric("Medium MA", f"{m_val:.2f}" if m_val is not None else "Waiting...")
-    with col4_m:
-        st.metric("Long MA", f"{l_val:.2f}" if l_val is not None else "Waiting...")
-
-
-    # --------------- EXECUTED TRADES TABLE ---------------
-    st.header("Executed Trades")
-    if st.session_state.executed_trades:
-        st.table(pd.DataFrame(st.session_state.executed_trades))
+    if engine is not None:
+        render_live(engine)
     else:
-        st.write("No trades executed yet.")
-
-
-    # --------------- SOFT AUTO-REFRESH ---------------
-    # Rerun periodically so UI picks up new live_data values
-    if st.session_state.refresh_tick % 10 == 0:
-        st.rerun()
-    """
\ No newline at end of file
+        render_dashboard(None)
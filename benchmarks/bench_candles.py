@@ -0,0 +1,71 @@
+"""
+Candle aggregation throughput.
+
+    python benchmarks/bench_candles.py
+
+Streams synthetic session ticks through a CandleAggregator building 1/5/15/60
+minute and daily bars at once, and aggregates a recorded-size tick array with
+the vectorized build_bars. Exits non-zero if build_bars handles fewer than a
+million ticks per second.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.candles import CandleAggregator, build_bars  # noqa: E402
+
+TIMEFRAMES = ("1", "5", "15", "60", "D")
+SESSION_OPEN = 1_735_789_500    # 2025-01-02 09:15 IST
+TARGET_TICKS_PER_SEC = 1_000_000
+
+
+def synthetic_ticks(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # ~20 ticks per second across a 6h15m session, repeated over consecutive days
+    days = np.arange(n) // max(n // 5, 1) * 86400
+    ts = SESSION_OPEN + days + np.sort(rng.integers(0, 22_500, n))
+    ts.sort()
+    price = 24_000 + rng.standard_normal(n).cumsum()
+    volume = np.cumsum(rng.integers(1, 100, n))
+    return ts, price, volume
+
+
+def bench_streaming(timeframes, n=500_000):
+    ts, price, volume = synthetic_ticks(n)
+    ticks = list(zip(ts.tolist(), price.tolist(), volume.tolist()))
+    aggregator = CandleAggregator(timeframes)
+    update = aggregator.update
+    started = time.perf_counter()
+    for t, p, v in ticks:
+        update(t, p, v)
+    return n / (time.perf_counter() - started)
+
+
+def bench_batch(n=5_000_000):
+    ts, price, volume = synthetic_ticks(n)
+    per_tick_volume = np.diff(volume, prepend=volume[0])
+    started = time.perf_counter()
+    for timeframe in TIMEFRAMES:
+        build_bars(ts, price, per_tick_volume, timeframe)
+    return n * len(TIMEFRAMES) / (time.perf_counter() - started)
+
+
+def main():
+    single = bench_streaming(TIMEFRAMES[:1])
+    streaming = bench_streaming(TIMEFRAMES)
+    batch = bench_batch()
+    rows = [("CandleAggregator.update, 1 timeframe", single),
+            (f"CandleAggregator.update, {len(TIMEFRAMES)} timeframes", streaming),
+            ("build_bars, per timeframe", batch)]
+    for label, rate in rows:
+        print(f"{label:<40} {rate:>14,.0f} ticks/s")
+    print(f"build_bars target: {TARGET_TICKS_PER_SEC:,} ticks/s")
+    return 0 if batch >= TARGET_TICKS_PER_SEC else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+Hot-path benchmarks checked against stored baselines.
+
+    python benchmarks/bench_hot_path.py                    # compare with benchmarks/baselines.json
+    python benchmarks/bench_hot_path.py --threshold 0.1    # allow 10% instead of 25%
+    python benchmarks/bench_hot_path.py --only on_message --only detect_signal
+    python benchmarks/bench_hot_path.py --update           # record the current numbers as the baseline
+
+Each benchmark calls one hot-path function over prepared inputs and reports
+calls per second, p50 / p99 latency of a single call, and memory blocks left
+allocated per call (sys.getallocatedblocks; growing state and leaks show up
+here). `on_message` drives a TradingEngine end to end with synthetic ticks
+against the in-process FakeBroker, orders included; `scan_universe` scans a
+200-symbol x 500-bar watchlist.
+
+Exits non-zero if any benchmark is slower than its baseline by more than the
+threshold (throughput or p50), its p99 by more than --p99-threshold, or it
+retains more than --alloc-slack extra blocks per call. Baselines are machine
+specific: record them with --update on the machine that runs the check.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.candle_store import CandleStore  # noqa: E402
+from src.candles import CandleAggregator  # noqa: E402
+from src.engine import TradingEngine, floor_to_timeframe  # noqa: E402
+from src.fake_broker import FakeBroker  # noqa: E402
+from src.scanner import UniverseScanner  # noqa: E402
+from src.trading_logic import (IndicatorState, calculate_moving_averages, check_stop_loss,  # noqa: E402
+                               detect_signal)
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baselines.json")
+SESSION_OPEN = 1_735_789_500    # 2025-01-02 09:15 IST
+TIMEFRAMES = ("1", "5", "15", "60", "D")
+PERIODS = (11, 23, 50, 89)
+
+
+def random_walk(n, seed=0, start=24_000.0):
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0, 0.0005, n)))
+
+
+def tick_times(n, ticks_per_second=10):
+    return SESSION_OPEN + np.arange(n) // ticks_per_second
+
+
+# Each setup(n) returns (function, [argument tuple per call]); it is called
+# afresh for every measurement, so stateful benchmarks start from scratch.
+def setup_moving_averages(n):
+    closes = random_walk(500).tolist()
+    return calculate_moving_averages, [(closes,) + PERIODS] * n
+
+
+def _seeded_state(closes):
+    state = IndicatorState(*PERIODS)
+    state.seed(closes)
+    return state
+
+
+def setup_detect_signal(n):
+    state = _seeded_state(random_walk(500))
+    prices = random_walk(n, seed=1, start=state.short.value).tolist()
+    return detect_signal, [(price, state) for price in prices]
+
+
+def setup_check_stop_loss(n):
+    state = _seeded_state(random_walk(500))
+    prices = random_walk(n, seed=1, start=state.long.value).tolist()
+    return check_stop_loss, [(price, state, "buy" if i % 2 else "sell") for i, price in enumerate(prices)]
+
+
+def setup_floor_to_timeframe(n):
+    return floor_to_timeframe, [(ts, 5) for ts in tick_times(n).tolist()]
+
+
+def setup_candles(n):
+    aggregator = CandleAggregator(TIMEFRAMES)
+    volume = np.arange(n) * 10
+    return aggregator.update, list(zip(tick_times(n).tolist(), random_walk(n).tolist(), volume.tolist()))
+
+
+class EngineRun:
+    """TradingEngine on a FakeBroker; stopped (joining its order worker) once measured."""
+
+    def __init__(self, n):
+        self.root = tempfile.TemporaryDirectory()
+        self.broker = FakeBroker()
+        config = {"ticker": "NSE:SBIN-EQ", "trade_type": "Equity", "quantity": 1, "conflate": False,
+                  "max_trades": 1_000_000, "short_ma_period": 5, "medium_ma_period": 10,
+                  "long_ma_period": 20, "extra_long_ma_period": 40}
+        self.engine = TradingEngine(self.broker, config, candle_store=CandleStore(self.root.name))
+        self.engine.order_manager.connect("FAKE-APP:token", socket_factory=self.broker.order_socket)
+        self.messages = [
+            ({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": round(price, 2), "exch_feed_time": ts,
+              "last_traded_time": ts, "vol_traded_today": i},)
+            for i, (ts, price) in enumerate(zip(tick_times(n, 2).tolist(), random_walk(n, start=800.0).tolist()))
+        ]
+
+    def close(self):
+        self.engine.stop()
+        self.root.cleanup()
+
+
+def setup_on_message(n):
+    run = EngineRun(n)
+    return run.engine.on_message, run.messages, run.close
+
+
+def setup_scan_universe(n):
+    """One scan of 200 symbols x 500 bars per call."""
+    closes = np.stack([random_walk(500, seed=i) for i in range(200)])
+    scanner = UniverseScanner([f"NSE:SYM{i}-EQ" for i in range(200)], *PERIODS, capacity=500)
+    scanner.load(closes)
+    return scanner.scan, [()] * n
+
+
+BENCHMARKS = {
+    "calculate_moving_averages": (setup_moving_averages, 2_000),
+    "detect_signal": (setup_detect_signal, 200_000),
+    "check_stop_loss": (setup_check_stop_loss, 200_000),
+    "floor_to_timeframe": (setup_floor_to_timeframe, 200_000),
+    "candle_bucketing": (setup_candles, 200_000),
+    "on_message": (setup_on_message, 50_000),
+    "scan_universe": (setup_scan_universe, 2_000),
+}
+
+
+def _prepare(setup, n):
+    prepared = setup(n)
+    return prepared if len(prepared) == 3 else prepared + (None,)
+
+
+def measure(setup, n):
+    """One pass each for throughput, per-call latency and retained blocks."""
+    gc.collect()
+    fn, calls, close = _prepare(setup, n)
+    started = time.perf_counter_ns()
+    for args in calls:
+        fn(*args)
+    elapsed = time.perf_counter_ns() - started
+    if close:
+        close()
+
+    fn, calls, close = _prepare(setup, n)
+    clock = time.perf_counter_ns
+    timings = np.empty(len(calls), dtype=np.int64)
+    for i, args in enumerate(calls):
+        t0 = clock()
+        fn(*args)
+        timings[i] = clock() - t0
+    if close:
+        close()
+
+    fn, calls, close = _prepare(setup, n)
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    for args in calls:
+        fn(*args)
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks
+    if close:
+        close()
+    return {
+        "calls_per_second": len(calls) / (elapsed / 1e9),
+        "p50_ns": float(np.percentile(timings, 50)),
+        "p99_ns": float(np.percentile(timings, 99)),
+        "alloc_blocks_per_call": retained / len(calls),
+    }
+
+
+def median_of(setup, n, repeat):
+    """Median of every metric over `repeat` runs, so one lucky or unlucky run does not set the verdict."""
+    runs = [measure(setup, n) for _ in range(repeat)]
+    return {metric: float(np.median([r[metric] for r in runs])) for metric in runs[0]}
+
+
+def regressions(result, baseline, threshold, p99_threshold, alloc_slack):
+    """Human-readable reasons `result` is worse than `baseline`; empty when it is not."""
+    problems = []
+    if result["calls_per_second"] < baseline["calls_per_second"] * (1 - threshold):
+        problems.append(f"throughput {result['calls_per_second']:,.0f}/s < baseline "
+                        f"{baseline['calls_per_second']:,.0f}/s - {threshold:.0%}")
+    if result["p50_ns"] > baseline["p50_ns"] * (1 + threshold):
+        problems.append(f"p50 {result['p50_ns']:,.0f} ns > baseline {baseline['p50_ns']:,.0f} ns + {threshold:.0%}")
+    if result["p99_ns"] > baseline["p99_ns"] * (1 + p99_threshold):
+        problems.append(f"p99 {result['p99_ns']:,.0f} ns > baseline {baseline['p99_ns']:,.0f} ns "
+                        f"+ {p99_threshold:.0%}")
+    if result["alloc_blocks_per_call"] > baseline["alloc_blocks_per_call"] + alloc_slack:
+        problems.append(f"{result['alloc_blocks_per_call']:.2f} retained blocks/call > baseline "
+                        f"{baseline['alloc_blocks_per_call']:.2f} + {alloc_slack}")
+    return problems
+
+
+def machine():
+    return {"python": platform.python_version(), "machine": platform.machine(), "processor": platform.processor(),
+            "numpy": np.__version__}
+
+
+def load_baselines(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"machine": None, "results": {}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the trading hot path against stored baselines.")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument("--update", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed throughput / p50 regression, as a fraction (default 0.25)")
+    parser.add_argument("--p99-threshold", type=float, default=1.0,
+                        help="allowed p99 regression, as a fraction (default 1.0: p99 may double)")
+    parser.add_argument("--alloc-slack", type=float, default=0.5,
+                        help="allowed extra retained memory blocks per call (default 0.5)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark; medians are compared")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the number of calls per run")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="run just these benchmarks")
+    args = parser.parse_args(argv)
+
+    stored = load_baselines(args.baseline)
+    if stored.get("machine") and stored["machine"] != machine():
+        print(f"warning: baselines were recorded on {stored['machine']}, this is {machine()}")
+
+    failed = False
+    results = {}
+    print(f"{'benchmark':<27} {'calls/s':>13} {'p50 ns':>9} {'p99 ns':>9} {'blocks/call':>11}  vs baseline")
+    for name in args.only or BENCHMARKS:
+        setup, n = BENCHMARKS[name]
+        result = results[name] = median_of(setup, max(int(n * args.scale), 100), args.repeat)
+        baseline = stored["results"].get(name)
+        if baseline is None:
+            verdict = "no baseline"
+        else:
+            problems = regressions(result, baseline, args.threshold, args.p99_threshold, args.alloc_slack)
+            change = result["calls_per_second"] / baseline["calls_per_second"] - 1
+            verdict = f"{change:+.1%}" + ("  REGRESSION: " + "; ".join(problems) if problems else "")
+            failed = failed or bool(problems)
+        print(f"{name:<27} {result['calls_per_second']:>13,.0f} {result['p50_ns']:>9,.0f} "
+              f"{result['p99_ns']:>9,.0f} {result['alloc_blocks_per_call']:>11.2f}  {verdict}")
+
+    if args.update:
+        stored = {"machine": machine(), "results": dict(stored["results"], **results)}
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baselines written to {args.baseline}")
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
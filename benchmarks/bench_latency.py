@@ -0,0 +1,37 @@
+"""
+Cost of recording one latency sample.
+
+    python benchmarks/bench_latency.py
+
+Exits non-zero if LatencyStats.record takes a microsecond or more per sample.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.latency import LatencyStats  # noqa: E402
+
+BUDGET_NS = 1000
+
+
+def bench(samples=1_000_000):
+    stats = LatencyStats()
+    values = [int(random.lognormvariate(10, 2)) for _ in range(samples)]
+    record = stats.record
+    started = time.perf_counter_ns()
+    for value in values:
+        record("tick", value)
+    return (time.perf_counter_ns() - started) / samples
+
+
+def main():
+    per_sample = min(bench() for _ in range(3))
+    print(f"LatencyStats.record: {per_sample:.0f} ns/sample (budget {BUDGET_NS} ns)")
+    return 0 if per_sample < BUDGET_NS else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
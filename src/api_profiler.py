@@ -0,0 +1,385 @@
+"""
+Profiling of the Fyers REST API: a FyersModel wrapper that times every call,
+and a streaming analyzer for the JSON-lines logs written by the SDK and the bot.
+
+ProfiledFyers stands in for a FyersModel (or the FakeBroker). Each endpoint
+call is timed into a LatencyHistogram and its outcome ("s") and error code are
+counted; the overhead is two clock reads, a dict lookup and a log record handed
+to the structured_log queue. The record carries the call's latency and a
+fingerprint of its arguments, so the analyzer can tell repeated identical
+requests apart from merely frequent ones:
+
+    fyers = ProfiledFyers(fyersModel.FyersModel(...))
+    fyers.place_order(data=...)
+    fyers.snapshot()    # {"place_order": {"calls": 1, "errors": 0, "codes": {}, "latency": {...}}}
+
+The analyzer reads fyersApi.log, fyersRequests.log, fyersDataSocket.log and the
+bot's own log line by line, keeping only fixed-size per-endpoint state, so any
+log size fits in constant memory:
+
+    python -m src.api_profiler                       # the SDK logs in the current directory + data/trading_bot.log
+    python -m src.api_profiler fyersRequests.log --window 1 --min-burst 5 --json
+
+The SDK logs name endpoints by URL path ("/orders/sync") and carry no timings;
+the bot's records name them by method ("place_order") and carry latency_ms.
+"""
+import argparse
+import datetime
+import heapq
+import json
+import logging
+import os
+import sys
+import time
+import zlib
+
+from src.latency import LatencyHistogram, LatencyStats
+from src.structured_log import DEFAULT_LOG_FILE
+
+DEFAULT_LOG_FILES = ("fyersApi.log", "fyersRequests.log", "fyersDataSocket.log", DEFAULT_LOG_FILE)
+DEFAULT_PROFILE_FILE = os.path.join("data", "api_profile.json")
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+log = logging.getLogger("trading_bot.api")
+
+
+def request_fingerprint(args, kwargs):
+    """Short, stable hash of a call's arguments; equal requests get equal fingerprints."""
+    return format(zlib.crc32(repr((args, sorted(kwargs.items()))).encode()), "08x")
+
+
+class ProfiledFyers:
+    """
+    Proxy for a FyersModel that records per-endpoint latency, outcome and error
+    code. Attributes that are not callables pass straight through. Counters are
+    not locked, like LatencyHistogram's.
+    """
+
+    def __init__(self, fyers, latency=None):
+        self.fyers = fyers
+        self.latency = latency or LatencyStats()
+        self.calls = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self.fyers, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        histogram = self.latency.histogram(name)
+        counters = self.calls.setdefault(name, {"calls": 0, "errors": 0, "codes": {}})
+        clock = time.perf_counter_ns
+
+        def call(*args, **kwargs):
+            t0 = clock()
+            try:
+                response = attr(*args, **kwargs)
+            except Exception as e:
+                elapsed = clock() - t0
+                self._record(name, histogram, counters, elapsed, "exception", type(e).__name__, args, kwargs)
+                raise
+            elapsed = clock() - t0
+            status = response.get("s") if isinstance(response, dict) else None
+            code = response.get("code") if status not in (None, "ok") else None
+            self._record(name, histogram, counters, elapsed, status, code, args, kwargs)
+            return response
+
+        call.__name__ = name
+        # cached on the instance: later lookups skip __getattr__ entirely
+        self.__dict__[name] = call
+        return call
+
+    def _record(self, name, histogram, counters, elapsed, status, code, args, kwargs):
+        histogram.record(elapsed)
+        counters["calls"] += 1
+        if status != "ok":
+            counters["errors"] += 1
+            key = str(code)
+            counters["codes"][key] = counters["codes"].get(key, 0) + 1
+        log.info({"event": "api_call", "API": name, "s": status, "code": code,
+                  "latency_ms": round(elapsed / 1e6, 3), "request": request_fingerprint(args, kwargs)})
+
+    def snapshot(self):
+        """Per-endpoint call / error counts, error codes and latency percentiles (µs)."""
+        latency = self.latency.snapshot()
+        return {name: dict(counters, codes=dict(counters["codes"]), latency=latency.get(name))
+                for name, counters in list(self.calls.items())}
+
+    def dump(self, path=DEFAULT_PROFILE_FILE):
+        """Atomically write snapshot() as JSON to `path`."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(tmp, path)
+
+
+# ---------------- log analysis ----------------
+def parse_timestamp(value):
+    """Epoch seconds of a fyers*.log timestamp ("2026-01-02 10:25:53,048+0530"), or None."""
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class _Endpoint:
+
+    __slots__ = ("calls", "errors", "statuses", "error_codes", "first", "last", "minute",
+                 "active_minutes", "second", "in_second", "peak_per_second", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.statuses = {}
+        self.error_codes = {}       # code -> [count, first message]
+        self.first = self.last = None
+        self.minute = self.second = None
+        self.active_minutes = 0
+        self.in_second = 0
+        self.peak_per_second = 0
+        self.latency = None
+
+    def call(self, ts, status):
+        self.calls += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if ts is None:
+            return
+        if self.first is None or ts < self.first:
+            self.first = ts
+        if self.last is None or ts > self.last:
+            self.last = ts
+        minute, second = int(ts // 60), int(ts)
+        if minute != self.minute:
+            self.minute = minute
+            self.active_minutes += 1
+        if second != self.second:
+            self.second = second
+            self.in_second = 0
+        self.in_second += 1
+        self.peak_per_second = max(self.peak_per_second, self.in_second)
+
+    def error(self, code, message):
+        self.errors += 1
+        entry = self.error_codes.get(code)
+        if entry is None:
+            self.error_codes[code] = [1, message]
+        else:
+            entry[0] += 1
+
+    def report(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "error_codes": {code: {"count": count, "message": message}
+                            for code, (count, message) in sorted(self.error_codes.items(), key=lambda e: -e[1][0])},
+            "first": self.first,
+            "last": self.last,
+            "active_minutes": self.active_minutes,
+            "calls_per_active_minute": self.calls / self.active_minutes if self.active_minutes else None,
+            "peak_calls_per_second": self.peak_per_second,
+            "latency": self.latency.snapshot() if self.latency is not None else None,
+        }
+
+
+class LogAnalyzer:
+    """
+    Folds JSON log records into per-endpoint statistics in constant memory.
+
+    A call is a fyersRequests.log record ({"Status Code", "API"}) or a bot
+    "api_call" record; a fyersApi.log record ({"API", "Error"}) adds an error
+    code to its endpoint without counting another call. A duplicate burst is a
+    run of at least `min_burst` calls to the same endpoint with the same
+    request fingerprint (bot records) or the same status code (SDK records),
+    each within `window` seconds of the previous one; the `top` largest are kept.
+    Other records (e.g. fyersDataSocket.log) are counted per service and location.
+    """
+
+    def __init__(self, window=2.0, min_burst=3, top=10):
+        self.window = window
+        self.min_burst = min_burst
+        self.top = top
+        self.records = 0
+        self.skipped = 0
+        self.endpoints = {}
+        self.events = {}            # (service, level, location) -> [count, first message]
+        self.bursts = 0
+        self.duplicate_calls = 0
+        self._largest = []          # min-heap of (count, start, end, API, key)
+        self._runs = {}             # (API, key) -> [start, last, count]
+
+    def endpoint(self, name):
+        endpoint = self.endpoints.get(name)
+        if endpoint is None:
+            endpoint = self.endpoints[name] = _Endpoint()
+        return endpoint
+
+    def feed_line(self, line):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            self.skipped += 1
+            return
+        if isinstance(record, dict):
+            self.feed(record)
+        else:
+            self.skipped += 1
+
+    def feed(self, record):
+        self.records += 1
+        message = record.get("message")
+        ts = parse_timestamp(record.get("timestamp"))
+        if isinstance(message, dict) and "API" in message:
+            api = str(message["API"])
+            if "Error" in message:
+                error = message["Error"] if isinstance(message["Error"], dict) else {"message": message["Error"]}
+                self.endpoint(api).error(str(error.get("code")), error.get("message"))
+                return
+            if "Status Code" in message:
+                status = str(message["Status Code"])
+                self.endpoint(api).call(ts, status)
+                self._burst(api, status, ts)
+                return
+            if message.get("event") == "api_call":
+                endpoint = self.endpoint(api)
+                status = str(message.get("s"))
+                endpoint.call(ts, status)
+                if status != "ok":
+                    endpoint.error(str(message.get("code")), None)
+                if message.get("latency_ms") is not None:
+                    if endpoint.latency is None:
+                        endpoint.latency = LatencyHistogram()
+                    endpoint.latency.record(int(message["latency_ms"] * 1e6))
+                self._burst(api, message.get("request", status), ts)
+                return
+        key = (record.get("service"), record.get("level"), record.get("location"))
+        entry = self.events.get(key)
+        if entry is None:
+            text = message if isinstance(message, str) else json.dumps(message, default=str)
+            self.events[key] = [1, text[:200]]
+        else:
+            entry[0] += 1
+
+    def _burst(self, api, key, ts):
+        if ts is None:
+            return
+        run = self._runs.get((api, key))
+        if run is not None and 0 <= ts - run[1] <= self.window:
+            run[1] = ts
+            run[2] += 1
+            return
+        if run is not None:
+            self._close(api, key, run)
+        self._runs[(api, key)] = [ts, ts, 1]
+        if len(self._runs) > 1000:
+            # fingerprints are unbounded: retire runs that can no longer grow
+            for stale_key, stale in [(k, r) for k, r in self._runs.items() if ts - r[1] > self.window]:
+                self._close(*stale_key, stale)
+                del self._runs[stale_key]
+
+    def _close(self, api, key, run):
+        start, end, count = run
+        if count < self.min_burst:
+            return
+        self.bursts += 1
+        self.duplicate_calls += count - 1
+        item = (count, start, end, api, str(key))
+        if len(self._largest) < self.top:
+            heapq.heappush(self._largest, item)
+        elif item > self._largest[0]:
+            heapq.heapreplace(self._largest, item)
+
+    def flush(self):
+        """Close the open bursts; call at the end of each file, whose clock may not continue the last one's."""
+        for (api, key), run in self._runs.items():
+            self._close(api, key, run)
+        self._runs.clear()
+
+    def feed_file(self, path):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.strip():
+                    self.feed_line(line)
+        self.flush()
+
+    def report(self):
+        self.flush()
+        return {
+            "records": self.records,
+            "skipped": self.skipped,
+            "endpoints": {name: endpoint.report()
+                          for name, endpoint in sorted(self.endpoints.items(), key=lambda e: -e[1].calls)},
+            "bursts": {
+                "count": self.bursts,
+                "duplicate_calls": self.duplicate_calls,
+                "largest": [{"API": api, "key": key, "count": count, "start": start, "end": end}
+                            for count, start, end, api, key in sorted(self._largest, reverse=True)],
+            },
+            "events": [{"service": service, "level": level, "location": location, "count": count, "message": text}
+                       for (service, level, location), (count, text)
+                       in sorted(self.events.items(), key=lambda e: -e[1][0])],
+        }
+
+
+def analyze(paths, window=2.0, min_burst=3, top=10):
+    """Report of LogAnalyzer over the given log files, read one line at a time."""
+    analyzer = LogAnalyzer(window=window, min_burst=min_burst, top=top)
+    for path in paths:
+        analyzer.feed_file(path)
+    return analyzer.report()
+
+
+def _time(ts):
+    return datetime.datetime.fromtimestamp(ts, IST).strftime("%Y-%m-%d %H:%M:%S") if ts is not None else "-"
+
+
+def format_report(report):
+    """Plain-text tables of an analyze() report."""
+    lines = [f"{report['records']} records ({report['skipped']} unparseable lines skipped)", "",
+             f"{'endpoint':<24} {'calls':>7} {'errors':>7} {'/active min':>11} {'peak/s':>6} "
+             f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}  statuses"]
+    for name, e in report["endpoints"].items():
+        latency = e["latency"] or {}
+        ms = [f"{latency[k] / 1000:>8.1f}" if latency.get(k) is not None else f"{'-':>8}"
+              for k in ("p50_us", "p99_us", "max_us")]
+        rate = f"{e['calls_per_active_minute']:>11.1f}" if e["calls_per_active_minute"] is not None else f"{'-':>11}"
+        statuses = ", ".join(f"{status}: {count}" for status, count in e["statuses"].items())
+        lines.append(f"{name:<24} {e['calls']:>7} {e['errors']:>7} {rate} {e['peak_calls_per_second']:>6} "
+                     f"{' '.join(ms)}  {statuses}")
+    errors = [(name, code, entry) for name, e in report["endpoints"].items() for code, entry in e["error_codes"].items()]
+    if errors:
+        lines += ["", "Error codes"]
+        for name, code, entry in errors:
+            lines.append(f"  {name:<22} {code:>8} x{entry['count']:<6} {entry['message'] or ''}")
+    bursts = report["bursts"]
+    lines += ["", f"Duplicate-request bursts: {bursts['count']} ({bursts['duplicate_calls']} repeated calls)"]
+    for burst in bursts["largest"]:
+        lines.append(f"  {burst['API']:<22} x{burst['count']:<6} {_time(burst['start'])} .. {_time(burst['end'])}"
+                     f"  [{burst['key']}]")
+    if report["events"]:
+        lines += ["", "Other events"]
+        for event in report["events"]:
+            lines.append(f"  {event['count']:>6} {event['level'] or '':<7} {event['location'] or ''}: {event['message']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise Fyers API usage from the SDK and bot JSON logs.")
+    parser.add_argument("logs", nargs="*", help=f"log files (default: those of {', '.join(DEFAULT_LOG_FILES)} that exist)")
+    parser.add_argument("--window", type=float, default=2.0,
+                        help="max seconds between calls of one duplicate burst (default 2)")
+    parser.add_argument("--min-burst", type=int, default=3, help="calls that make a burst (default 3)")
+    parser.add_argument("--top", type=int, default=10, help="largest bursts to list (default 10)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    paths = args.logs or [path for path in DEFAULT_LOG_FILES if os.path.exists(path)]
+    if not paths:
+        parser.error("no log files given and none of the default ones exist")
+    report = analyze(paths, window=args.window, min_burst=args.min_burst, top=args.top)
+    print(json.dumps(report, indent=1) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
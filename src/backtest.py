@@ -0,0 +1,150 @@
+"""
+Vectorized historical backtest of the triple-MA crossover strategy.
+
+Replays the live rules from src.trading_logic over Fyers `/history` candles
+([epoch, open, high, low, close, volume] rows) without a per-bar Python loop:
+
+- a signal on closed bar i is acted on by the first tick of bar i + 1, so the
+  entry fills at open[i + 1]; like the engine, each signal bar is decided once
+  and there is at most one position at a time: a signal whose entry bar is not
+  after the open position's exit bar is dropped, not deferred;
+- "buy" signals go long, "sell" signals go short. Live, a sell signal buys a
+  Put (or shorts the equity) and the engine records the signal as the
+  position's direction, so the stop below is checked on the same side;
+- each position is stopped out on the first later tick that crosses the long MA
+  of the last closed bar, i.e. low[j] <= long_ma[j - 1] for longs, filled at the
+  MA level or at open[j] if the bar gapped through it;
+- like executed_trades_global, max_trades counts entries, not open positions.
+"""
+import numpy as np
+import pandas as pd
+
+from src.trading_logic import rolling_mean, detect_signals
+
+TRADE_COLUMNS = ["entry_time", "exit_time", "side", "qty", "entry_price", "exit_price", "pnl", "open"]
+
+
+def candles_to_arrays(candles):
+    """Split Fyers candle rows into ts / open / high / low / close / volume arrays."""
+    arr = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+    return {
+        "ts": arr[:, 0].astype(np.int64),
+        "open": arr[:, 1],
+        "high": arr[:, 2],
+        "low": arr[:, 3],
+        "close": arr[:, 4],
+        "volume": arr[:, 5],
+    }
+
+
+def simulate(bars, short_ma, medium_ma, long_ma, max_trades, quantity):
+    """
+    Core simulation on precomputed MA arrays; returns a dict of per-trade arrays.
+    Kept separate from run_backtest so a parameter sweep can reuse cached MAs.
+    """
+    open_, high, low, close = bars["open"], bars["high"], bars["low"], bars["close"]
+    n = len(close)
+
+    signals = detect_signals(close, short_ma, medium_ma, long_ma)
+    signal_bars = np.flatnonzero(signals[:-1]) if n > 1 else np.empty(0, dtype=np.int64)
+    entry_bars = signal_bars + 1
+    sides = signals[signal_bars].astype(np.int64)
+
+    # long MA of the last closed bar, as seen by ticks of bar j
+    long_prev = np.empty(n)
+    long_prev[:1] = np.nan
+    long_prev[1:] = long_ma[:-1]
+    long_stop_bars = np.flatnonzero(low <= long_prev)
+    short_stop_bars = np.flatnonzero(high >= long_prev)
+
+    exit_bars = np.full(len(entry_bars), -1, dtype=np.int64)
+    for stop_bars, side in ((long_stop_bars, 1), (short_stop_bars, -1)):
+        mask = sides == side
+        pos = np.searchsorted(stop_bars, entry_bars[mask], side="left")
+        hit = pos < len(stop_bars)
+        found = np.full(pos.shape, -1, dtype=np.int64)
+        found[hit] = stop_bars[pos[hit]]
+        exit_bars[mask] = found
+
+    # one position at a time: the exits of every candidate are known, so a
+    # single pass keeps the entries that find the book flat
+    kept, free_from = [], 0
+    limit = max(int(max_trades), 0)
+    for k, (entry, exit_bar) in enumerate(zip(entry_bars.tolist(), exit_bars.tolist())):
+        if len(kept) >= limit:
+            break
+        if entry < free_from:
+            continue
+        kept.append(k)
+        free_from = exit_bar + 1 if exit_bar >= 0 else n
+    entry_bars, exit_bars, sides = entry_bars[kept], exit_bars[kept], sides[kept]
+
+    is_open = exit_bars < 0
+    exit_idx = np.where(is_open, n - 1, exit_bars)
+    level = long_prev[exit_idx]
+    gapped = np.where(sides == 1, open_[exit_idx] <= level, open_[exit_idx] >= level)
+    exit_price = np.where(gapped, open_[exit_idx], level)
+    exit_price = np.where(is_open, close[-1] if n else np.nan, exit_price)
+
+    entry_price = open_[entry_bars]
+    pnl = (exit_price - entry_price) * sides * quantity
+    return {
+        "entry_bar": entry_bars,
+        "exit_bar": exit_idx,
+        "side": sides,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "pnl": pnl,
+        "open": is_open,
+        "signals": signals,
+    }
+
+
+def summarize(sim):
+    pnl = sim["pnl"]
+    trades = len(pnl)
+    return {
+        "pnl": float(pnl.sum()),
+        "num_trades": trades,
+        "win_rate": float((pnl > 0).mean()) if trades else 0.0,
+        "max_drawdown": float(_max_drawdown(pnl)),
+    }
+
+
+def _max_drawdown(pnl):
+    if len(pnl) == 0:
+        return 0.0
+    equity = np.concatenate(([0.0], np.cumsum(pnl)))
+    return (np.maximum.accumulate(equity) - equity).max()
+
+
+def run_backtest(candles, short_window, medium_window, long_window, extra_long_window=None,
+                 max_trades=10, quantity=1):
+    """
+    Backtest the live strategy over `candles` (the list returned by fetch_data /
+    get_historical_data, or an (n, 6) array). Returns a dict with the trade list as
+    a DataFrame plus summary stats. extra_long_window is accepted for symmetry with
+    the live MA set but does not affect entries or exits.
+    """
+    bars = candles_to_arrays(candles)
+    short_ma = rolling_mean(bars["close"], short_window)
+    medium_ma = rolling_mean(bars["close"], medium_window)
+    long_ma = rolling_mean(bars["close"], long_window)
+    sim = simulate(bars, short_ma, medium_ma, long_ma, max_trades, quantity)
+
+    ts = bars["ts"]
+    trades = pd.DataFrame({
+        "entry_time": ts[sim["entry_bar"]],
+        "exit_time": ts[sim["exit_bar"]],
+        "side": np.where(sim["side"] == 1, "buy", "sell"),
+        "qty": np.full(len(sim["pnl"]), quantity),
+        "entry_price": sim["entry_price"],
+        "exit_price": sim["exit_price"],
+        "pnl": sim["pnl"],
+        "open": sim["open"],
+    }, columns=TRADE_COLUMNS)
+
+    result = summarize(sim)
+    result["trades"] = trades
+    result["signals"] = sim["signals"]
+    return result
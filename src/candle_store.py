@@ -0,0 +1,176 @@
+"""
+On-disk cache of Fyers `/history` candles.
+
+Candles for each (symbol, resolution) live in one .npy file of
+[epoch, open, high, low, close, volume] rows (memory-mappable with load()), plus
+a small JSON sidecar recording the time range already fetched. A request only
+downloads what is missing: normally just the tail since the last stored bar,
+which is re-fetched because it may have been stored while still forming.
+Ranges longer than Fyers serves in one call are split into chunks and fetched
+in parallel.
+"""
+import datetime
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.instruments import IST
+
+DEFAULT_ROOT = os.path.join("data", "candles")
+
+# maximum span Fyers returns per /history request
+MAX_DAYS_INTRADAY = 100
+MAX_DAYS_DAILY = 366
+DAILY_RESOLUTIONS = ("D", "1D")
+
+DAY = 24 * 60 * 60
+
+
+def _empty():
+    return np.empty((0, 6), dtype=np.float64)
+
+
+def _to_epoch(value, date_format, end_of_day=False):
+    """
+    Fyers range bound (epoch for date_format 0, 'YYYY-MM-DD' for 1) -> epoch seconds.
+    Dates are IST trading days, as Fyers reads them; an inclusive range_to date
+    covers the whole day, so end_of_day maps it to its last second.
+    """
+    if str(date_format) == "1":
+        day = datetime.datetime.strptime(str(value), "%Y-%m-%d").replace(tzinfo=IST)
+        return int(day.timestamp()) + (DAY - 1 if end_of_day else 0)
+    return int(value)
+
+
+class CandleStore:
+
+    def __init__(self, root=DEFAULT_ROOT, max_workers=4):
+        self.root = root
+        self.max_workers = max_workers
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # ---------------- files ----------------
+    def _path(self, symbol, resolution):
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{symbol}__{resolution}")
+        return os.path.join(self.root, name + ".npy")
+
+    def _lock(self, symbol, resolution):
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, str(resolution)), threading.Lock())
+
+    def load(self, symbol, resolution, mmap=True):
+        """Stored candles as an (n, 6) array, memory-mapped read-only by default."""
+        path = self._path(symbol, resolution)
+        if not os.path.exists(path):
+            return _empty()
+        return np.load(path, mmap_mode="r" if mmap else None)
+
+    def _load_meta(self, symbol, resolution):
+        try:
+            with open(self._path(symbol, resolution) + ".json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, symbol, resolution, candles, covered_from, covered_to):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(symbol, resolution)
+        for target, write in (
+            (path, lambda f: np.save(f, candles)),
+            (path + ".json", lambda f: f.write(json.dumps({"from": covered_from, "to": covered_to}).encode())),
+        ):
+            tmp = target + ".tmp"
+            with open(tmp, "wb") as f:
+                write(f)
+            os.replace(tmp, target)
+
+    # ---------------- fetching ----------------
+    def _chunks(self, resolution, start, end):
+        days = MAX_DAYS_DAILY if str(resolution) in DAILY_RESOLUTIONS else MAX_DAYS_INTRADAY
+        span = days * DAY - 1
+        chunks = []
+        while start <= end:
+            chunks.append((start, min(start + span, end)))
+            start += span + 1
+        return chunks
+
+    def _fetch_range(self, fyers, symbol, resolution, start, end):
+        def fetch(bounds):
+            return fyers.history(data={
+                "symbol": symbol,
+                "resolution": str(resolution),
+                "date_format": "0",
+                "range_from": str(bounds[0]),
+                "range_to": str(bounds[1]),
+                "cont_flag": "1",
+            })
+
+        chunks = self._chunks(resolution, start, end)
+        if len(chunks) == 1:
+            responses = [fetch(chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                responses = list(pool.map(fetch, chunks))
+
+        parts = []
+        for response in responses:
+            if response.get("s") != "ok":
+                return None, response
+            candles = response.get("candles") or []
+            if candles:
+                parts.append(np.asarray(candles, dtype=np.float64).reshape(-1, 6))
+        return (np.concatenate(parts) if parts else _empty()), None
+
+    def history(self, fyers, symbol, resolution, range_from, range_to, date_format=0):
+        """
+        Candles for [range_from, range_to], downloading only what the store is missing.
+        Bounds are epoch seconds, or 'YYYY-MM-DD' dates (both inclusive) with
+        date_format=1, as for /history. Returns {"s": "ok", "candles": array} with an
+        (n, 6) float64 array rather than /history's nested list, or the failing Fyers
+        response unchanged.
+        """
+        range_from = _to_epoch(range_from, date_format)
+        range_to = _to_epoch(range_to, date_format, end_of_day=True)
+        with self._lock(symbol, resolution):
+            stored = np.array(self.load(symbol, resolution, mmap=False))
+            meta = self._load_meta(symbol, resolution)
+            if meta is None or len(stored) == 0:
+                gaps = [(range_from, range_to)]
+                covered_from, covered_to = range_from, range_to
+            else:
+                gaps = []
+                covered_from, covered_to = meta["from"], meta["to"]
+                if range_from < covered_from:
+                    gaps.append((range_from, covered_from - 1))
+                    covered_from = range_from
+                if range_to > covered_to:
+                    # re-fetch the last stored bar, it may have been partial
+                    gaps.append((min(int(stored[-1, 0]), covered_to), range_to))
+                    covered_to = range_to
+
+            if gaps:
+                fetched = []
+                for start, end in gaps:
+                    candles, error = self._fetch_range(fyers, symbol, resolution, start, end)
+                    if error is not None:
+                        return error
+                    fetched.append(candles)
+                merged = np.concatenate([*fetched, stored])
+                # newest download wins for duplicate timestamps
+                _, first = np.unique(merged[:, 0], return_index=True)
+                stored = merged[first]
+                self._save(symbol, resolution, stored, covered_from, covered_to)
+
+        ts = stored[:, 0]
+        lo, hi = np.searchsorted(ts, range_from, "left"), np.searchsorted(ts, range_to, "right")
+        return {"s": "ok", "candles": stored[lo:hi]}
+
+    def history_days(self, fyers, symbol, resolution, days, now=None):
+        """The last `days` days of candles up to `now` (epoch seconds, default current time)."""
+        now = int(now if now is not None else datetime.datetime.now().timestamp())
+        return self.history(fyers, symbol, resolution, now - int(days) * DAY, now)
@@ -0,0 +1,198 @@
+"""
+OHLCV candles from SymbolUpdate ticks.
+
+CandleBuilder folds ticks into bars of one timeframe; CandleAggregator keeps
+several timeframes of one symbol in step and reports the bars each tick closes.
+Buckets use the same timestamps as Fyers /history candles: intraday bars are
+anchored at the 09:15 IST session open (so 60-minute bars start at 09:15,
+10:15, ...) and daily bars at IST midnight. Daily bars only take ticks inside
+the trading session.
+
+Builders can be seeded with /history candles. The last seeded candle is treated
+as still forming, so a live tick in the same bucket extends it instead of
+starting a duplicate bar. build_bars() is the vectorized equivalent for
+recorded tick arrays.
+"""
+import numpy as np
+
+from src.ring_buffer import RingBuffer
+
+MINUTE = 60
+DAY = 24 * 60 * 60
+IST_OFFSET = 5 * 60 * 60 + 30 * 60
+
+# NSE trading session, in seconds after IST midnight
+NSE_SESSION = (9 * 3600 + 15 * 60, 15 * 3600 + 30 * 60)
+
+DAILY_TIMEFRAMES = ("D", "1D")
+
+BAR_DTYPE = np.dtype([("ts", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+                      ("close", "<f8"), ("volume", "<f8")])
+
+
+def timeframe_seconds(timeframe):
+    """'1', '5', '15', '60' (minutes) or 'D' -> bucket length in seconds."""
+    timeframe = str(timeframe)
+    if timeframe in DAILY_TIMEFRAMES:
+        return DAY
+    try:
+        minutes = int(timeframe)
+    except ValueError:
+        raise ValueError(f"unsupported timeframe {timeframe!r}") from None
+    if minutes < 1:
+        raise ValueError(f"unsupported timeframe {timeframe!r}")
+    return minutes * MINUTE
+
+
+def bucket_start(epoch_sec, seconds):
+    """Start of the bucket holding epoch_sec (scalar or array), aligned like Fyers candles."""
+    anchor = -IST_OFFSET if seconds >= DAY else NSE_SESSION[0] - IST_OFFSET
+    return epoch_sec - (epoch_sec - anchor) % seconds
+
+
+def in_session(epoch_sec, session=NSE_SESSION):
+    seconds_into_day = (epoch_sec + IST_OFFSET) % DAY
+    return session[0] <= seconds_into_day <= session[1]
+
+
+class CandleBuilder:
+    """
+    Bars of one timeframe. Closed bars are kept in `bars` (a RingBuffer of
+    BAR_DTYPE); the forming bar is ts/open/high/low/close/volume.
+    """
+
+    def __init__(self, timeframe, capacity=500, session=NSE_SESSION):
+        self.timeframe = str(timeframe)
+        self.seconds = timeframe_seconds(timeframe)
+        # only daily bars are session-bounded; intraday ticks are bucketed as they come
+        self.session = session if self.seconds >= DAY else None
+        self.bars = RingBuffer(capacity, BAR_DTYPE)
+        self.ts = None
+        self._end = None
+        self.open = self.high = self.low = self.close = None
+        self.volume = 0.0
+        self._cum_volume = None
+
+    def current(self):
+        """The forming bar as an (ts, open, high, low, close, volume) tuple, or None."""
+        if self.ts is None:
+            return None
+        return (self.ts, self.open, self.high, self.low, self.close, self.volume)
+
+    def update(self, epoch_sec, price, cum_volume=None):
+        """
+        Fold in one tick. cum_volume is the tick's vol_traded_today; bar volume is
+        its increase. Returns the bar this tick closed, as a tuple, or None.
+        Ticks older than the forming bar are ignored.
+        """
+        if self.session is not None and not in_session(epoch_sec, self.session):
+            return None
+        volume = 0.0
+        if cum_volume is not None:
+            if self._cum_volume is not None and cum_volume >= self._cum_volume:
+                volume = cum_volume - self._cum_volume
+            self._cum_volume = cum_volume
+
+        end = self._end
+        if end is not None and epoch_sec < end:
+            if epoch_sec < self.ts:
+                return None
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            self.close = price
+            self.volume += volume
+            return None
+
+        closed = None
+        start = bucket_start(epoch_sec, self.seconds)
+        if self.ts is not None:
+            closed = (self.ts, self.open, self.high, self.low, self.close, self.volume)
+            self.bars.append(closed)
+        self.ts = start
+        self._end = start + self.seconds
+        self.open = self.high = self.low = self.close = price
+        self.volume = volume
+        return closed
+
+    def seed(self, candles):
+        """
+        Load /history candles ((n, 6) [epoch, o, h, l, c, v] rows, oldest first).
+        The last one becomes the forming bar.
+        """
+        candles = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+        self.bars.clear()
+        self.ts = self._end = None
+        self._cum_volume = None
+        if len(candles) == 0:
+            return self
+        closed = np.empty(len(candles) - 1, dtype=BAR_DTYPE)
+        for i, name in enumerate(BAR_DTYPE.names):
+            closed[name] = candles[:-1, i]
+        self.bars.extend(closed)
+        ts, o, h, l, c, v = candles[-1]
+        self.ts = int(ts)
+        self._end = self.ts + self.seconds
+        self.open, self.high, self.low, self.close, self.volume = float(o), float(h), float(l), float(c), float(v)
+        return self
+
+
+class CandleAggregator:
+    """
+    Several timeframes of one symbol built from one tick stream. update()
+    returns [(timeframe, bar), ...] for the bars the tick closed; on_bar, if
+    given, is also called with each of them.
+    """
+
+    def __init__(self, timeframes, capacity=500, session=NSE_SESSION, on_bar=None):
+        self.builders = {str(tf): CandleBuilder(tf, capacity, session) for tf in timeframes}
+        self._builders = list(self.builders.values())
+        self.on_bar = on_bar
+
+    def __getitem__(self, timeframe):
+        return self.builders[str(timeframe)]
+
+    def update(self, epoch_sec, price, cum_volume=None):
+        closed = []
+        for builder in self._builders:
+            bar = builder.update(epoch_sec, price, cum_volume)
+            if bar is not None:
+                closed.append((builder.timeframe, bar))
+                if self.on_bar is not None:
+                    self.on_bar(builder.timeframe, bar)
+        return closed
+
+    def on_tick(self, msg):
+        """update() from a data-socket message; messages without ltp/exch_feed_time close nothing."""
+        price, epoch_sec = msg.get("ltp"), msg.get("exch_feed_time")
+        if price is None or epoch_sec is None:
+            return []
+        return self.update(epoch_sec, float(price), msg.get("vol_traded_today"))
+
+    def seed(self, timeframe, candles):
+        self.builders[str(timeframe)].seed(candles)
+
+
+def build_bars(ts, price, volume=None, timeframe="1"):
+    """
+    Vectorized bars from time-ordered tick arrays (e.g. a recorded tick log's
+    exch_feed_time / ltp / per-tick volume). Returns an (n, 6) float array of
+    [epoch, open, high, low, close, volume] rows, like /history. Daily bars are
+    not session-filtered here.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    price = np.asarray(price, dtype=np.float64)
+    if len(ts) == 0:
+        return np.empty((0, 6), dtype=np.float64)
+    buckets = bucket_start(ts, timeframe_seconds(timeframe))
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.append(starts[1:], len(ts)) - 1
+    bars = np.empty((len(starts), 6), dtype=np.float64)
+    bars[:, 0] = buckets[starts]
+    bars[:, 1] = price[starts]
+    bars[:, 2] = np.maximum.reduceat(price, starts)
+    bars[:, 3] = np.minimum.reduceat(price, starts)
+    bars[:, 4] = price[ends]
+    bars[:, 5] = 0.0 if volume is None else np.add.reduceat(np.asarray(volume, dtype=np.float64), starts)
+    return bars
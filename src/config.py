@@ -5,13 +5,19 @@ REDIRECT_URI = "YOUR_REDIRECT_URI"
 
 # Trading Parameters
 TICKER = "NSE:SBIN-EQ"
+# TICKERS = ["NSE:NIFTY50-INDEX", "NSE:NIFTYBANK-INDEX"]  # trade several underlyings; QUANTITY / OPTION_STEP may then be dicts
+SIDE = "buy"
 TIMEFRAME = "5"  # "1", "5", "15", "60", "D"
 SHORT_MA_PERIOD = 11
 MEDIUM_MA_PERIOD = 23
 LONG_MA_PERIOD = 50
+EXTRA_LONG_MA_PERIOD = 89
 MAX_TRADES = 10
 TRADE_TYPE = "Equity"  # "Equity" or "Options"
 OPTION_TYPE = "Call"  # "Call" or "Put"
 QUANTITY = 1
 EXPIRY_DATE = "2024-12-31"  # YYYY-MM-DD
+EXPIRY_TYPE = "Weekly"  # "Weekly" or "Monthly"
+OPTION_STEP = 50  # strike price increments
+SYMBOL_MASTER_PATH = "NSE_FO.csv"  # local copy of https://public.fyers.in/sym_details/NSE_FO.csv
 PRODUCT_TYPE = "INTRADAY"  # "INTRADAY", "CNC", "MARGIN", "CO", "BO"
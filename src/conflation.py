@@ -0,0 +1,106 @@
+"""
+Tick conflation between the data-socket thread and the strategy.
+
+The socket callback only parks each tick in a per-symbol slot and wakes a
+worker thread, so a slow strategy tick can never back up the socket reader.
+The worker always processes the newest tick of each symbol; ticks superseded
+before it got to them are dropped and counted. Candles are built from every tick
+before it is parked (TradingEngine.ingest), so only strategy evaluation is
+conflated. A tick is only superseded by a newer one in the same candle bucket:
+the last tick of a bucket is the candle's close, so when a boundary is crossed
+it is kept and processed first.
+"""
+import logging
+import threading
+import time
+
+log = logging.getLogger("trading_bot.conflation")
+
+
+class TickConflator:
+    """
+    handler(msg) runs on the worker thread. bucket(msg) returns the candle bucket
+    a tick belongs to (e.g. its floored exch_feed_time), or None to never conflate
+    it. Messages without a "symbol" (control messages) are always delivered.
+    """
+
+    def __init__(self, handler, bucket=None, latency=None):
+        self._handler = handler
+        self._bucket = bucket or (lambda msg: None)
+        self._latency = latency
+        self._slots = {}    # symbol -> [(msg, bucket, enqueued_ns), ...] awaiting the worker
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.max_backlog = 0
+        self.last_lag_ns = 0
+        self.max_lag_ns = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="strategy", daemon=True)
+        self._thread.start()
+        return self
+
+    def put(self, msg):
+        """Socket-thread side: park the tick and wake the worker. Never blocks on the strategy."""
+        symbol = msg.get("symbol")
+        bucket = self._bucket(msg) if symbol is not None else None
+        entry = (msg, bucket, time.perf_counter_ns())
+        with self._cond:
+            self.received += 1
+            pending = self._slots.get(symbol)
+            if pending is None:
+                self._slots[symbol] = [entry]
+            elif symbol is not None and bucket is not None and pending[-1][1] == bucket:
+                pending[-1] = entry
+                self.dropped += 1
+            else:
+                pending.append(entry)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._slots and self._running:
+                    self._cond.wait()
+                if not self._slots:
+                    return
+                batch, self._slots = self._slots, {}
+            backlog = sum(len(pending) for pending in batch.values())
+            if backlog > self.max_backlog:
+                self.max_backlog = backlog
+            for pending in batch.values():
+                for msg, _, enqueued_ns in pending:
+                    lag = time.perf_counter_ns() - enqueued_ns
+                    self.last_lag_ns = lag
+                    if lag > self.max_lag_ns:
+                        self.max_lag_ns = lag
+                    if self._latency is not None:
+                        self._latency.record("conflation_lag", lag)
+                    try:
+                        self._handler(msg)
+                    except Exception:
+                        log.exception("tick handler failed")
+                    self.processed += 1
+
+    def stop(self, timeout=5.0):
+        """Deliver what is already queued, then stop the worker."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "max_backlog": self.max_backlog,
+            "last_lag_ms": self.last_lag_ns / 1e6,
+            "max_lag_ms": self.max_lag_ns / 1e6,
+        }
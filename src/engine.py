@@ -0,0 +1,856 @@
+"""
+Trading engine: candle bucketing, indicators, signals and order flow.
+
+Everything the bot needs at runtime lives on a TradingEngine instance, so it can
+be driven by the headless runner (src/runner.py) or hosted by the Streamlit app
+without depending on widget values or script reruns. Each traded underlying has
+its own SymbolShard (candles, indicators, option chain, positions) behind its
+own lock; one data socket feeds them all and ticks are routed by msg["symbol"].
+Any number of strategies (src/strategies.py) run per shard on one shared set
+of indicators.
+"""
+import datetime
+import logging
+import os
+import runpy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+import numpy as np
+
+from src.candle_store import CandleStore
+from src.candles import BAR_DTYPE, CandleAggregator, bucket_start, timeframe_seconds
+from src.conflation import TickConflator
+from src.engine_view import CHART_DTYPE, EngineView, SymbolView, freeze_bars, freeze_book
+from src.fyers_client import preload_sdk, subscribe_to_live_data
+from src.latency import LatencyStats
+from src.instruments import IST, InstrumentMaster, INDEX_ALIASES, build_option_chain, is_lot_multiple
+from src.order_executor import OrderExecutor
+from src.order_gate import DETERMINISTIC_ERROR_CODES, OrderGate
+from src.order_manager import OrderManager
+from src.ring_buffer import RingBuffer
+from src.snapshot import read_snapshot, write_snapshot
+from src.strategies import IndicatorRegistry, build_strategies
+from src.tick_recorder import TickRecorder
+from src.trading_logic import rolling_mean
+
+MAX_CANDLES = 500
+
+log = logging.getLogger("trading_bot.engine")
+
+DEFAULT_CONFIG = {
+    "ticker": "NSE:NIFTY50-INDEX",
+    "tickers": None,            # several underlyings in one engine; defaults to [ticker]
+    "timeframe": "1",           # "1", "5", "15", "60" minutes or "D"
+    "extra_timeframes": [],     # more timeframes to build bars for alongside the trading one
+    "short_ma_period": 11,
+    "medium_ma_period": 23,
+    "long_ma_period": 50,
+    "extra_long_ma_period": 89,
+    "strategies": None,         # strategy specs (src/strategies.py); defaults to the triple-MA rule
+    "max_trades": 10,           # per underlying
+    "trade_type": "Options",
+    "expiry_type": "Weekly",
+    "expiry_date": None,        # YYYY-MM-DD, defaults to today
+    "option_step": 50,          # option_step and quantity may be {ticker: value} dicts
+    "quantity": 65,
+    "side": "buy",
+    "symbol_master_path": "NSE_FO.csv",
+    "history_days": 100,
+    "watchlist": None,          # symbols for the universe scanner (src/scanner.py)
+    "tick_log": None,           # path of a raw tick log to append to (src/tick_recorder.py)
+    "log_level": "INFO",
+    "debug_tick_sample": 0,     # with DEBUG logging, log every Nth tick's state (0: never)
+    "conflate": True,           # run the strategy on a worker fed by src/conflation.py
+    "snapshot_path": None,      # warm-restart snapshot (src/snapshot.py), restored on start
+    "snapshot_interval": 30,    # seconds between snapshots while running
+    "launched_at": None,        # epoch seconds the app / runner process launched, for time-to-first-tick
+}
+
+
+def load_config(path=os.path.join("src", "config.py"), **overrides):
+    """
+    Engine config from a python settings file like src/config.py: every UPPER_CASE
+    name becomes a lower-case key, on top of DEFAULT_CONFIG. Unknown keys (e.g. the
+    Fyers credentials) are kept so callers can read them too.
+    """
+    config = dict(DEFAULT_CONFIG)
+    if path and os.path.exists(path):
+        for name, value in runpy.run_path(path).items():
+            if name.isupper():
+                config[name.lower()] = value
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    if not config.get("expiry_date"):
+        config["expiry_date"] = datetime.date.today().strftime("%Y-%m-%d")
+    return config
+
+
+def floor_to_timeframe(epoch_sec, minutes_tf):
+    """Pure math: floor to bucket start (no datetime/tz)"""
+    sec_per_bucket = minutes_tf * 60
+    return (epoch_sec // sec_per_bucket) * sec_per_bucket
+
+
+def for_ticker(value, ticker):
+    """Per-underlying config value: `value[ticker]` when a dict is given, else `value`."""
+    return value[ticker] if isinstance(value, dict) else value
+
+
+class SymbolShard:
+    """
+    All per-underlying state. Everything here is guarded by `lock`; the order
+    callbacks below run on the order worker thread and take it themselves.
+    Readers use `view`, the immutable SymbolView republished by publish() after
+    every change, and never take the lock (see src/engine_view.py).
+    """
+
+    def __init__(self, ticker, quantity, option_step, timeframes):
+        self.ticker = ticker
+        self.quantity = quantity
+        self.option_step = option_step
+        self.option_chain = None
+        self.lock = threading.Lock()
+        # timeframes[0] drives the strategy; the others are only built
+        self.timeframe = str(timeframes[0])
+        self.candles = CandleAggregator(timeframes, capacity=MAX_CANDLES)
+        self._builder = self.candles[self.timeframe]
+        self.live_data = {
+            "live_price": None,
+            "live_time": RingBuffer(MAX_CANDLES, dtype=np.int64),
+            "prices": RingBuffer(MAX_CANDLES),
+            "short_ma": None,
+            "medium_ma": None,
+            "long_ma": None,
+            "extra_long_ma": None,
+        }
+        self.indicators = IndicatorRegistry(self.candles)
+        self.strategies = {}
+        self._mas = ()
+        self.current_candle_ts = None
+        self.tick_count = 0
+        self.open_positions = {}
+        self.executed_trades = []
+        # orders submitted but not yet confirmed, keyed by symbol
+        self.pending_orders = {}
+        # strategy name -> ts of the last signal bar whose entry was decided; a
+        # signal holds for every tick of the following bar, but is acted on once
+        self.entry_bars = {}
+        # closed bars of the trading timeframe with the displayed MAs, for charts
+        self.chart = RingBuffer(MAX_CANDLES, CHART_DTYPE)
+        self.bar_seq = 0
+        self.history_id = 0
+        self._bars = None   # frozen copy of `chart`, rebuilt on the next publish after a bar closes
+        self._book = None   # frozen positions / trades / pending orders, rebuilt when they change
+        self.view = SymbolView(ticker, self.timeframe)
+
+    def set_strategies(self, strategies, periods):
+        """
+        Rebuild the indicator registry from the closed bars and bind `strategies`
+        to it. `periods` are the MA windows shown on the dashboard. Caller holds `lock`.
+        """
+        self.indicators = IndicatorRegistry(self.candles)
+        for strategy in strategies:
+            strategy.bind(self.indicators)
+        self.strategies = {strategy.name: strategy for strategy in strategies}
+        self._mas = tuple(self.indicators.get("sma", period, self.timeframe) for period in periods)
+        bars = self.candles[self.timeframe].bars.last()
+        rows = np.empty(len(bars), dtype=CHART_DTYPE)
+        rows["ts"] = bars["ts"]
+        rows["close"] = bars["close"]
+        for name, ma in zip(CHART_DTYPE.names[2:], self._mas):
+            rows[name] = rolling_mean(bars["close"], ma.window)
+        self.chart.clear()
+        self.chart.extend(rows)
+        self.history_id += 1
+        self._bars = None
+        self.publish()
+
+    def append_bar(self, bar):
+        """Add a closed bar of the trading timeframe, with the current MAs, to `chart`. Caller holds `lock`."""
+        short, medium, long, extra_long = self._mas
+        self.chart.append((bar[0], bar[4], short.value, medium.value, long.value, extra_long.value))
+        self.bar_seq += 1
+        self._bars = None
+
+    def publish(self, book_changed=False):
+        """
+        Replace `view` with one of the current state. Pass book_changed after
+        touching positions, trades or pending orders. Caller holds `lock`.
+        """
+        if book_changed or self._book is None:
+            self._book = freeze_book(self.open_positions, self.executed_trades, self.pending_orders)
+        if self._bars is None:
+            self._bars = freeze_bars(self.chart.last())
+        live_data = self.live_data
+        open_positions, executed_trades, pending_orders = self._book
+        # _make skips the generated __new__'s argument handling; this runs on every tick
+        self.view = SymbolView._make((
+            self.ticker, self.timeframe, self.tick_count, live_data["live_price"],
+            live_data["short_ma"], live_data["medium_ma"], live_data["long_ma"], live_data["extra_long_ma"],
+            self.current_candle_ts, self._builder.current(), self._bars, self.bar_seq,
+            self.history_id, open_positions, executed_trades, pending_orders))
+
+    def seed(self, candles, timeframe=None):
+        """
+        Replace bars (and, for the trading timeframe, closes) with /history candles
+        of `timeframe`, and rebuild the indicators on them. The last candle may
+        still be forming, so it only counts as a close once a live tick starts the
+        next bucket.
+        """
+        timeframe = str(timeframe or self.timeframe)
+        candle_arr = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+        with self.lock:
+            self.candles.seed(timeframe, candle_arr)
+            if timeframe == self.timeframe:
+                live_data = self.live_data
+                live_data["prices"].clear()
+                live_data["live_time"].clear()
+                live_data["prices"].extend(candle_arr[:-1, 4])
+                live_data["live_time"].extend(candle_arr[:-1, 0])
+                self.current_candle_ts = self.candles[timeframe].ts
+            self.set_strategies(list(self.strategies.values()), [ma.window for ma in self._mas])
+
+    # ---------------- order callbacks (run on the order worker thread) ----------------
+    def on_entry_fill(self, intent, fill_price, response):
+        trade = {
+            "ticker": intent["symbol"],
+            "underlying": self.ticker,
+            "buying_price": intent["ref_price"],
+            "executed_price": fill_price,
+            "executed": "Yes"
+        }
+        with self.lock:
+            self.pending_orders.pop(intent["symbol"], None)
+            self.executed_trades.append(trade)
+            position = self.open_positions.get(intent["symbol"])
+            if position is not None:
+                # never overwrite a held position: the broker holds both fills
+                position["qty"] += intent["qty"]
+            else:
+                self.open_positions[intent["symbol"]] = {
+                    "qty": intent["qty"],
+                    "side": intent["side"],
+                    # view on the underlying: a Put is bought ("side") on a "sell" signal
+                    "direction": intent["meta"]["direction"],
+                    "strategy": intent["meta"]["strategy"],
+                }
+            self.publish(book_changed=True)
+
+    def on_entry_reject(self, intent, response):
+        with self.lock:
+            self.pending_orders.pop(intent["symbol"], None)
+            meta = intent["meta"]
+            if (response.get("code") not in DETERMINISTIC_ERROR_CODES
+                    and self.entry_bars.get(meta["strategy"]) == meta["signal_bar"]):
+                # a transient failure may be retried by the next tick of the same bar
+                del self.entry_bars[meta["strategy"]]
+            self.publish(book_changed=True)
+
+    def on_exit_fill(self, intent, fill_price, response):
+        log.info({"event": "exit_filled", "symbol": intent["symbol"], "price": fill_price})
+        with self.lock:
+            self.pending_orders.pop(intent["symbol"], None)
+            self.publish(book_changed=True)
+
+    def on_exit_reject(self, intent, response):
+        # put the position back so the next tick retries the exit
+        with self.lock:
+            self.pending_orders.pop(intent["symbol"], None)
+            self.open_positions.setdefault(intent["symbol"], intent["meta"])
+            self.publish(book_changed=True)
+
+    def candle_rows(self, timeframe):
+        """Closed bars plus the forming one as (n, 6) /history-style rows. Caller holds `lock`."""
+        builder = self.candles[timeframe]
+        bars = builder.bars.last()
+        rows = np.empty((len(bars) + (builder.ts is not None), 6))
+        for i, name in enumerate(BAR_DTYPE.names):
+            rows[:len(bars), i] = bars[name]
+        if builder.ts is not None:
+            rows[-1] = builder.current()
+        return rows
+
+    def status(self):
+        return self.view.as_status()
+
+
+class TradingEngine:
+
+    def __init__(self, fyers, config, candle_store=None, order_executor=None, order_manager=None,
+                 data_socket_factory=None, order_socket_factory=None):
+        self.fyers = fyers
+        # stand-ins for the SDK's FyersDataSocket / FyersOrderSocket, e.g. src.fake_broker
+        self.data_socket_factory = data_socket_factory
+        self.order_socket_factory = order_socket_factory
+        self.config = dict(DEFAULT_CONFIG, **config)
+        self.candle_store = candle_store or CandleStore()
+        self.order_gate = OrderGate()
+        self.latency = LatencyStats()
+        self.order_manager = order_manager or OrderManager(latency=self.latency)
+        self.order_executor = order_executor or OrderExecutor(fyers, place=self.order_gate.place_order,
+                                                              place_basket=self.order_gate.place_basket,
+                                                              latency=self.latency, order_manager=self.order_manager)
+        self.started = False
+        tick_log = self.config.get("tick_log")
+        self.tick_recorder = TickRecorder(tick_log) if tick_log else None
+        self.conflator = None
+        self.data_socket = None
+        # held by receive() for each tick, so stop() can wait out the one in progress
+        self._receive_lock = threading.Lock()
+        self.first_message_logged = False
+        self.startup = {}
+        self._awaiting_first_tick = True
+        self._start_time = None
+        self._stopping = threading.Event()
+        self._snapshot_thread = None
+
+        c = self.config
+        self.tickers = list(c["tickers"] or [c["ticker"]])
+        self.bucket_seconds = timeframe_seconds(c["timeframe"])
+        # fail on a bad strategy spec here rather than on the first tick
+        strategy_timeframes = [s.timeframe for s in build_strategies(self.strategy_specs(), timeframe=c["timeframe"])]
+        timeframes = list(dict.fromkeys([str(c["timeframe"])] + [str(tf) for tf in c["extra_timeframes"]]
+                                        + strategy_timeframes))
+        self.shards = {
+            ticker: SymbolShard(ticker, for_ticker(c["quantity"], ticker), for_ticker(c["option_step"], ticker),
+                                timeframes)
+            for ticker in self.tickers
+        }
+        for shard in self.shards.values():
+            shard.set_strategies(self.build_strategies(), self.periods)
+
+    def shard(self, ticker=None):
+        """The shard for `ticker`, or the first one (handy for single-symbol engines)."""
+        return self.shards[ticker or self.tickers[0]]
+
+    # ---------------- configuration ----------------
+    @property
+    def periods(self):
+        c = self.config
+        return (int(c["short_ma_period"]), int(c["medium_ma_period"]),
+                int(c["long_ma_period"]), int(c["extra_long_ma_period"]))
+
+    def strategy_specs(self):
+        """Configured strategy specs, or the triple-MA rule on the configured MA periods."""
+        if self.config["strategies"]:
+            return list(self.config["strategies"])
+        short, medium, long, extra_long = self.periods
+        return [{"type": "triple_ma", "short": short, "medium": medium, "long": long, "extra_long": extra_long}]
+
+    def build_strategies(self):
+        """Fresh strategy instances for one shard."""
+        return build_strategies(self.strategy_specs(), timeframe=self.config["timeframe"])
+
+    def set_periods(self, short, medium, long, extra_long):
+        """
+        Change MA periods on a running engine: the displayed MAs and the default
+        triple-MA strategy are rebuilt from the stored bars.
+        """
+        old = self.periods
+        self.config.update(short_ma_period=int(short), medium_ma_period=int(medium),
+                           long_ma_period=int(long), extra_long_ma_period=int(extra_long))
+        if self.periods == old:
+            return
+        for shard in self.shards.values():
+            with shard.lock:
+                shard.set_strategies(self.build_strategies(), self.periods)
+
+    # ---------------- startup ----------------
+    def seed_history(self, since=None):
+        """
+        Seed every shard's bars (all timeframes), closes and MA state from /history.
+        since: {(ticker, timeframe): epoch} for series restored from a snapshot; only
+        bars from that time on are fetched and merged into what the shard holds.
+        Returns {ticker: history response for the trading timeframe}.
+        """
+        c = self.config
+        since = since or {}
+        jobs = [(ticker, timeframe) for ticker in self.tickers for timeframe in self.shards[ticker].candles.builders]
+
+        def fetch(job):
+            if job in since:
+                return self.candle_store.history(self.fyers, job[0], job[1], since[job], int(time.time()))
+            return self.candle_store.history_days(self.fyers, job[0], job[1], days=c["history_days"])
+
+        with ThreadPoolExecutor(max_workers=min(4, len(jobs))) as pool:
+            responses = dict(zip(jobs, pool.map(fetch, jobs)))
+        for (ticker, timeframe), historical_data in responses.items():
+            if historical_data.get("s") != "ok":
+                continue
+            shard = self.shards[ticker]
+            candles = np.asarray(historical_data.get("candles", []), dtype=np.float64).reshape(-1, 6)
+            if (ticker, timeframe) in since:
+                with shard.lock:
+                    held = shard.candle_rows(timeframe)
+                # fetched bars replace held ones with the same timestamp
+                merged = np.concatenate([candles, held])
+                _, first = np.unique(merged[:, 0], return_index=True)
+                candles = merged[first]
+            shard.seed(candles, timeframe)
+        return {ticker: responses[(ticker, str(c["timeframe"]))] for ticker in self.tickers}
+
+    def prepare_options(self):
+        """
+        Resolve each underlying's option chain once. Returns a list of problems to
+        report; raises ValueError if a quantity is not a multiple of a listed lot
+        size, since no order could then be placed.
+        """
+        c = self.config
+        if c["trade_type"] != "Options":
+            return []
+        problems = []
+        master = None
+        path = c.get("symbol_master_path")
+        if path and os.path.exists(path):
+            master = InstrumentMaster.load(path)
+        else:
+            problems.append("Symbol master not found; option symbols will be formatted without validation.")
+        for shard in self.shards.values():
+            try:
+                shard.option_chain = build_option_chain(shard.ticker, c["expiry_date"], c["expiry_type"],
+                                                        shard.option_step, master)
+            except ValueError as e:
+                problems.append(str(e))
+                continue
+            bad = sorted(lot for lot in shard.option_chain.lot_sizes if not is_lot_multiple(shard.quantity, lot))
+            if bad:
+                raise ValueError(f"Quantity {shard.quantity} is not a multiple of the lot size "
+                                 f"{', '.join(map(str, bad))} for {shard.option_chain.underlying} options.")
+        return problems
+
+    def start(self, access_token_for_ws):
+        """
+        Seed history, resolve options, connect the order socket and subscribe to
+        every ticker on one data socket. access_token_for_ws: 'APP_ID:ACCESS_TOKEN'. Returns a list of problems to report;
+        raises ValueError, without subscribing, if the bot could not place any order.
+        """
+        started = time.perf_counter()
+        self._start_time = time.time()
+        if self.data_socket_factory is None:
+            # the SDK's socket modules are imported lazily; load them while history downloads
+            threading.Thread(target=preload_sdk, name="preload-sdk", daemon=True).start()
+        problems = self.prepare_options()
+        since = self.restore_snapshot() if self.config["snapshot_path"] else {}
+        if since:
+            problems += self.reconcile_positions()
+        for ticker, historical_data in self.seed_history(since).items():
+            if historical_data.get("s") != "ok":
+                problems.insert(0, f"Failed to fetch historical data for {ticker}: "
+                                   f"{historical_data.get('message', 'Unknown error')}")
+
+        if self.config["conflate"]:
+            self.conflator = TickConflator(self.evaluate, bucket=self.candle_bucket, latency=self.latency).start()
+        # fills and rejections arrive on the order socket; connect() blocks while the SDK connects
+        threading.Thread(target=self.order_manager.connect, args=(access_token_for_ws, self.order_socket_factory),
+                         daemon=True).start()
+        threading.Thread(target=self._subscribe, args=(access_token_for_ws,), daemon=True).start()
+        if self.config["snapshot_path"]:
+            self._snapshot_thread = threading.Thread(target=self._snapshot_loop, name="snapshot", daemon=True)
+            self._snapshot_thread.start()
+        self.started = True
+        launched_at = self.config["launched_at"]
+        self.startup = {
+            "start_ms": (time.perf_counter() - started) * 1000,
+            "launch_to_start_ms": (self._start_time - launched_at) * 1000 if launched_at else None,
+        }
+        log.info({"event": "engine_started", "startup_ms": self.startup["start_ms"],
+                  "restored_series": len(since)})
+        return problems
+
+    def _subscribe(self, access_token_for_ws):
+        socket = subscribe_to_live_data(access_token_for_ws, list(self.tickers), self.receive,
+                                        self.data_socket_factory)
+        self.data_socket = socket
+        if self._stopping.is_set():
+            # stop() ran while the socket was connecting
+            socket.close_connection()
+
+    def stop(self, wait=True):
+        """
+        Stop taking ticks (close the data socket, then wait out the tick being
+        received), let queued ticks and orders finish, close the order socket and
+        the tick log.
+        """
+        self._stopping.set()
+        socket, self.data_socket = self.data_socket, None
+        if socket is not None:
+            socket.close_connection()
+        with self._receive_lock:
+            pass
+        if self.conflator is not None:
+            self.conflator.stop()
+        self.order_executor.shutdown(wait=wait)
+        self.order_manager.close()
+        if self.started and self.config["snapshot_path"]:
+            self.save_snapshot()
+        if self.tick_recorder is not None:
+            self.tick_recorder.close()
+
+    # ---------------- warm restart ----------------
+    def save_snapshot(self, path=None):
+        """Write bars, positions and trades of every shard to the snapshot file (atomically)."""
+        path = path or self.config["snapshot_path"]
+        meta = {"saved_at": time.time(), "tickers": list(self.tickers), "shards": {}}
+        arrays = {}
+        for i, (ticker, shard) in enumerate(self.shards.items()):
+            with shard.lock:
+                series = {}
+                for j, timeframe in enumerate(shard.candles.builders):
+                    series[timeframe] = name = f"candles_{i}_{j}"
+                    arrays[name] = shard.candle_rows(timeframe)
+                meta["shards"][ticker] = {
+                    "candles": series,
+                    "open_positions": {k: dict(v) for k, v in shard.open_positions.items()},
+                    "executed_trades": [dict(t) for t in shard.executed_trades],
+                    "tick_count": shard.tick_count,
+                }
+        write_snapshot(path, meta, arrays)
+
+    def restore_snapshot(self, path=None, now=None):
+        """
+        Load bars, positions and trades saved by save_snapshot() on the same IST
+        trading day (older snapshots are ignored: intraday positions are squared off
+        overnight). Returns {(ticker, timeframe): epoch of the newest restored bar},
+        the point seed_history() fetches from.
+        """
+        path = path or self.config["snapshot_path"]
+        loaded = read_snapshot(path)
+        if loaded is None:
+            return {}
+        meta, arrays = loaded
+        now = time.time() if now is None else now
+        if datetime.datetime.fromtimestamp(meta["saved_at"], IST).date() != datetime.datetime.fromtimestamp(now, IST).date():
+            log.info({"event": "snapshot_stale", "path": path, "saved_at": meta["saved_at"]})
+            return {}
+        since = {}
+        for ticker, saved in meta["shards"].items():
+            shard = self.shards.get(ticker)
+            if shard is None:
+                continue
+            for timeframe, name in saved["candles"].items():
+                if timeframe in shard.candles.builders and len(arrays[name]):
+                    shard.seed(arrays[name], timeframe)
+                    since[(ticker, timeframe)] = int(arrays[name][-1, 0])
+            with shard.lock:
+                shard.open_positions.update(saved["open_positions"])
+                shard.executed_trades[:] = saved["executed_trades"]
+                shard.tick_count = saved["tick_count"]
+                shard.publish(book_changed=True)
+        log.info({"event": "snapshot_restored", "path": path, "saved_at": meta["saved_at"],
+                  "series": len(since), "open_positions": sum(len(s["open_positions"]) for s in meta["shards"].values())})
+        return since
+
+    def reconcile_positions(self):
+        """
+        Check restored positions against the broker's net positions (one REST call at
+        startup): positions closed while the bot was down are dropped, broker positions
+        the bot does not know are reported. Returns a list of problems to report.
+        """
+        try:
+            response = self.fyers.positions()
+        except Exception as e:
+            return [f"Could not check positions with the broker: {e}"]
+        if response.get("s") != "ok":
+            return [f"Could not check positions with the broker: {response.get('message', 'Unknown error')}"]
+        held = {p["symbol"]: p for p in response.get("netPositions") or [] if p.get("netQty")}
+        with self.order_manager.lock:
+            self.order_manager.positions.update({symbol: dict(p) for symbol, p in held.items()})
+        known = set()
+        for shard in self.shards.values():
+            with shard.lock:
+                for symbol in list(shard.open_positions):
+                    if symbol not in held:
+                        log.warning({"event": "position_closed_while_down", "symbol": symbol})
+                        del shard.open_positions[symbol]
+                shard.publish(book_changed=True)
+                known.update(shard.open_positions)
+        return [f"Broker position {symbol} (net qty {p['netQty']}) is not tracked by the bot."
+                for symbol, p in held.items() if symbol not in known]
+
+    def _snapshot_loop(self):
+        while not self._stopping.wait(self.config["snapshot_interval"]):
+            try:
+                self.save_snapshot()
+            except Exception:
+                log.exception("snapshot failed")
+
+    # ---------------- WebSocket callback ----------------
+    def receive(self, msg):
+        """Data-socket callback: record the raw tick, build candles from it, then hand it to the conflator (or run it inline)."""
+        received_ns = time.time_ns()
+        with self._receive_lock:
+            # the SDK may still deliver ticks after stop(); the tick log is closed by then
+            if self._stopping.is_set():
+                return
+            if self._awaiting_first_tick and msg.get("ltp") is not None:
+                self._first_tick(received_ns)
+            live_time = msg.get("exch_feed_time")
+            if live_time is not None:
+                # exch_feed_time has whole-second resolution, so this is coarse
+                self.latency.record("feed_to_receipt", received_ns - int(live_time) * 1_000_000_000)
+            if self.tick_recorder is not None:
+                self.tick_recorder.record(msg, recv_ns=received_ns)
+            if self.conflator is None:
+                self.on_message(msg)
+            elif self.ingest(msg):
+                # candles already have this tick; only the strategy's look at it may be conflated
+                self.conflator.put(msg)
+
+    def _first_tick(self, received_ns):
+        """Record and log how long the first tick took, from launch (if known) and from start()."""
+        self._awaiting_first_tick = False
+        received = received_ns / 1e9
+        launched_at = self.config["launched_at"]
+        self.startup = dict(
+            self.startup,
+            start_to_first_tick_ms=(received - self._start_time) * 1000 if self._start_time else None,
+            time_to_first_tick_ms=(received - launched_at) * 1000 if launched_at else None,
+        )
+        log.info(dict({"event": "first_tick"}, **self.startup))
+
+    def candle_bucket(self, msg):
+        """Start of the candle a tick falls in, or None for messages without a feed time."""
+        live_time = msg.get("exch_feed_time")
+        if live_time is None:
+            return None
+        return bucket_start(live_time, self.bucket_seconds)
+
+    def on_message(self, msg: dict):
+        """
+        Whole tick path on the calling thread (used when conflate is off, and by
+        replays): ingest() the tick into candles, then evaluate() the strategies on it.
+        """
+        if self.ingest(msg):
+            self.evaluate(msg)
+
+    def ingest(self, msg: dict):
+        """
+        Runs for every tick on the thread that receives it, before any
+        conflation: route the tick to its symbol's shard, bucket it into candles
+        and update the shared indicators on each closed bar, so candles see
+        every price whether or not the strategy does. Returns whether the tick
+        should be evaluated. Only that shard's lock is taken, so symbols never
+        contend with each other.
+        """
+        try:
+            # ignore control messages (cn, ful, sub etc.)
+            if msg.get("type") in ("cn", "ful", "sub"):
+                return False
+            if not self.first_message_logged:
+                self.first_message_logged = True
+                log.info({"event": "first_message", "msg": dict(msg)})
+            shard = self.shards.get(msg.get("symbol"))
+            if shard is None:
+                return False
+            live_price = msg.get("ltp")
+            live_time = msg.get("exch_feed_time")
+            if live_price is None or live_time is None:
+                return False
+            live_price = float(live_price)
+            live_data = shard.live_data
+            latency = self.latency
+
+            t_lock = time.perf_counter_ns()
+            with shard.lock:
+                t_locked = time.perf_counter_ns()
+                latency.record("lock_wait", t_locked - t_lock)
+                shard.tick_count += 1
+                indicators = shard.indicators
+
+                # bars of every timeframe; each indicator is updated once per bar it is keyed on
+                for timeframe, bar in shard.candles.update(live_time, live_price, msg.get("vol_traded_today")):
+                    indicators.update(timeframe, bar)
+                    if timeframe == shard.timeframe:
+                        live_data["prices"].append(bar[4])
+                        live_data["live_time"].append(bar[0])
+                        shard.append_bar(bar)
+                        log.info({"event": "candle_close", "symbol": shard.ticker, "timeframe": timeframe,
+                                  "bar": bar})
+                shard.current_candle_ts = shard.candles[shard.timeframe].ts
+
+                # MAs only move when a candle closes; just read the running values
+                short, medium, long, extra_long = shard._mas
+                live_data["short_ma"] = short.value
+                live_data["medium_ma"] = medium.value
+                live_data["long_ma"] = long.value
+                live_data["extra_long_ma"] = extra_long.value
+                latency.record("indicators", time.perf_counter_ns() - t_locked)
+            return True
+        except Exception:
+            log.exception("ingest error")
+            return False
+
+    def evaluate(self, msg: dict):
+        """
+        Runs on the conflator's worker (or after ingest() when conflate is off)
+        for the newest tick of each symbol: check every open position's exit and
+        every strategy's entry against the indicators ingest() maintains. Orders
+        are handed to the order worker.
+        """
+        t0 = time.perf_counter_ns()
+        c = self.config
+        latency = self.latency
+        try:
+            shard = self.shards.get(msg.get("symbol"))
+            if shard is None or msg.get("ltp") is None:
+                return
+            live_data = shard.live_data
+
+            with shard.lock:
+                live_price = float(msg["ltp"])
+                live_time = msg.get("exch_feed_time")
+                indicators = shard.indicators
+                live_data["live_price"] = live_price
+
+                # sampled per-tick state; by default this costs one modulo and no formatting
+                sample = c["debug_tick_sample"]
+                if sample and shard.tick_count % sample == 0 and log.isEnabledFor(logging.DEBUG):
+                    log.debug({"event": "tick", "symbol": shard.ticker, "ltp": live_price,
+                               "exch_feed_time": live_time, "current_candle_ts": shard.current_candle_ts,
+                               "mas": [live_data["short_ma"], live_data["medium_ma"],
+                                       live_data["long_ma"], live_data["extra_long_ma"]],
+                               "open_positions": len(shard.open_positions)})
+
+                # Stop-loss / exit of open positions, by the strategy that entered them;
+                # every exit this tick triggers goes out in one basket
+                exits = []
+                for trade_symbol, trade_info in list(shard.open_positions.items()):
+                    strategy = shard.strategies.get(trade_info.get("strategy")) or next(iter(shard.strategies.values()))
+                    if strategy.should_exit(live_price, trade_info["direction"]):
+                        log.info({"event": "stop_loss", "symbol": trade_symbol, "ltp": live_price,
+                                  "direction": trade_info["direction"], "strategy": strategy.name})
+                        del shard.open_positions[trade_symbol]
+                        shard.pending_orders[trade_symbol] = "exit"
+                        exits.append({
+                            "symbol": trade_symbol,
+                            "qty": trade_info["qty"],
+                            "side": "sell" if trade_info["side"] == "buy" else "buy",
+                            "ref_price": live_price,
+                            "meta": trade_info,
+                            "on_fill": shard.on_exit_fill,
+                            "on_reject": shard.on_exit_reject,
+                        })
+                if len(exits) == 1:
+                    self.order_executor.submit(**exits[0], reduce_only=True)
+                elif exits:
+                    self.order_executor.submit_batch(exits)
+                book_changed = bool(exits)
+
+                # Entry logic: the first strategy to signal on this tick trades
+                signal = None
+                # pending exits belong to trades already counted in executed_trades
+                pending_entries = sum(1 for kind in shard.pending_orders.values() if kind == "entry")
+                if len(shard.executed_trades) + pending_entries < c["max_trades"]:
+                    t_signal = time.perf_counter_ns()
+                    closes = indicators.closes
+                    for strategy in shard.strategies.values():
+                        close = closes.get(strategy.timeframe)
+                        if close is not None:
+                            signal = strategy.signal(close)
+                            if signal:
+                                # the signal stays true for the whole next bar: decide once per signal bar
+                                signal_bar = int(shard.candles[strategy.timeframe].bars[-1]["ts"])
+                                if shard.entry_bars.get(strategy.name) == signal_bar:
+                                    signal = None
+                                    continue
+                                shard.entry_bars[strategy.name] = signal_bar
+                                break
+                    latency.record("signal", time.perf_counter_ns() - t_signal)
+
+                if signal:
+                    t_resolve = time.perf_counter_ns()
+                    symbol_to_trade = self.resolve_symbol(shard, signal, live_price)
+                    latency.record("resolve_symbol", time.perf_counter_ns() - t_resolve)
+
+                    # one position per symbol: no entry while it is held or has an order in flight
+                    if (symbol_to_trade is not None and symbol_to_trade not in shard.pending_orders
+                            and symbol_to_trade not in shard.open_positions):
+                        log.info({"event": "entry", "signal": signal, "symbol": symbol_to_trade, "ltp": live_price,
+                                  "strategy": strategy.name})
+                        shard.pending_orders[symbol_to_trade] = "entry"
+                        book_changed = True
+                        self.order_executor.submit(
+                            symbol_to_trade,
+                            shard.quantity,
+                            self.order_side(signal),
+                            "market",
+                            ref_price=live_price,
+                            meta={"direction": signal, "strategy": strategy.name, "signal_bar": signal_bar},
+                            signal_bar=(strategy.timeframe, signal_bar),
+                            on_fill=shard.on_entry_fill,
+                            on_reject=shard.on_entry_reject,
+                        )
+                        latency.record("tick_to_submit", time.perf_counter_ns() - t0)
+
+                shard.publish(book_changed)
+
+        except Exception:
+            log.exception("evaluate error")
+
+    def order_side(self, signal):
+        """Options are bought (Call or Put) per config; equity trades the signal's side directly."""
+        return self.config["side"] if self.config["trade_type"] == "Options" else signal
+
+    def resolve_symbol(self, shard, signal, live_price):
+        """Symbol to trade for a signal: the ITM option from the shard's chain, or the ticker."""
+        if self.config["trade_type"] != "Options":
+            return INDEX_ALIASES.get(shard.ticker, shard.ticker)
+        if shard.option_chain is None:
+            return None
+        option_type = "Put" if signal == "sell" else "Call"
+        resolved = shard.option_chain.resolve(live_price, option_type)
+        if resolved is None:
+            log.warning({"event": "no_contract", "option_type": option_type, "ltp": live_price,
+                         "expiry": str(shard.option_chain.expiry)})
+            return None
+        # quantity was checked against every lot size in the chain at start
+        return resolved[0]
+
+    # ---------------- read side ----------------
+    def view(self):
+        """
+        EngineView of every shard's latest published SymbolView plus latency,
+        conflation and broker stats. Takes no shard lock, so it never delays a tick.
+        """
+        return EngineView(
+            tickers=tuple(self.tickers),
+            timeframe=self.config["timeframe"],
+            started=self.started,
+            symbols=MappingProxyType({ticker: shard.view for ticker, shard in self.shards.items()}),
+            latency=self.latency.snapshot(),
+            conflation=self.conflator.stats() if self.conflator is not None else None,
+            broker=self.order_manager.snapshot(),
+            startup=dict(self.startup),
+            updated_at=datetime.datetime.now().timestamp(),
+        )
+
+    def status(self):
+        """
+        Plain, JSON-serialisable view of the engine for dashboards and the status
+        file: per-ticker market state under "symbols", positions and trades of all
+        shards merged at the top level, and the broker's own position book under "broker".
+        Built from view(), so it takes no shard lock either.
+        """
+        view = self.view()
+        symbols = {ticker: symbol_view.as_status() for ticker, symbol_view in view.symbols.items()}
+        status = {
+            "tickers": list(view.tickers),
+            "timeframe": view.timeframe,
+            "started": view.started,
+            "symbols": symbols,
+            "open_positions": {},
+            "executed_trades": [],
+            "pending_orders": {},
+        }
+        for shard_status in symbols.values():
+            status["open_positions"].update(shard_status.pop("open_positions"))
+            status["executed_trades"] += shard_status.pop("executed_trades")
+            status["pending_orders"].update(shard_status.pop("pending_orders"))
+        status["broker"] = view.broker
+        status["latency"] = view.latency
+        status["conflation"] = view.conflation
+        status["startup"] = view.startup
+        status["updated_at"] = view.updated_at
+        return status
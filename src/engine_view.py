@@ -0,0 +1,118 @@
+"""
+Immutable views of engine state for lock-free readers (dashboard, status file).
+
+Whenever a shard changes (a processed tick, a fill, a reseed) the thread holding
+its lock builds a new SymbolView and publishes it by rebinding `shard.view`.
+Rebinding an attribute is a single reference store, atomic under the GIL, so a
+reader that loads `shard.view` gets one complete view without taking the lock,
+and the tick thread never waits for a reader. A view is never changed after it
+is published: its containers are tuples, read-only mappings and read-only arrays.
+
+`bars` holds the closed bars of the trading timeframe with the displayed MAs
+(CHART_DTYPE). It is copied only when a bar closes. `bar_seq` counts bars ever
+appended and `history_id` changes when the history is rebuilt (reseed, new MA
+periods), so a chart can draw just the bars it has not drawn yet:
+
+    drawn = None
+    rows, redraw = new_bars(shard.view, drawn)
+    drawn = bars_drawn(shard.view)
+"""
+from types import MappingProxyType
+from typing import NamedTuple
+
+import numpy as np
+
+MA_FIELDS = ("short_ma", "medium_ma", "long_ma", "extra_long_ma")
+CHART_DTYPE = np.dtype([("ts", "<i8"), ("close", "<f8")] + [(name, "<f8") for name in MA_FIELDS])
+
+EMPTY_BARS = np.empty(0, dtype=CHART_DTYPE)
+EMPTY_BARS.flags.writeable = False
+EMPTY_MAPPING = MappingProxyType({})
+
+
+def _number(value):
+    return None if value is None or value != value else value
+
+
+class SymbolView(NamedTuple):
+    ticker: str
+    timeframe: str
+    ticks: int = 0
+    live_price: float = None
+    short_ma: float = None
+    medium_ma: float = None
+    long_ma: float = None
+    extra_long_ma: float = None
+    current_candle_ts: int = None
+    candle: tuple = None
+    bars: np.ndarray = EMPTY_BARS
+    bar_seq: int = 0
+    history_id: int = 0
+    open_positions: MappingProxyType = EMPTY_MAPPING
+    executed_trades: tuple = ()
+    pending_orders: MappingProxyType = EMPTY_MAPPING
+
+    def as_status(self):
+        """The plain, JSON-serialisable per-symbol dict of TradingEngine.status()."""
+        return {
+            "live_price": self.live_price,
+            "short_ma": _number(self.short_ma),
+            "medium_ma": _number(self.medium_ma),
+            "long_ma": _number(self.long_ma),
+            "extra_long_ma": _number(self.extra_long_ma),
+            "current_candle_ts": self.current_candle_ts,
+            "candle": self.candle,
+            "closes": self.bars["close"].tolist(),
+            "close_times": self.bars["ts"].tolist(),
+            "open_positions": {k: dict(v) for k, v in self.open_positions.items()},
+            "executed_trades": [dict(t) for t in self.executed_trades],
+            "pending_orders": dict(self.pending_orders),
+        }
+
+
+class EngineView(NamedTuple):
+    tickers: tuple
+    timeframe: str
+    started: bool
+    symbols: MappingProxyType       # ticker -> SymbolView
+    latency: dict
+    conflation: dict
+    broker: dict
+    startup: dict                   # start / time-to-first-tick timings, see TradingEngine.start()
+    updated_at: float
+
+
+def freeze_book(open_positions, executed_trades, pending_orders):
+    """Read-only copies of a shard's positions, trades and pending orders."""
+    return (MappingProxyType({k: MappingProxyType(dict(v)) for k, v in open_positions.items()}),
+            tuple(MappingProxyType(dict(t)) for t in executed_trades),
+            MappingProxyType(dict(pending_orders)))
+
+
+def freeze_bars(bars):
+    """Read-only copy of a CHART_DTYPE array (e.g. a RingBuffer's last())."""
+    bars = np.array(bars, dtype=CHART_DTYPE)
+    bars.flags.writeable = False
+    return bars
+
+
+def bars_drawn(view):
+    """Marker of the bars a chart has drawn from `view`, for the next new_bars() call."""
+    return view.history_id, view.bar_seq
+
+
+def new_bars(view, drawn):
+    """
+    (rows, redraw): the bars of `view` not yet drawn according to `drawn` (a
+    bars_drawn() marker, or None). redraw is True, with all bars as rows, when
+    the chart has to start over: nothing drawn yet, history rebuilt, or more new
+    bars than the view still holds.
+    """
+    if drawn is None or drawn[0] != view.history_id:
+        return view.bars, True
+    added = view.bar_seq - drawn[1]
+    if added <= 0:
+        return view.bars[:0], False
+    if added > len(view.bars):
+        return view.bars, True
+    return view.bars[-added:], False
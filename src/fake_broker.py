@@ -0,0 +1,359 @@
+"""
+In-process stand-in for a Fyers account, for offline tests and load tests.
+
+FakeBroker answers the FyersModel calls the bot makes (history, place_order,
+place_basket_orders, orderbook, positions) and hands out data and order sockets
+with the SDK sockets' constructor and connect/subscribe surface. Market orders
+fill at the symbol's last simulated price; fills reach every order socket as
+order, trade and position updates, like the real order WebSocket.
+
+Faults can be injected: REST latency, random transient errors, lot-size
+rejections (-50) for quantities that are not a multiple of a configured lot,
+and data-socket disconnects every N ticks.
+
+    broker = FakeBroker(lot_sizes={"NSE:NIFTY": 75}, latency=0.02, error_rate=0.01)
+    engine = TradingEngine(broker, config, data_socket_factory=broker.data_socket,
+                           order_socket_factory=broker.order_socket)
+
+Run a load test of the whole engine against it:
+
+    python -m src.fake_broker --symbols NSE:SBIN-EQ,NSE:TCS-EQ --rate 20000 --seconds 10 --time-scale 60
+"""
+import argparse
+import itertools
+import tempfile
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from src.candles import timeframe_seconds
+from src.order_manager import StubOrderSocket, TRADED, PENDING
+from src.tick_recorder import load_ticks, to_message
+
+LOT_SIZE_ERROR = -50
+TRANSIENT_ERROR = -429
+
+
+class FakeBroker:
+    """
+    latency: seconds added to every REST call (a number, or a callable returning one).
+    error_rate: probability that place_order fails with a transient error.
+    lot_sizes: {symbol prefix: lot size}; orders for a matching symbol (longest
+    prefix wins) must be a multiple of it.
+    fill_delay: seconds between an accepted order and its order-socket updates.
+    socket_options: defaults for every FakeDataSocket this broker hands out (rate, time_scale...).
+    """
+
+    def __init__(self, lot_sizes=None, latency=0.0, error_rate=0.0, fill_delay=0.0, seed=0,
+                 start_price=100.0, socket_options=None, sleep=time.sleep):
+        self.lot_sizes = dict(lot_sizes or {})
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fill_delay = fill_delay
+        self.start_price = start_price
+        self.socket_options = dict(socket_options or {})
+        self.seed = seed
+        self._sleep = sleep
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.prices = {}        # symbol -> last simulated price
+        self.orders = []        # orderbook rows, oldest first
+        self.net_positions = {}  # symbol -> {"symbol", "netQty", "netAvg", ...}
+        self.order_sockets = []
+        self.data_sockets = []
+        self.calls = {"history": 0, "place_order": 0, "place_basket_orders": 0, "orderbook": 0, "positions": 0}
+
+    # ---------------- REST ----------------
+    def _delay(self):
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            self._sleep(latency)
+
+    def history(self, data):
+        """Random-walk candles for the requested range, one per bucket, deterministic per symbol."""
+        self.calls["history"] += 1
+        self._delay()
+        seconds = timeframe_seconds(data["resolution"])
+        start, end = int(data["range_from"]), int(data["range_to"])
+        ts = np.arange(start - start % seconds, end + 1, seconds)
+        ts = ts[ts >= start] if len(ts) else ts
+        rng = np.random.default_rng(zlib.crc32(f"{data['symbol']}|{data['resolution']}".encode()))
+        close = self.start_price * np.exp(np.cumsum(rng.normal(0, 0.001, len(ts))))
+        open_ = np.concatenate(([self.start_price], close))[:-1]
+        candles = np.column_stack([ts, open_, np.maximum(open_, close), np.minimum(open_, close), close,
+                                   rng.integers(100, 1000, len(ts))])
+        return {"s": "ok", "candles": candles.tolist()}
+
+    def lot_size(self, symbol):
+        matches = [prefix for prefix in self.lot_sizes if symbol.startswith(prefix)]
+        return self.lot_sizes[max(matches, key=len)] if matches else None
+
+    def _place(self, data):
+        symbol, qty = data["symbol"], int(data["qty"])
+        lot = self.lot_size(symbol)
+        if lot and qty % lot:
+            return {"s": "error", "code": LOT_SIZE_ERROR,
+                    "message": f"{qty} not a multiple of minimum lot size {lot}"}
+        with self._lock:
+            transient = self.error_rate and self._rng.random() < self.error_rate
+        if transient:
+            return {"s": "error", "code": TRANSIENT_ERROR, "message": "request limit reached"}
+        order_id = f"FAKE{next(self._ids)}"
+        side = int(data["side"])
+        price = self.prices.get(symbol, self.start_price)
+        order = {"id": order_id, "symbol": symbol, "qty": qty, "side": side, "type": data["type"],
+                 "status": TRADED, "filledQty": qty, "remainingQuantity": 0, "tradedPrice": price}
+        with self._lock:
+            self.orders.append(order)
+            position = self.net_positions.setdefault(symbol, {"symbol": symbol, "netQty": 0, "netAvg": 0.0})
+            old = position["netQty"]
+            new = old + side * qty
+            if new == 0:
+                position["netAvg"] = 0.0
+            elif old == 0 or (old > 0) != (new > 0):
+                position["netAvg"] = price
+            elif abs(new) > abs(old):
+                position["netAvg"] = (position["netAvg"] * abs(old) + price * qty) / abs(new)
+            position["netQty"] = new
+            position_update = dict(position)
+        self._publish(order, position_update)
+        return {"s": "ok", "code": 1101, "message": "Order submitted successfully", "id": order_id}
+
+    def place_order(self, data):
+        self.calls["place_order"] += 1
+        self._delay()
+        return self._place(data)
+
+    def place_basket_orders(self, data):
+        self.calls["place_basket_orders"] += 1
+        self._delay()
+        if len(data) > 10:
+            return {"s": "error", "code": -1, "message": "basket can have at most 10 orders"}
+        return {"s": "ok", "code": 200, "data": [
+            {"statusCode": 200, "body": self._place(leg), "statusDescription": "OK"} for leg in data]}
+
+    def orderbook(self, data=None):
+        self.calls["orderbook"] += 1
+        self._delay()
+        with self._lock:
+            rows = [dict(o) for o in self.orders if not data or o["id"] == data.get("id")]
+        return {"s": "ok", "orderBook": rows}
+
+    def positions(self):
+        self.calls["positions"] += 1
+        self._delay()
+        with self._lock:
+            return {"s": "ok", "netPositions": [dict(p) for p in self.net_positions.values()]}
+
+    # ---------------- sockets ----------------
+    def order_socket(self, **kwargs):
+        """FyersOrderSocket stand-in; every fill is pushed to all of them."""
+        socket = StubOrderSocket(**kwargs)
+        self.order_sockets.append(socket)
+        return socket
+
+    def data_socket(self, **kwargs):
+        """FyersDataSocket stand-in emitting synthetic (or recorded) ticks; see FakeDataSocket."""
+        options = dict(self.socket_options, seed=self.seed + len(self.data_sockets) + 1)
+        socket = FakeDataSocket(self, **{**options, **kwargs})
+        self.data_sockets.append(socket)
+        return socket
+
+    def _publish(self, order, position):
+        def push():
+            for socket in list(self.order_sockets):
+                if not socket.connected:
+                    continue
+                socket.push_order(**dict(order, status=PENDING, filledQty=0, remainingQuantity=order["qty"],
+                                         tradedPrice=0))
+                socket.push_trade(orderNumber=order["id"], tradeNumber=f"{order['id']}-1", symbol=order["symbol"],
+                                  tradedQty=order["qty"], tradePrice=order["tradedPrice"], side=order["side"])
+                socket.push_order(**order)
+                socket.push_position(**position)
+
+        if self.fill_delay:
+            timer = threading.Timer(self.fill_delay, push)
+            timer.daemon = True
+            timer.start()
+        else:
+            push()
+
+
+class FakeDataSocket:
+    """
+    Emits SymbolUpdate-shaped ticks for the subscribed symbols at `rate` ticks
+    per second (spread round-robin over the symbols) from a background thread.
+    exch_feed_time advances `time_scale` simulated seconds per real second from
+    `start_time` (default: now), so time_scale=60 closes a 1-minute candle every
+    second. `ticks` replays a recorded tick log instead (src/tick_recorder.py),
+    cycling through it. With disconnect_every=N the socket drops every N ticks:
+    on_close is called, and after reconnect_delay it reconnects and resubscribes.
+    """
+
+    def __init__(self, broker, access_token=None, on_message=None, on_connect=None, on_close=None,
+                 on_error=None, reconnect=True, rate=1000, time_scale=1.0, start_time=None, ticks=None,
+                 disconnect_every=None, reconnect_delay=0.05, max_ticks=None, volatility=0.0005, seed=1,
+                 **kwargs):
+        self.broker = broker
+        self.on_message = on_message
+        self.on_connect = on_connect
+        self.on_close = on_close
+        self.reconnect = reconnect
+        self.rate = float(rate)
+        self.time_scale = float(time_scale)
+        self.start_time = start_time
+        self.ticks = ticks
+        self.disconnect_every = disconnect_every
+        self.reconnect_delay = reconnect_delay
+        self.max_ticks = max_ticks
+        self.volatility = volatility
+        self._rng = np.random.default_rng(seed)
+        self.symbols = []
+        self.sent = 0
+        self.disconnects = 0
+        self._running = False
+        self._thread = None
+
+    def connect(self):
+        self._running = True
+        self.on_message({"type": "cn", "code": 200, "message": "Authentication done", "s": "ok"})
+        if self.on_connect:
+            self.on_connect()
+        self._thread = threading.Thread(target=self._run, name="fake-data-socket", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, symbols, data_type="SymbolUpdate"):
+        self.symbols = list(dict.fromkeys(self.symbols + list(symbols)))
+        self.on_message({"type": "sub", "code": 11011, "message": "Subscribed", "s": "ok"})
+
+    def keep_running(self):
+        pass
+
+    def close_connection(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(5)
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _messages(self):
+        if self.ticks is not None:
+            recorded = load_ticks(self.ticks)
+            return (to_message(row) for row in itertools.cycle(recorded))
+        return self._synthetic()
+
+    def _synthetic(self):
+        broker = self.broker
+        start_time = time.time() if self.start_time is None else self.start_time
+        started = time.monotonic()
+        volumes = {}
+        while True:
+            steps = np.exp(self._rng.normal(0, self.volatility, 4096))
+            for step, symbol in zip(steps, itertools.cycle(list(self.symbols))):
+                price = round(broker.prices.get(symbol, broker.start_price) * step, 2)
+                broker.prices[symbol] = price
+                volume = volumes[symbol] = volumes.get(symbol, 0) + 1
+                feed_time = int(start_time + (time.monotonic() - started) * self.time_scale)
+                yield {"ltp": price, "vol_traded_today": volume, "last_traded_time": feed_time,
+                       "exch_feed_time": feed_time, "type": "if" if symbol.endswith("-INDEX") else "sf",
+                       "symbol": symbol}
+
+    def _run(self):
+        messages = self._messages()
+        started, base = time.monotonic(), 0
+        while self._running:
+            if not self.symbols:
+                time.sleep(0.001)
+                started = time.monotonic()
+                continue
+            due = int((time.monotonic() - started) * self.rate) - (self.sent - base)
+            if due <= 0:
+                time.sleep(0.0005)
+                continue
+            for msg in itertools.islice(messages, due):
+                self.on_message(msg)
+                self.sent += 1
+                if self.max_ticks is not None and self.sent >= self.max_ticks:
+                    self._running = False
+                    return
+                if self.disconnect_every and self.sent % self.disconnect_every == 0:
+                    self._drop()
+                    if not self._running:
+                        return
+                    # ticks that fell due while disconnected are lost, as on a real feed
+                    started, base = time.monotonic(), self.sent
+                    break
+
+    def _drop(self):
+        self.disconnects += 1
+        if self.on_close:
+            self.on_close({"code": 1006, "message": "connection lost (injected)"})
+        if not self.reconnect:
+            self._running = False
+            return
+        time.sleep(self.reconnect_delay)
+        self.on_message({"type": "cn", "code": 200, "message": "Authentication done", "s": "ok"})
+
+
+def run_load_test(symbols, rate, seconds, time_scale=60.0, latency=0.0, error_rate=0.0, config=None):
+    """Drive a full TradingEngine from a FakeBroker for `seconds`; returns throughput and latency stats."""
+    from src.candle_store import CandleStore
+    from src.engine import TradingEngine
+
+    broker = FakeBroker(latency=latency, error_rate=error_rate,
+                        socket_options={"rate": rate, "time_scale": time_scale})
+    config = dict({"ticker": symbols[0], "tickers": symbols, "trade_type": "Equity", "quantity": 1,
+                   "short_ma_period": 5, "medium_ma_period": 10, "long_ma_period": 20,
+                   "extra_long_ma_period": 40, "history_days": 2}, **(config or {}))
+    with tempfile.TemporaryDirectory() as root:
+        engine = TradingEngine(broker, config, candle_store=CandleStore(root),
+                               data_socket_factory=broker.data_socket, order_socket_factory=broker.order_socket)
+        engine.start("FAKE-APP:token")
+        time.sleep(seconds)
+        for socket in broker.data_sockets:
+            socket.close_connection()
+        engine.stop()
+    sent = sum(socket.sent for socket in broker.data_sockets)
+    conflation = engine.conflator.stats() if engine.conflator is not None else {}
+    return {
+        "ticks_sent": sent,
+        "ticks_per_second": sent / seconds,
+        "conflation": conflation,
+        "orders": broker.calls["place_order"] + broker.calls["place_basket_orders"],
+        "executed_trades": len(engine.status()["executed_trades"]),
+        "latency": engine.latency.snapshot(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the engine against an in-process fake broker.")
+    parser.add_argument("--symbols", default="NSE:SBIN-EQ", help="comma separated")
+    parser.add_argument("--rate", type=float, default=10000, help="ticks per second, all symbols together")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--time-scale", type=float, default=60, help="simulated seconds per real second")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every REST call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of orders failing transiently")
+    parser.add_argument("--no-conflate", action="store_true", help="run the strategy on the socket thread")
+    args = parser.parse_args(argv)
+
+    result = run_load_test([s.strip() for s in args.symbols.split(",") if s.strip()], args.rate, args.seconds,
+                           args.time_scale, args.latency, args.error_rate,
+                           config={"conflate": not args.no_conflate})
+    print(f"{result['ticks_sent']:,} ticks in {args.seconds:g}s ({result['ticks_per_second']:,.0f}/s), "
+          f"{result['orders']} orders, {result['executed_trades']} trades")
+    if result["conflation"]:
+        c = result["conflation"]
+        print(f"processed {c['processed']:,}, conflated away {c['dropped']:,}, max lag {c['max_lag_ms']:.2f} ms")
+    for stage, stats in result["latency"].items():
+        if stats["count"]:
+            print(f"  {stage:16s} n={stats['count']:>9,}  p50={stats['p50_us']:>9.1f}us  p99={stats['p99_us']:>10.1f}us")
+    return result
+
+
+if __name__ == "__main__":
+    main()
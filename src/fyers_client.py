@@ -1,7 +1,39 @@
-from fyers_apiv3 import fyersModel
-from fyers_apiv3.FyersWebsocket import data_ws
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# The fyers_apiv3 modules are imported where they are used: together they take
+# about a third of a second to import (aiohttp, requests, pkg_resources), which
+# the auth screen, the tests and the offline tools never need.
+
+def preload_sdk():
+    """Import the fyers_apiv3 REST and WebSocket modules, e.g. on a background thread while the user logs in."""
+    from fyers_apiv3 import fyersModel  # noqa: F401
+    from fyers_apiv3.FyersWebsocket import data_ws, order_ws  # noqa: F401
+
+def token_is_valid(fyers):
+    """True if the broker accepts `fyers`'s access token (one profile request)."""
+    try:
+        response = fyers.get_profile()
+    except Exception:
+        return False
+    return isinstance(response, dict) and response.get("s") == "ok"
+
+def rest_client(client_id, access_token, profile=True):
+    """
+    FyersModel for the REST API; with profile, wrapped in src.api_profiler.ProfiledFyers
+    so every endpoint's latency, status and error code is recorded.
+    """
+    from fyers_apiv3 import fyersModel
+
+    fyers = fyersModel.FyersModel(client_id=client_id, token=access_token, log_path="")
+    if profile:
+        from src.api_profiler import ProfiledFyers
+        fyers = ProfiledFyers(fyers)
+    return fyers
 
 def get_access_token(client_id, secret_key, redirect_uri, auth_code):
+    from fyers_apiv3 import fyersModel
+
     session = fyersModel.SessionModel(
         client_id=client_id,
         secret_key=secret_key,
@@ -13,7 +45,17 @@ def get_access_token(client_id, secret_key, redirect_uri, auth_code):
     response = session.generate_token()
     return response.get("access_token")
 
-def get_historical_data(fyers, symbol, resolution, date_format=0, range_from=None, range_to=None, cont_flag="1"):
+def get_historical_data(fyers, symbol, resolution, date_format=0, range_from=None, range_to=None, cont_flag="1", store=None):
+    """
+    store: optional src.candle_store.CandleStore; when given, candles come from the
+    on-disk cache and only the missing range is downloaded. Either way the response
+    carries candles as a list of [epoch, open, high, low, close, volume] rows.
+    """
+    if store is not None:
+        response = store.history(fyers, symbol, resolution, range_from, range_to, date_format=date_format)
+        if response.get("s") == "ok":
+            response = dict(response, candles=response["candles"].tolist())
+        return response
     data = {
         "symbol": symbol,
         "resolution": resolution,
@@ -24,15 +66,17 @@ def get_historical_data(fyers, symbol, resolution, date_format=0, range_from=Non
     }
     return fyers.history(data=data)
 
-# src/fyers_client.py
-from fyers_apiv3.FyersWebsocket import data_ws
-
-def subscribe_to_live_data(access_token, symbols, on_message):
+def subscribe_to_live_data(access_token, symbols, on_message, socket_factory=None):
     """
     access_token: 'APP_ID:ACCESS_TOKEN'
     symbols: ['NSE:SBIN-EQ']
     on_message: function(message: dict) -> None
+    socket_factory stands in for FyersDataSocket, e.g. src.fake_broker.FakeBroker.data_socket
     """
+    if socket_factory is None:
+        from fyers_apiv3.FyersWebsocket import data_ws
+        socket_factory = data_ws.FyersDataSocket
+
     def on_open():
         print("WebSocket connected")
         # SymbolUpdate gives full tick including ltp, volume etc. [web:12][web:39]
@@ -45,7 +89,7 @@ def subscribe_to_live_data(access_token, symbols, on_message):
     def on_error(msg):
         print(f"Error: {msg}")
 
-    fyers_ws = data_ws.FyersDataSocket(
+    fyers_ws = socket_factory(
         access_token=access_token,
         log_path="",
         litemode=False,          # keep False since you use full SymbolUpdate [web:13]
@@ -57,10 +101,50 @@ def subscribe_to_live_data(access_token, symbols, on_message):
         on_message=on_message,   # MUST be def on_message(message)
     )
     fyers_ws.connect()
+    return fyers_ws
 
 
-def place_order(fyers, symbol, qty, side, order_type, limit_price=0, stop_price=0, validity="DAY", disclosed_qty=0, offline_order=False, stop_loss=0, take_profit=0):
-    data = {
+def subscribe_to_order_updates(access_token, on_orders, on_trades, on_positions, socket_factory=None):
+    """
+    access_token: 'APP_ID:ACCESS_TOKEN'
+    Connects the Fyers order WebSocket and subscribes to order, trade and position
+    updates; each callback gets the SDK's parsed message ({"s": ..., "orders": {...}} etc.).
+    socket_factory stands in for FyersOrderSocket, e.g. src.order_manager.StubOrderSocket
+    in tests. Returns the socket.
+    """
+    if socket_factory is None:
+        from fyers_apiv3.FyersWebsocket import order_ws
+        socket_factory = order_ws.FyersOrderSocket
+
+    def on_connect():
+        # no keep_running(): it starts a non-daemon thread that would keep the process
+        # alive after the bot stops, and the runner / Streamlit already keep it running
+        order_socket.subscribe(data_type="OnOrders,OnTrades,OnPositions")
+
+    def on_close(msg):
+        print(f"Order socket closed: {msg}")
+
+    def on_error(msg):
+        print(f"Order socket error: {msg}")
+
+    order_socket = socket_factory(
+        access_token=access_token,
+        write_to_file=False,
+        log_path="",
+        on_orders=on_orders,
+        on_trades=on_trades,
+        on_positions=on_positions,
+        on_connect=on_connect,
+        on_close=on_close,
+        on_error=on_error,
+        reconnect=True,
+    )
+    order_socket.connect()
+    return order_socket
+
+
+def order_data(symbol, qty, side, order_type, limit_price=0, stop_price=0, validity="DAY", disclosed_qty=0, offline_order=False, stop_loss=0, take_profit=0):
+    return {
         "symbol": symbol,
         "qty": qty,
         "type": 2 if order_type == "market" else 1,  # 2 for market order, 1 for limit order
@@ -74,4 +158,55 @@ def place_order(fyers, symbol, qty, side, order_type, limit_price=0, stop_price=
         "stopLoss": stop_loss,
         "takeProfit": take_profit
     }
-    return fyers.place_order(data=data)
+
+
+def place_order(fyers, symbol, qty, side, order_type, **kwargs):
+    return fyers.place_order(data=order_data(symbol, qty, side, order_type, **kwargs))
+
+
+# Fyers accepts at most 10 orders per multi-order (basket) request
+BASKET_LIMIT = 10
+
+_basket_pool = None
+_basket_pool_lock = threading.Lock()
+
+
+def _basket_legs(response, n):
+    """Per-order results of one basket request: each leg's body, or the request's error for every leg."""
+    data = response.get("data") if response.get("s") == "ok" else None
+    if not isinstance(data, list) or len(data) != n:
+        error = {"s": "error", "code": response.get("code"), "message": response.get("message", "basket request failed")}
+        return [dict(error) for _ in range(n)]
+    return [leg.get("body") or {"s": "error", "code": leg.get("statusCode"), "message": leg.get("statusDescription")}
+            for leg in data]
+
+
+def _place_basket_chunk(fyers, chunk):
+    try:
+        response = fyers.place_basket_orders(data=chunk)
+    except Exception as e:
+        response = {"s": "error", "code": None, "message": str(e)}
+    return _basket_legs(response, len(chunk))
+
+
+def place_basket_orders(fyers, orders, chunk_size=BASKET_LIMIT):
+    """
+    Place many orders through the multi-order API. orders: list of
+    (symbol, qty, side, order_type) tuples. They are split into chunks of
+    chunk_size orders and the chunks are sent concurrently. Returns one response
+    per order, in order, shaped like place_order's ({"s": ..., "id": ...}).
+    """
+    chunks = [[order_data(*order) for order in orders[i:i + chunk_size]]
+              for i in range(0, len(orders), chunk_size)]
+    if len(chunks) <= 1:
+        return _place_basket_chunk(fyers, chunks[0]) if chunks else []
+    global _basket_pool
+    with _basket_pool_lock:
+        if _basket_pool is None:
+            _basket_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="basket")
+    # the first chunk goes out on the calling thread while the pool sends the rest
+    futures = [_basket_pool.submit(_place_basket_chunk, fyers, chunk) for chunk in chunks[1:]]
+    results = _place_basket_chunk(fyers, chunks[0])
+    for future in futures:
+        results += future.result()
+    return results
@@ -0,0 +1,201 @@
+"""
+Option symbol resolution backed by the Fyers symbol master.
+
+Download the NSE F&O master (https://public.fyers.in/sym_details/NSE_FO.csv) to a
+local path; InstrumentMaster.load() parses it once into an index keyed by
+(underlying, expiry date, strike, CE/PE) and caches the parsed index next to the
+CSV so later starts skip the parse. For the trading session, build an OptionChain
+for the chosen expiry; resolving a symbol on a signal is then arithmetic plus one
+dict lookup, with the lot size known up front.
+"""
+import csv
+import datetime
+import json
+import logging
+import os
+
+log = logging.getLogger("trading_bot.instruments")
+
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+# column positions in the Fyers symbol master CSV (it has no header row)
+COL_LOT_SIZE = 3
+COL_EXPIRY = 8
+COL_SYMBOL = 9
+COL_UNDERLYING = 13
+COL_STRIKE = 15
+COL_OPTION_TYPE = 16
+
+INDEX_ALIASES = {
+    "NSE:NIFTY50-INDEX": "NSE:NIFTY-INDEX",
+    "NSE:NIFTYBANK-INDEX": "NSE:BANKNIFTY-INDEX",
+}
+
+CACHE_VERSION = 2
+
+
+def underlying_from_ticker(ticker):
+    """'NSE:NIFTY50-INDEX' -> 'NIFTY', 'NSE:SBIN-EQ' -> 'SBIN'."""
+    ticker = INDEX_ALIASES.get(ticker, ticker)
+    return ticker.split(":")[1].split("-")[0]
+
+
+def _strike_key(strike):
+    strike = float(strike)
+    return int(strike) if strike.is_integer() else strike
+
+
+def _option_code(option_type):
+    return "PE" if option_type in ("Put", "PE", "P") else "CE"
+
+
+class InstrumentMaster:
+    """In-memory index of option contracts from the Fyers symbol master."""
+
+    def __init__(self, contracts):
+        # (underlying, expiry date, strike, "CE"/"PE") -> (symbol, lot_size)
+        self.contracts = contracts
+        self.lot_sizes = {symbol: lot for symbol, lot in contracts.values()}
+        expiries = {}
+        for underlying, expiry, _, _ in contracts:
+            expiries.setdefault(underlying, set()).add(expiry)
+        self.expiries = {u: sorted(dates) for u, dates in expiries.items()}
+
+    @classmethod
+    def load(cls, path, use_cache=True):
+        """Parse the master CSV at `path`, reusing `<path>.idx.json` if it is still current."""
+        stat = os.stat(path)
+        stamp = [CACHE_VERSION, stat.st_size, stat.st_mtime_ns]
+        cache_path = path + ".idx.json"
+        if use_cache and os.path.exists(cache_path):
+            try:
+                with open(cache_path) as f:
+                    cached = json.load(f)
+                if cached["stamp"] == stamp:
+                    return cls(cls._from_rows(cached["contracts"]))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                log.warning({"event": "symbol_master_cache_unreadable", "path": cache_path, "error": repr(e)})
+
+        contracts = cls._parse(path)
+        if use_cache:
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"stamp": stamp, "contracts": cls._to_rows(contracts)}, f, separators=(",", ":"))
+            os.replace(tmp_path, cache_path)
+        return cls(contracts)
+
+    # the cache is plain JSON rows, so loading it can never execute code
+    @staticmethod
+    def _to_rows(contracts):
+        return [[u, expiry.isoformat(), strike, code, symbol, lot]
+                for (u, expiry, strike, code), (symbol, lot) in contracts.items()]
+
+    @staticmethod
+    def _from_rows(rows):
+        return {
+            (u, datetime.date.fromisoformat(expiry), _strike_key(strike), code): (symbol, int(lot))
+            for u, expiry, strike, code, symbol, lot in rows
+        }
+
+    @staticmethod
+    def _parse(path):
+        contracts = {}
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) <= COL_OPTION_TYPE or row[COL_OPTION_TYPE] not in ("CE", "PE"):
+                    continue
+                try:
+                    expiry = datetime.datetime.fromtimestamp(int(row[COL_EXPIRY]), IST).date()
+                    key = (row[COL_UNDERLYING], expiry, _strike_key(row[COL_STRIKE]), row[COL_OPTION_TYPE])
+                    contracts[key] = (row[COL_SYMBOL], int(float(row[COL_LOT_SIZE])))
+                except ValueError:
+                    continue
+        return contracts
+
+    def lookup(self, underlying, expiry, strike, option_type):
+        return self.contracts.get((underlying, expiry, _strike_key(strike), _option_code(option_type)))
+
+    def lot_size(self, symbol):
+        return self.lot_sizes.get(symbol)
+
+    def resolve_expiry(self, underlying, expiry_date, expiry_type="Weekly"):
+        """
+        Weekly: the first listed expiry on or after expiry_date.
+        Monthly: the last listed expiry in expiry_date's month.
+        """
+        dates = self.expiries.get(underlying, [])
+        if expiry_type == "Monthly":
+            in_month = [d for d in dates if (d.year, d.month) == (expiry_date.year, expiry_date.month)]
+            return in_month[-1] if in_month else None
+        return next((d for d in dates if d >= expiry_date), None)
+
+    def chain(self, underlying, expiry, step):
+        contracts = {
+            (strike, code): value
+            for (u, exp, strike, code), value in self.contracts.items()
+            if u == underlying and exp == expiry
+        }
+        return OptionChain(underlying, expiry, step, contracts=contracts)
+
+
+class OptionChain:
+    """
+    Session-precomputed option symbols for one underlying and expiry.
+
+    With `contracts` (from InstrumentMaster.chain) only listed strikes resolve and the
+    lot size is returned; without it the symbol is formatted from a precomputed
+    prefix, as the bot did before a symbol master was available.
+    """
+
+    def __init__(self, underlying, expiry, step, contracts=None, symbol_prefix=None):
+        self.underlying = underlying
+        self.expiry = expiry
+        self.step = step
+        self.contracts = contracts
+        self.symbol_prefix = symbol_prefix
+        # every lot size listed in the chain; empty for the formatting fallback
+        self.lot_sizes = {lot for _, lot in contracts.values()} if contracts else set()
+        self.lot_size = next(iter(self.lot_sizes)) if len(self.lot_sizes) == 1 else None
+
+    @classmethod
+    def from_format(cls, ticker, expiry_str, expiry_type, step):
+        """Fallback chain that formats NSE option symbols without a symbol master."""
+        underlying = underlying_from_ticker(ticker)
+        expiry = datetime.datetime.strptime(expiry_str, "%Y-%m-%d").date()
+        if expiry_type == "Monthly":
+            expiry_code = expiry.strftime("%y%b").upper()
+        else:
+            # weekly format: YY + month without leading zero + DD
+            expiry_code = f"{expiry.strftime('%y')}{expiry.month}{expiry.strftime('%d')}"
+        return cls(underlying, expiry, step, symbol_prefix=f"NSE:{underlying}{expiry_code}")
+
+    def strike_for(self, ltp, option_type):
+        """ITM strike: calls round down to the step, puts round up past it."""
+        price = round(ltp)
+        if _option_code(option_type) == "PE":
+            return price + (self.step - (price % self.step))
+        return price - (price % self.step)
+
+    def resolve(self, ltp, option_type):
+        """(symbol, lot_size) for the ITM contract at `ltp`, or None if it is not listed."""
+        strike = _strike_key(self.strike_for(ltp, option_type))
+        code = _option_code(option_type)
+        if self.contracts is not None:
+            return self.contracts.get((strike, code))
+        return f"{self.symbol_prefix}{strike}{code}", None
+
+
+def build_option_chain(ticker, expiry_str, expiry_type, step, master=None):
+    """Session option chain from the symbol master when given, else the formatting fallback."""
+    if master is None:
+        return OptionChain.from_format(ticker, expiry_str, expiry_type, step)
+    underlying = underlying_from_ticker(ticker)
+    wanted = datetime.datetime.strptime(expiry_str, "%Y-%m-%d").date()
+    expiry = master.resolve_expiry(underlying, wanted, expiry_type)
+    if expiry is None:
+        raise ValueError(f"No {expiry_type.lower()} {underlying} expiry found for {expiry_str} in symbol master")
+    return master.chain(underlying, expiry, step)
+
+
+def is_lot_multiple(qty, lot_size):
+    return lot_size is None or (lot_size > 0 and qty % lot_size == 0)
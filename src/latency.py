@@ -0,0 +1,124 @@
+"""
+Per-stage latency histograms for the tick-to-order path.
+
+LatencyHistogram is HDR-style: values (nanoseconds) fall into log-linear
+buckets, SUB_BUCKETS per power of two, so every recorded value is kept to
+within ~3% at any magnitude in a fixed-size list of counters. Recording is a
+bit_length, a shift and a list increment; percentiles are only computed when
+a snapshot is taken. Counters are not locked: a sample lost to a race between
+two recording threads is an acceptable price for staying off the hot path's
+locks.
+
+    latency = LatencyStats()
+    t0 = time.perf_counter_ns()
+    ...
+    latency.record("signal", time.perf_counter_ns() - t0)
+    latency.snapshot()   # {"signal": {"count": ..., "p50_us": ..., "p99_us": ...}, ...}
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS
+HALF = SUB_BUCKETS >> 1
+MAX_BITS = 44   # ~4.9 hours in ns; larger values land in the last bucket
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _bucket_count():
+    return (MAX_BITS - SUB_BITS + 1) * HALF + HALF
+
+
+def _bucket_floors():
+    """Lowest value of each bucket, matching LatencyHistogram.record's indexing."""
+    floors = list(range(SUB_BUCKETS))
+    for shift in range(1, MAX_BITS - SUB_BITS + 1):
+        floors.extend((mantissa << shift) for mantissa in range(HALF, SUB_BUCKETS))
+    return np.array(floors, dtype=np.float64)
+
+
+class LatencyHistogram:
+
+    __slots__ = ("counts", "count", "max", "_last")
+
+    def __init__(self):
+        self.counts = [0] * _bucket_count()
+        self._last = len(self.counts) - 1
+        self.count = 0
+        self.max = 0
+
+    def record(self, value_ns):
+        if value_ns < 0:
+            value_ns = 0
+        shift = value_ns.bit_length() - SUB_BITS
+        # below SUB_BUCKETS values map 1:1; above, keep the top SUB_BITS bits
+        index = value_ns if shift <= 0 else (shift << (SUB_BITS - 1)) + (value_ns >> shift)
+        if index > self._last:
+            index = self._last
+        self.counts[index] += 1
+        self.count += 1
+        if value_ns > self.max:
+            self.max = value_ns
+
+    def clear(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.max = 0
+
+    def snapshot(self):
+        """Count, mean and percentiles in microseconds (bucket midpoints)."""
+        counts = np.array(self.counts, dtype=np.int64)
+        total = int(counts.sum())
+        stats = {"count": total, "max_us": self.max / 1000}
+        if total == 0:
+            stats.update({"mean_us": None, **{f"p{p:g}_us": None for p in PERCENTILES}})
+            return stats
+        floors = _FLOORS
+        widths = np.diff(floors, append=floors[-1] * 2)
+        mids = floors + np.maximum(widths - 1, 0) / 2
+        stats["mean_us"] = float((counts * mids).sum() / total / 1000)
+        cumulative = np.cumsum(counts)
+        for p in PERCENTILES:
+            index = int(np.searchsorted(cumulative, total * p / 100, "left"))
+            stats[f"p{p:g}_us"] = float(min(mids[index], self.max)) / 1000
+        return stats
+
+
+_FLOORS = _bucket_floors()
+
+
+class LatencyStats:
+    """Named LatencyHistograms, created on first use, with snapshot and dump helpers."""
+
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def record(self, stage, value_ns):
+        self.histogram(stage).record(value_ns)
+
+    def snapshot(self):
+        return {stage: h.snapshot() for stage, h in list(self.histograms.items())}
+
+    def reset(self):
+        for histogram in list(self.histograms.values()):
+            histogram.clear()
+
+    def dump(self, path):
+        """Atomically write snapshot() as JSON to `path`."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(tmp, path)
@@ -0,0 +1,113 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.fyers_client import place_basket_orders, place_order
+
+log = logging.getLogger("trading_bot.orders")
+
+
+class OrderExecutor:
+    """
+    Places orders on a small pool of worker threads so the WebSocket thread never
+    waits on a broker round-trip. The tick path only submits an order intent;
+    the worker places it and hands the order id to an OrderManager, which calls
+    back into the engine (on_fill / on_reject) when the order socket reports the
+    order filled or rejected. Without an order manager an accepted order counts
+    as filled at its reference price.
+    """
+
+    def __init__(self, fyers, max_workers=2, place=place_order, place_basket=place_basket_orders,
+                 latency=None, order_manager=None):
+        self.fyers = fyers
+        self._place = place
+        self._place_basket = place_basket
+        # optional src.latency.LatencyStats for queue / place_order timings
+        self.latency = latency
+        self.order_manager = order_manager
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order")
+
+    def submit(self, symbol, qty, side, order_type="market", ref_price=None, meta=None,
+               on_fill=None, on_reject=None, reduce_only=False, **order_kwargs):
+        """
+        Queue an order and return immediately with a Future.
+        on_fill(intent, fill_price, response) / on_reject(intent, response) run on a
+        worker or order-socket thread, so they must take whatever locks they need themselves.
+        `meta` is carried on the intent untouched for the callbacks' use.
+        reduce_only marks an exit of a held position; it is forwarded to `place` only
+        when set, for an OrderGate to exempt exits from its circuit breaker.
+        """
+        if reduce_only:
+            order_kwargs["reduce_only"] = True
+        intent = self._intent(symbol, qty, side, order_type, ref_price, meta, order_kwargs)
+        return self._pool.submit(self._execute, intent, on_fill, on_reject)
+
+    def submit_batch(self, orders):
+        """
+        Queue several market exits as one multi-order (basket) submission and
+        return a Future of the per-order responses. orders: dicts with submit()'s
+        arguments (symbol, qty, side, ref_price, meta, on_fill, on_reject). Each
+        leg is reconciled on its own, exactly as if it had been submit()ted.
+        """
+        legs = [(self._intent(o["symbol"], o["qty"], o["side"], o.get("order_type", "market"),
+                              o.get("ref_price"), o.get("meta"), {}),
+                 o.get("on_fill"), o.get("on_reject")) for o in orders]
+        return self._pool.submit(self._execute_batch, legs)
+
+    @staticmethod
+    def _intent(symbol, qty, side, order_type, ref_price, meta, order_kwargs):
+        return {
+            "symbol": symbol,
+            "qty": qty,
+            "side": side,
+            "order_type": order_type,
+            "ref_price": ref_price,
+            "meta": meta,
+            "kwargs": order_kwargs,
+            "submitted_ns": time.perf_counter_ns(),
+        }
+
+    def _execute(self, intent, on_fill, on_reject):
+        started = time.perf_counter_ns()
+        try:
+            response = self._place(
+                self.fyers, intent["symbol"], intent["qty"], intent["side"],
+                intent["order_type"], **intent["kwargs"]
+            )
+        except Exception as e:
+            response = {"s": "error", "code": None, "message": str(e)}
+        if self.latency is not None:
+            self.latency.record("order_queue", started - intent["submitted_ns"])
+            self.latency.record("place_order", time.perf_counter_ns() - started)
+        return self._reconcile(intent, response, on_fill, on_reject)
+
+    def _execute_batch(self, legs):
+        started = time.perf_counter_ns()
+        orders = [(i["symbol"], i["qty"], i["side"], i["order_type"]) for i, _, _ in legs]
+        try:
+            responses = self._place_basket(self.fyers, orders)
+        except Exception as e:
+            responses = [{"s": "error", "code": None, "message": str(e)} for _ in legs]
+        if self.latency is not None:
+            self.latency.record("order_queue", started - legs[0][0]["submitted_ns"])
+            self.latency.record("place_basket", time.perf_counter_ns() - started)
+        for (intent, on_fill, on_reject), response in zip(legs, responses):
+            self._reconcile(intent, response, on_fill, on_reject)
+        return responses
+
+    def _reconcile(self, intent, response, on_fill, on_reject):
+        if response.get("s") != "ok":
+            log.warning({"event": "order_failed", "symbol": intent["symbol"], "side": intent["side"],
+                         "qty": intent["qty"], "response": response})
+            if on_reject:
+                on_reject(intent, response)
+            return response
+
+        if self.order_manager is not None:
+            self.order_manager.track(response.get("id"), intent, on_fill, on_reject)
+        elif on_fill:
+            on_fill(intent, intent["ref_price"], response)
+        return response
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
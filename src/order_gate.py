@@ -0,0 +1,220 @@
+import threading
+import time
+
+from src.fyers_client import BASKET_LIMIT, place_basket_orders, place_order
+
+# Fyers API v3 order limits: 10 requests / second and 200 / minute
+ORDERS_PER_SECOND = 10
+ORDERS_PER_MINUTE = 200
+
+# Rejections that will fail the same way on every retry (e.g. -50: qty not a lot-size multiple)
+DETERMINISTIC_ERROR_CODES = frozenset({-50})
+
+
+class TokenBucket:
+    """Classic token bucket; try_acquire() never blocks."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._last = clock()
+
+    def available(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        return self._tokens
+
+    def try_acquire(self, tokens=1):
+        if self.available() >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` deterministic failures within `window` seconds and
+    rejects everything for `cooldown` seconds; after that one trial call is let
+    through (half-open) and a success closes it again.
+    """
+
+    def __init__(self, threshold=3, window=60.0, cooldown=60.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self._clock = clock
+        self._failures = []
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self):
+        """True while calls are refused: cooling down, or waiting on the half-open trial."""
+        if self._opened_at is None:
+            return False
+        return self._trial_in_flight or self._clock() - self._opened_at < self.cooldown
+
+    def allow(self):
+        if self._opened_at is None:
+            return True
+        if self.is_open:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self._failures.clear()
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        now = self._clock()
+        self._failures = [t for t in self._failures if now - t < self.window]
+        self._failures.append(now)
+        if self._opened_at is not None or len(self._failures) >= self.threshold:
+            self._opened_at = now
+        self._trial_in_flight = False
+
+    def release(self):
+        """The trial call ended without a verdict (e.g. transient error); allow another trial."""
+        self._trial_in_flight = False
+
+
+class OrderGate:
+    """
+    Submission gate in front of src.fyers_client.place_order.
+
+    - token buckets keep us under the Fyers per-second and per-minute order limits;
+    - an identical (symbol, side, qty) order is dropped while one is in flight or
+      for `reject_cooldown` seconds after the broker rejected it deterministically;
+    - an order tagged with a `signal_bar` is dropped if the same (symbol, side)
+      was already accepted for that bar, so one signal trades once however many
+      ticks it holds for;
+    - repeated deterministic rejections open a circuit breaker.
+
+    Orders placed with reduce_only=True (exits of held positions) are only rate
+    limited and deduplicated while in flight: the breaker and the reject cooldown
+    never stop the bot from closing a position.
+
+    Blocked orders are not sent; place_order() returns an error response shaped like
+    the broker's, with "gate" set to why it was blocked.
+    """
+
+    def __init__(self, per_second=ORDERS_PER_SECOND, per_minute=ORDERS_PER_MINUTE,
+                 reject_cooldown=30.0, breaker=None, place=place_order, place_basket=place_basket_orders,
+                 clock=time.monotonic):
+        self._place = place
+        self._place_basket = place_basket
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets = [
+            TokenBucket(per_second, per_second, clock),
+            TokenBucket(per_minute / 60.0, per_minute, clock),
+        ]
+        self.reject_cooldown = reject_cooldown
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self._in_flight = set()
+        self._rejected = {}
+        # (symbol, side) -> signal bar of its last accepted order
+        self._entered = {}
+        self.blocked = {"rate_limited": 0, "duplicate": 0, "circuit_open": 0}
+
+    def _blocked(self, reason, key):
+        self.blocked[reason] += 1
+        return {"s": "error", "code": None, "gate": reason,
+                "message": f"order {key} blocked by gate: {reason}"}
+
+    def place_order(self, fyers, symbol, qty, side, order_type, reduce_only=False, signal_bar=None, **kwargs):
+        key = (symbol, side, qty)
+        with self._lock:
+            now = self._clock()
+            if key in self._in_flight:
+                return self._blocked("duplicate", key)
+            if signal_bar is not None and self._entered.get((symbol, side)) == signal_bar:
+                return self._blocked("duplicate", key)
+            rejected_at = self._rejected.get(key)
+            if not reduce_only and rejected_at is not None and now - rejected_at < self.reject_cooldown:
+                return self._blocked("duplicate", key)
+            # check both buckets before taking from either
+            if any(bucket.available() < 1 for bucket in self._buckets):
+                return self._blocked("rate_limited", key)
+            if not reduce_only and not self.breaker.allow():
+                return self._blocked("circuit_open", key)
+            for bucket in self._buckets:
+                bucket.try_acquire()
+            self._in_flight.add(key)
+
+        try:
+            response = self._place(fyers, symbol, qty, side, order_type, **kwargs)
+        except Exception:
+            with self._lock:
+                self._in_flight.discard(key)
+                if not reduce_only:
+                    self.breaker.release()
+            raise
+
+        with self._lock:
+            self._in_flight.discard(key)
+            if response.get("s") == "ok":
+                self._rejected.pop(key, None)
+                if signal_bar is not None:
+                    self._entered[(symbol, side)] = signal_bar
+                if not reduce_only:
+                    self.breaker.record_success()
+            elif response.get("code") in DETERMINISTIC_ERROR_CODES:
+                self._rejected[key] = self._clock()
+                if not reduce_only:
+                    self.breaker.record_failure()
+            elif not reduce_only:
+                # transient failure: free to retry, and no verdict for a half-open trial
+                self.breaker.release()
+        return response
+
+    def place_basket(self, fyers, orders, chunk_size=BASKET_LIMIT):
+        """
+        Exits of held positions through the multi-order API: orders are (symbol,
+        qty, side, order_type) tuples, all treated as reduce_only, so only rate
+        limits and in-flight duplicates apply. Each basket request (chunk_size
+        orders) takes one rate-limit token. Returns one response per order, in order.
+        """
+        responses = [None] * len(orders)
+        sent = []
+        with self._lock:
+            keys = set()
+            for i, order in enumerate(orders):
+                key = tuple(order[:3])
+                if key in self._in_flight or key in keys:
+                    responses[i] = self._blocked("duplicate", key)
+                else:
+                    keys.add(key)
+                    sent.append(i)
+            if not sent:
+                return responses
+            requests = -(-len(sent) // chunk_size)
+            if any(bucket.available() < requests for bucket in self._buckets):
+                return [response or self._blocked("rate_limited", tuple(orders[i][:3]))
+                        for i, response in enumerate(responses)]
+            for bucket in self._buckets:
+                bucket.try_acquire(requests)
+            self._in_flight.update(keys)
+
+        try:
+            results = self._place_basket(fyers, [orders[i] for i in sent], chunk_size=chunk_size)
+        finally:
+            with self._lock:
+                for i in sent:
+                    self._in_flight.discard(tuple(orders[i][:3]))
+
+        with self._lock:
+            now = self._clock()
+            for i, response in zip(sent, results):
+                responses[i] = response
+                key = tuple(orders[i][:3])
+                if response.get("s") == "ok":
+                    self._rejected.pop(key, None)
+                elif response.get("code") in DETERMINISTIC_ERROR_CODES:
+                    self._rejected[key] = now
+        return responses
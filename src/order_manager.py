@@ -0,0 +1,204 @@
+"""
+Order and position book fed by the Fyers order WebSocket.
+
+OrderExecutor places an order over REST and hands the returned order id to
+track(); from then on nothing polls. Order, trade and position updates pushed
+by the broker reconcile each tracked order: a traded order calls on_fill with
+its traded price, a rejected / cancelled / expired one calls on_reject, or
+on_fill for the quantity that did trade before it ended. Updates that arrive
+before track() (the socket can beat the REST response) are kept and applied
+when the order is tracked.
+
+Every update also lands in the book: `orders` by id, `orders_by_symbol` and
+`positions` by symbol, as last reported by the broker.
+"""
+import logging
+import threading
+import time
+
+from src.fyers_client import subscribe_to_order_updates
+
+# Fyers order status codes
+CANCELLED = 1
+TRADED = 2
+TRANSIT = 4
+REJECTED = 5
+PENDING = 6
+EXPIRED = 7
+FINAL_STATUSES = (CANCELLED, TRADED, REJECTED, EXPIRED)
+
+log = logging.getLogger("trading_bot.orders")
+
+
+class OrderManager:
+    """
+    Thread-safe: the socket thread delivers updates while order workers track
+    new orders. Callbacks run on the socket thread (or on the tracking thread
+    for an order that had already ended), outside the manager's lock.
+    """
+
+    def __init__(self, latency=None):
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.orders = {}            # order id -> latest order update, plus "fills"
+        self.orders_by_symbol = {}  # symbol -> [order id, ...]
+        self.positions = {}         # symbol -> latest position update
+        self._tracked = {}          # order id -> (intent, on_fill, on_reject, tracked_ns)
+        self.socket = None
+
+    # ---------------- connection ----------------
+    def connect(self, access_token, socket_factory=None):
+        """Subscribe to order/trade/position updates. Blocks while the SDK connects."""
+        self.socket = subscribe_to_order_updates(access_token, self.on_orders, self.on_trades,
+                                                 self.on_positions, socket_factory=socket_factory)
+        return self.socket
+
+    def close(self):
+        if self.socket is not None:
+            self.socket.close_connection()
+            self.socket = None
+
+    # ---------------- order workers ----------------
+    def track(self, order_id, intent, on_fill=None, on_reject=None):
+        """
+        Wait for `order_id` to end and report it through on_fill(intent, price,
+        order) / on_reject(intent, order). Returns immediately.
+        """
+        with self.lock:
+            self._tracked[order_id] = (intent, on_fill, on_reject, time.perf_counter_ns())
+            order = self.orders.get(order_id)
+            done = order is not None and order.get("status") in FINAL_STATUSES
+            tracked = self._tracked.pop(order_id) if done else None
+        if tracked is not None:
+            self._resolve(order, tracked)
+
+    def pending(self):
+        """Ids of tracked orders the broker has not finished yet."""
+        with self.lock:
+            return list(self._tracked)
+
+    # ---------------- socket callbacks ----------------
+    def on_orders(self, message):
+        update = (message or {}).get("orders")
+        if not update or update.get("id") is None:
+            return
+        order_id = update["id"]
+        with self.lock:
+            order = self.orders.get(order_id)
+            if order is None:
+                order = self.orders[order_id] = {"fills": {}}
+                self.orders_by_symbol.setdefault(update.get("symbol"), []).append(order_id)
+            order.update(update)
+            status = order.get("status")
+            tracked = self._tracked.pop(order_id, None) if status in FINAL_STATUSES else None
+        if tracked is not None:
+            self._resolve(order, tracked)
+        elif status in (PENDING, TRANSIT) and order.get("filledQty"):
+            log.info({"event": "partial_fill", "id": order_id, "symbol": order.get("symbol"),
+                      "filled": order.get("filledQty"), "remaining": order.get("remainingQuantity")})
+
+    def on_trades(self, message):
+        trade = (message or {}).get("trades")
+        if not trade or trade.get("orderNumber") is None:
+            return
+        with self.lock:
+            order = self.orders.get(trade["orderNumber"])
+            if order is None:
+                order = self.orders[trade["orderNumber"]] = {"id": trade["orderNumber"], "fills": {}}
+                self.orders_by_symbol.setdefault(trade.get("symbol"), []).append(trade["orderNumber"])
+            # keyed by trade number, so a redelivered trade is not counted twice
+            order["fills"][trade.get("tradeNumber")] = (trade.get("tradedQty", 0), trade.get("tradePrice"))
+
+    def on_positions(self, message):
+        position = (message or {}).get("positions")
+        if not position or position.get("symbol") is None:
+            return
+        with self.lock:
+            self.positions[position["symbol"]] = dict(position)
+
+    # ---------------- reconciliation ----------------
+    def _resolve(self, order, tracked):
+        intent, on_fill, on_reject, tracked_ns = tracked
+        if self.latency is not None:
+            self.latency.record("order_update", time.perf_counter_ns() - tracked_ns)
+        status = order.get("status")
+        filled = order.get("filledQty") or sum(qty for qty, _ in order["fills"].values())
+        if status != TRADED and not filled:
+            log.warning({"event": "order_rejected", "id": order.get("id"), "symbol": intent["symbol"],
+                         "status": status, "message": order.get("message")})
+            if on_reject:
+                on_reject(intent, order)
+            return
+        if status != TRADED:
+            # cancelled or expired after a partial fill: what traded is the position
+            log.warning({"event": "order_partially_filled", "id": order.get("id"), "symbol": intent["symbol"],
+                         "status": status, "filled": filled, "qty": intent["qty"]})
+            intent = dict(intent, qty=filled)
+        if on_fill:
+            on_fill(intent, self.fill_price(order, intent["ref_price"]), order)
+
+    @staticmethod
+    def fill_price(order, ref_price):
+        """Average traded price: the order's tradedPrice, else the VWAP of its trades, else ref_price."""
+        if order.get("tradedPrice"):
+            return order["tradedPrice"]
+        fills = [(qty, price) for qty, price in order["fills"].values() if qty and price]
+        if fills:
+            return sum(qty * price for qty, price in fills) / sum(qty for qty, _ in fills)
+        return ref_price
+
+    # ---------------- read side ----------------
+    def net_qty(self, symbol):
+        """Broker-reported net quantity of `symbol` (0 when flat or never seen)."""
+        with self.lock:
+            return (self.positions.get(symbol) or {}).get("netQty", 0)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "positions": {symbol: dict(p) for symbol, p in self.positions.items() if p.get("netQty")},
+                "open_orders": [order_id for order_id, o in self.orders.items()
+                                if o.get("status") not in FINAL_STATUSES],
+                "tracked": list(self._tracked),
+            }
+
+
+class StubOrderSocket:
+    """
+    In-process stand-in for FyersOrderSocket with the same constructor and
+    connect/subscribe/close_connection surface. push_order / push_trade /
+    push_position deliver messages in the SDK's parsed format, on the calling thread.
+    """
+
+    def __init__(self, access_token=None, on_orders=None, on_trades=None, on_positions=None,
+                 on_connect=None, on_close=None, on_error=None, **kwargs):
+        self.access_token = access_token
+        self.on_orders = on_orders
+        self.on_trades = on_trades
+        self.on_positions = on_positions
+        self.on_connect = on_connect
+        self.on_close = on_close
+        self.subscribed = None
+        self.connected = False
+
+    def connect(self):
+        self.connected = True
+        if self.on_connect:
+            self.on_connect()
+
+    def subscribe(self, data_type):
+        self.subscribed = data_type
+
+    def close_connection(self):
+        self.connected = False
+        if self.on_close:
+            self.on_close({"code": 1000, "message": "closed"})
+
+    def push_order(self, **order):
+        self.on_orders({"s": "ok", "orders": order})
+
+    def push_trade(self, **trade):
+        self.on_trades({"s": "ok", "trades": trade})
+
+    def push_position(self, **position):
+        self.on_positions({"s": "ok", "positions": position})
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity circular buffer backed by a NumPy array.
+
+    Every value is written twice (at i and i + capacity) so the newest n values
+    are always one contiguous slice: last(n) is a zero-copy view and appends never
+    reallocate, however long the session runs.
+    """
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = int(capacity)
+        if self.capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(2 * self.capacity, dtype=self.dtype)
+        self._head = 0      # next write slot in [0, capacity)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.last())
+
+    def __getitem__(self, item):
+        return self.last()[item]
+
+    def __repr__(self):
+        return f"RingBuffer(capacity={self.capacity}, len={self._count}, dtype={self.dtype})"
+
+    def append(self, value):
+        head = self._head
+        self._data[head] = value
+        self._data[head + self.capacity] = value
+        self._head = head + 1 if head + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+
+    def extend(self, values):
+        """Bulk-load values, keeping only the newest `capacity` of them."""
+        values = np.asarray(values, dtype=self.dtype).ravel()
+        cap = self.capacity
+        n = len(values)
+        if n == 0:
+            return
+        if n >= cap:
+            self._data[:cap] = values[-cap:]
+            self._data[cap:] = values[-cap:]
+            self._head = 0
+            self._count = cap
+            return
+        idx = (self._head + np.arange(n)) % cap
+        self._data[idx] = values
+        self._data[idx + cap] = values
+        self._head = (self._head + n) % cap
+        self._count = min(cap, self._count + n)
+
+    def last(self, n=None):
+        """Read-only view of the newest n values (all of them by default), oldest first."""
+        if n is None or n > self._count:
+            n = self._count
+        end = self._head + self.capacity
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
@@ -0,0 +1,139 @@
+"""
+Headless bot runner: loads the config, authenticates, seeds history, subscribes
+and trades without Streamlit. The engine's state is written to a status file
+that the Streamlit app can attach to as a read-only dashboard.
+
+    python -m src.runner --config src/config.py --access-token <token>
+    python -m src.runner --auth-code <code from the Fyers redirect>
+
+The access token can also come from the FYERS_ACCESS_TOKEN environment variable.
+A token obtained with --auth-code is saved encrypted (src/token_store.py), so
+later runs on the same trading day start without one.
+"""
+import argparse
+import json
+import os
+import signal
+import time
+
+LAUNCHED_AT = time.time()   # before the heavy imports below, for time-to-first-tick
+
+from src.engine import TradingEngine, load_config  # noqa: E402
+from src.api_profiler import DEFAULT_PROFILE_FILE  # noqa: E402
+from src.fyers_client import get_access_token, rest_client, token_is_valid  # noqa: E402
+from src.snapshot import DEFAULT_SNAPSHOT_FILE  # noqa: E402
+from src.structured_log import DEFAULT_LOG_FILE, setup_logging, shutdown_logging  # noqa: E402
+from src.token_store import DEFAULT_TOKEN_FILE, clear_token, load_token, save_token  # noqa: E402
+
+DEFAULT_STATUS_FILE = os.path.join("data", "engine_status.json")
+DEFAULT_LATENCY_FILE = os.path.join("data", "latency.json")
+
+
+def write_status(engine, path):
+    """Atomically replace the status file with the engine's current state."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(engine.status(), f)
+    os.replace(tmp, path)
+
+
+def read_status(path=DEFAULT_STATUS_FILE):
+    """Last status written by a running engine, or None."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the trading bot without the Streamlit UI.")
+    parser.add_argument("--config", default=os.path.join("src", "config.py"))
+    parser.add_argument("--access-token", default=os.environ.get("FYERS_ACCESS_TOKEN"))
+    parser.add_argument("--auth-code", help="exchange this auth code for an access token")
+    parser.add_argument("--status-file", default=DEFAULT_STATUS_FILE)
+    parser.add_argument("--status-interval", type=float, default=1.0, help="seconds between status writes")
+    parser.add_argument("--latency-file", default=DEFAULT_LATENCY_FILE, help="per-stage latency histogram dump")
+    parser.add_argument("--latency-interval", type=float, default=60.0, help="seconds between latency dumps")
+    parser.add_argument("--api-profile-file", default=DEFAULT_PROFILE_FILE,
+                        help="per-endpoint REST API latency / error dump, written with the latency file")
+    parser.add_argument("--snapshot-file", default=DEFAULT_SNAPSHOT_FILE,
+                        help="warm-restart snapshot, restored on start ('' to disable)")
+    parser.add_argument("--record-ticks", metavar="PATH", help="append every raw tick to this tick log")
+    parser.add_argument("--log-file", default=DEFAULT_LOG_FILE, help="JSON-lines engine log")
+    parser.add_argument("--log-level", help="DEBUG, INFO, WARNING... (default: LOG_LEVEL in the config)")
+    parser.add_argument("--token-file", default=DEFAULT_TOKEN_FILE,
+                        help="encrypted access-token cache, keyed by SECRET_KEY ('' to disable)")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config, tick_log=args.record_ticks, log_level=args.log_level,
+                         snapshot_path=args.snapshot_file, launched_at=LAUNCHED_AT)
+    if not config.get("client_id"):
+        parser.error(f"CLIENT_ID is missing from {args.config}")
+    # the token cache is encrypted with the app secret, so it needs one
+    token_file = args.token_file if config.get("secret_key") else None
+    access_token = args.access_token
+    cached = False
+    if access_token is None and args.auth_code:
+        if not (config.get("secret_key") and config.get("redirect_uri")):
+            parser.error(f"--auth-code needs SECRET_KEY and REDIRECT_URI in {args.config}")
+        access_token = get_access_token(config["client_id"], config["secret_key"],
+                                        config["redirect_uri"], args.auth_code)
+        if access_token and token_file:
+            save_token(access_token, config["client_id"], config["secret_key"], token_file)
+    if access_token is None and token_file:
+        access_token = load_token(config["client_id"], config["secret_key"], token_file)
+        cached = access_token is not None
+    if not access_token:
+        parser.error("an access token is required (--access-token, FYERS_ACCESS_TOKEN or --auth-code)")
+
+    # let `kill` / service managers stop the daemon through the same cleanup as Ctrl+C
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
+    setup_logging(args.log_file, config["log_level"])
+    fyers = rest_client(config["client_id"], access_token)
+    if cached and not token_is_valid(fyers):
+        clear_token(token_file)
+        shutdown_logging()
+        parser.exit(2, "The saved access token was rejected by Fyers; log in again with --auth-code.\n")
+    engine = TradingEngine(fyers, config)
+    try:
+        problems = engine.start(f"{config['client_id']}:{access_token}")
+    except ValueError as e:
+        engine.stop(wait=False)
+        shutdown_logging()
+        parser.exit(2, f"Refusing to start: {e}\n")
+    for problem in problems:
+        print(problem)
+    print(f"Bot started for {', '.join(engine.tickers)} ({config['timeframe']})")
+
+    try:
+        last_latency_dump = time.monotonic()
+        first_tick_reported = False
+        while True:
+            write_status(engine, args.status_file)
+            if not first_tick_reported and "time_to_first_tick_ms" in engine.startup:
+                first_tick_reported = True
+                print(f"First tick {engine.startup['time_to_first_tick_ms'] / 1000:.2f}s after launch")
+            if time.monotonic() - last_latency_dump >= args.latency_interval:
+                engine.latency.dump(args.latency_file)
+                fyers.dump(args.api_profile_file)
+                last_latency_dump = time.monotonic()
+            time.sleep(args.status_interval)
+    except KeyboardInterrupt:
+        print("Stopping bot")
+    finally:
+        write_status(engine, args.status_file)
+        engine.latency.dump(args.latency_file)
+        fyers.dump(args.api_profile_file)
+        engine.stop()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
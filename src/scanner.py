@@ -0,0 +1,271 @@
+"""
+Universe scanner: the triple-MA rule over a whole watchlist at once.
+
+Closes of every symbol live in one (symbols, bars) float64 matrix. Each scan
+computes the four moving averages with rolling_mean over the trailing window of
+all rows together, and the buy / sell crossover of the last closed bar with
+detect_signals, i.e. one vectorized pass per bar instead of a detect_signal
+call per symbol. 200 symbols x 500 bars scan in under a millisecond.
+
+History comes from /history through the CandleStore cache, so after the first
+run only the newest bars are downloaded:
+
+    scanner = UniverseScanner.from_history(fyers, watchlist, "5", 11, 23, 50, 89)
+    scanner.scan()                          # [ScanHit(symbol, signal, ..., score), ...], strongest first
+    scanner.append(latest_closes, ts)       # one closed bar for every symbol, then scan() again
+
+    python -m src.scanner --config src/config.py --watchlist fo_stocks.txt --top 20
+    python -m src.scanner --fake --symbols NSE:SBIN-EQ,NSE:TCS-EQ,NSE:INFY-EQ   # offline, FakeBroker
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from src.candle_store import DAILY_RESOLUTIONS, CandleStore
+from src.candles import NSE_SESSION, timeframe_seconds
+from src.trading_logic import detect_signals, rolling_mean
+
+SESSION_MINUTES = (NSE_SESSION[1] - NSE_SESSION[0]) // 60
+
+log = logging.getLogger("trading_bot.scanner")
+
+
+class ScanHit(NamedTuple):
+    symbol: str
+    signal: str                 # "buy" or "sell"
+    close: float
+    short_ma: float
+    medium_ma: float
+    long_ma: float
+    extra_long_ma: float
+    score: float                # short/long MA spread in the signal's direction, as a fraction of the long MA
+    ts: int = None              # open time of the bar that signalled
+
+
+def scan_closes(closes, short_window, medium_window, long_window, extra_long_window):
+    """
+    (signals, mas) of the last bar of every row of `closes` (symbols x bars):
+    signals is int8 (1 buy, -1 sell, 0 none) like detect_signals, mas a
+    (4, symbols) array of the short / medium / long / extra-long MAs. Only the
+    trailing window each MA needs is read; rows without enough history (or
+    with NaN in it) never signal.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    # the crossover needs the latest two values of each MA, i.e. its window + 1 latest closes
+    short_ma, medium_ma, long_ma = (rolling_mean(closes[:, -(w + 1):], w)[:, -2:]
+                                    for w in (short_window, medium_window, long_window))
+    signals = detect_signals(closes[:, -2:], short_ma, medium_ma, long_ma)[:, -1]
+    extra_long_ma = rolling_mean(closes[:, -extra_long_window:], extra_long_window)[:, -1]
+    return signals, np.stack([short_ma[:, -1], medium_ma[:, -1], long_ma[:, -1], extra_long_ma])
+
+
+def rank_hits(symbols, closes, signals, mas, ts=None):
+    """ScanHits of the signalling rows, strongest trend (score) first."""
+    rows = np.flatnonzero(signals)
+    if len(rows) == 0:
+        return []
+    last = closes[rows, -1]
+    short_ma, medium_ma, long_ma, extra_long_ma = mas[:, rows]
+    scores = signals[rows] * (short_ma - long_ma) / long_ma
+    order = np.argsort(-scores, kind="stable")
+    return [ScanHit(symbols[rows[i]], "buy" if signals[rows[i]] > 0 else "sell", float(last[i]),
+                    float(short_ma[i]), float(medium_ma[i]), float(long_ma[i]), float(extra_long_ma[i]),
+                    float(scores[i]), ts)
+            for i in order.tolist()]
+
+
+def history_days_for(resolution, bars):
+    """Calendar days of /history that hold at least `bars` bars of `resolution`, weekends and holidays included."""
+    per_day = 1 if str(resolution) in DAILY_RESOLUTIONS else max(SESSION_MINUTES * 60 // timeframe_seconds(resolution), 1)
+    trading_days = -(-int(bars) // per_day)
+    return trading_days * 7 // 5 + 10
+
+
+def load_closes(fyers, symbols, resolution, bars, store=None, now=None, max_workers=4):
+    """
+    (symbols, closes, last_ts) for the symbols whose history loaded: closes is a
+    (symbols, bars) matrix of their newest closes, right-aligned on the last
+    bar, with NaN in front of shorter histories. Symbols whose newest bar is
+    older than the universe's (suspended, illiquid) or whose /history request
+    failed are left out and logged.
+    """
+    store = store or CandleStore()
+    days = history_days_for(resolution, bars)
+
+    def fetch(symbol):
+        return store.history_days(fyers, symbol, resolution, days, now=now)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan-history") as pool:
+        responses = list(pool.map(fetch, symbols))
+
+    loaded = []
+    for symbol, response in zip(symbols, responses):
+        candles = response.get("candles") if response.get("s") == "ok" else None
+        if candles is None or len(candles) == 0:
+            log.warning({"event": "scan_history_failed", "symbol": symbol,
+                         "code": response.get("code"), "message": response.get("message")})
+            continue
+        loaded.append((symbol, np.asarray(candles, dtype=np.float64)))
+    if not loaded:
+        return [], np.empty((0, bars)), None
+
+    last_ts = max(int(candles[-1, 0]) for _, candles in loaded)
+    names, closes = [], np.full((len(loaded), bars), np.nan)
+    for symbol, candles in loaded:
+        if int(candles[-1, 0]) != last_ts:
+            log.warning({"event": "scan_stale_symbol", "symbol": symbol, "last_bar": int(candles[-1, 0]),
+                         "universe_last_bar": last_ts})
+            continue
+        tail = candles[-bars:, 4]
+        closes[len(names), bars - len(tail):] = tail
+        names.append(symbol)
+    return names, closes[:len(names)], last_ts
+
+
+class UniverseScanner:
+    """
+    Closes of a watchlist as a (symbols, capacity) matrix with the newest
+    `capacity` bars. Like RingBuffer, every column is written twice so the
+    newest bars are always one zero-copy column slice and append() never
+    reallocates.
+    """
+
+    def __init__(self, symbols, short_window, medium_window, long_window, extra_long_window, capacity=500):
+        self.symbols = list(symbols)
+        self.periods = (int(short_window), int(medium_window), int(long_window), int(extra_long_window))
+        self.capacity = max(int(capacity), max(self.periods) + 1)
+        self._data = np.full((len(self.symbols), 2 * self.capacity), np.nan)
+        self._head = 0
+        self._count = 0
+        self.last_ts = None
+
+    @classmethod
+    def from_history(cls, fyers, symbols, resolution, short_window, medium_window, long_window, extra_long_window,
+                     bars=500, store=None, now=None):
+        """Scanner seeded with the newest `bars` closes of every symbol (see load_closes)."""
+        names, closes, last_ts = load_closes(fyers, symbols, resolution, bars, store=store, now=now)
+        scanner = cls(names, short_window, medium_window, long_window, extra_long_window, capacity=bars)
+        scanner.load(closes, last_ts)
+        return scanner
+
+    def __len__(self):
+        return self._count
+
+    def load(self, closes, last_ts=None):
+        """Replace the matrix with `closes` (symbols x bars, oldest first); only the newest `capacity` bars are kept."""
+        closes = np.asarray(closes, dtype=np.float64)[:, -self.capacity:]
+        n = closes.shape[1]
+        self._data[:] = np.nan
+        self._data[:, self.capacity - n:self.capacity] = closes
+        self._data[:, 2 * self.capacity - n:] = closes
+        self._head = 0
+        self._count = n
+        self.last_ts = last_ts
+
+    def append(self, closes, ts=None):
+        """
+        Add one closed bar: `closes` has one value per symbol, in `symbols` order.
+        A NaN (no trade in the bar) carries the symbol's previous close forward.
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        if self._count:
+            previous = self._data[:, self._head + self.capacity - 1]
+            closes = np.where(np.isnan(closes), previous, closes)
+        head = self._head
+        self._data[:, head] = closes
+        self._data[:, head + self.capacity] = closes
+        self._head = head + 1 if head + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+        self.last_ts = ts
+
+    def closes(self):
+        """Read-only (symbols, len(self)) view of the closes, oldest bar first."""
+        end = self._head + self.capacity
+        view = self._data[:, end - self._count:end]
+        view.flags.writeable = False
+        return view
+
+    def scan(self):
+        """ScanHits of the symbols signalling on the last bar, strongest first."""
+        closes = self.closes()
+        if closes.shape[1] < 2:
+            return []
+        signals, mas = scan_closes(closes, *self.periods)
+        return rank_hits(self.symbols, closes, signals, mas, self.last_ts)
+
+
+def _read_watchlist(path):
+    with open(path) as f:
+        return [line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()]
+
+
+def _print_hits(hits, top, elapsed_ms, universe):
+    print(f"{len(hits)} of {universe} symbols signalling (scan {elapsed_ms:.2f} ms)")
+    for hit in hits[:top]:
+        print(f"  {hit.symbol:<24} {hit.signal:<4} close {hit.close:>10.2f}  short {hit.short_ma:>10.2f}  "
+              f"long {hit.long_ma:>10.2f}  score {hit.score:+.4f}")
+
+
+def main(argv=None):
+    from src.engine import load_config
+
+    parser = argparse.ArgumentParser(description="Scan a watchlist for triple-MA crossovers.")
+    parser.add_argument("--config", default=os.path.join("src", "config.py"))
+    parser.add_argument("--symbols", help="comma separated symbols (default: WATCHLIST in the config)")
+    parser.add_argument("--watchlist", help="file with one symbol per line ('#' starts a comment)")
+    parser.add_argument("--timeframe", help="bar resolution (default: TIMEFRAME in the config)")
+    parser.add_argument("--bars", type=int, default=500, help="bars of history per symbol (default 500)")
+    parser.add_argument("--top", type=int, default=20, help="signalling symbols to list (default 20)")
+    parser.add_argument("--follow", action="store_true", help="reload and rescan after every bar close")
+    parser.add_argument("--access-token", default=os.environ.get("FYERS_ACCESS_TOKEN"))
+    parser.add_argument("--fake", action="store_true", help="scan src.fake_broker's synthetic history instead")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config, timeframe=args.timeframe)
+    if args.watchlist:
+        symbols = _read_watchlist(args.watchlist)
+    elif args.symbols:
+        symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    else:
+        symbols = config.get("watchlist") or []
+    if not symbols:
+        parser.error("no symbols: pass --symbols or --watchlist, or set WATCHLIST in the config")
+
+    store = None
+    if args.fake:
+        from src.fake_broker import FakeBroker
+        import tempfile
+
+        fyers, cache = FakeBroker(), tempfile.TemporaryDirectory()
+        store = CandleStore(cache.name)
+    else:
+        if not args.access_token:
+            parser.error("an access token is required (--access-token or FYERS_ACCESS_TOKEN)")
+        from src.fyers_client import rest_client
+
+        fyers = rest_client(config["client_id"], args.access_token)
+
+    periods = (config["short_ma_period"], config["medium_ma_period"], config["long_ma_period"],
+               config["extra_long_ma_period"])
+    bucket = timeframe_seconds(config["timeframe"])
+    while True:
+        scanner = UniverseScanner.from_history(fyers, symbols, config["timeframe"], *periods,
+                                               bars=args.bars, store=store)
+        started = time.perf_counter()
+        hits = scanner.scan()
+        _print_hits(hits, args.top, (time.perf_counter() - started) * 1000, len(scanner.symbols))
+        if not args.follow:
+            return 0
+        # the CandleStore cache means each reload only downloads the newest bars
+        time.sleep(bucket - time.time() % bucket + 1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
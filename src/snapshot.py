@@ -0,0 +1,52 @@
+"""
+Crash-safe engine snapshots for warm restarts.
+
+A snapshot is one uncompressed .npz file: float64 (n, 6) candle arrays (closed
+bars plus the forming one, per ticker and timeframe) and a small JSON document
+(positions, trades, counters) stored as a uint8 array, so loading never
+unpickles anything. It is written to a temporary file, fsynced, and renamed over
+the previous snapshot, so a crash mid-write leaves the old snapshot intact.
+
+    write_snapshot("data/engine_snapshot.npz", {"tickers": [...]}, {"c0": candles})
+    meta, arrays = read_snapshot("data/engine_snapshot.npz")
+"""
+import json
+import logging
+import os
+import zipfile
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_FILE = os.path.join("data", "engine_snapshot.npz")
+
+log = logging.getLogger("trading_bot.snapshot")
+
+
+def write_snapshot(path, meta, arrays):
+    """Atomically replace `path` with `meta` (JSON-serialisable) and named arrays."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    document = json.dumps(dict(meta, version=SNAPSHOT_VERSION), default=str).encode()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, meta=np.frombuffer(document, dtype=np.uint8), **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_snapshot(path):
+    """(meta, {name: array}) from a snapshot file, or None if it is missing, unreadable or of another version."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data["meta"].tobytes())
+            arrays = {name: data[name] for name in data.files if name != "meta"}
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        log.warning({"event": "snapshot_unreadable", "path": path, "error": str(e)})
+        return None
+    if meta.get("version") != SNAPSHOT_VERSION:
+        log.warning({"event": "snapshot_version", "path": path, "version": meta.get("version")})
+        return None
+    return meta, arrays
@@ -0,0 +1,228 @@
+"""
+Strategy plug-ins and the indicator registry they share.
+
+Every strategy on a symbol reads its indicators from one IndicatorRegistry,
+where each (kind, window, timeframe) exists once and is updated once per closed
+bar, however many strategies ask for it. A strategy that only uses windows other
+strategies already requested adds no indicator work at all.
+
+    @register_strategy("breakout")
+    class Breakout(Strategy):
+        def bind(self, indicators):
+            self.high = indicators.get("sma", 20, self.timeframe)
+        def signal(self, close):
+            ...
+
+    strategies = build_strategies([{"type": "triple_ma"}, {"type": "breakout", "timeframe": "5"}])
+
+Strategies are configured as plain dicts ({"type": ..., "name": ..., plus the
+strategy's own parameters}) so they can live in src/config.py.
+"""
+from src.trading_logic import RollingEMA, RollingMA, RollingVWAP, check_stop_loss, detect_signal
+
+# kind -> (class, positions of its update() arguments in a (ts, o, h, l, c, v) bar)
+INDICATORS = {
+    "sma": (RollingMA, (4,)),
+    "ema": (RollingEMA, (4,)),
+    "vwap": (RollingVWAP, (4, 5)),
+}
+
+STRATEGY_TYPES = {}
+
+
+class IndicatorRegistry:
+    """
+    Indicators of one symbol keyed by (kind, window, timeframe). get() creates
+    an indicator on first request, seeded from the closed bars of `candles` (a
+    CandleAggregator) when given; update() feeds a closed bar to every indicator
+    of its timeframe. `closes` holds the last closed price per timeframe.
+    """
+
+    def __init__(self, candles=None):
+        self.candles = candles
+        self.closes = {}
+        self._indicators = {}
+        self._by_timeframe = {}    # timeframe -> [(indicator, argument positions), ...]
+        if candles is not None:
+            for timeframe, builder in candles.builders.items():
+                if len(builder.bars):
+                    self.closes[timeframe] = float(builder.bars[-1]["close"])
+
+    def __len__(self):
+        return len(self._indicators)
+
+    def __contains__(self, key):
+        kind, window, timeframe = key
+        return (kind, int(window), str(timeframe)) in self._indicators
+
+    def get(self, kind, window, timeframe):
+        key = (kind, int(window), str(timeframe))
+        indicator = self._indicators.get(key)
+        if indicator is not None:
+            return indicator
+        try:
+            cls, inputs = INDICATORS[kind]
+        except KeyError:
+            raise ValueError(f"unknown indicator {kind!r}; expected one of {', '.join(INDICATORS)}") from None
+        indicator = cls(window)
+        if self.candles is not None and key[2] in self.candles.builders:
+            bars = self.candles[key[2]].bars.last()
+            columns = [bars[name] for name in ("ts", "open", "high", "low", "close", "volume")]
+            for row in zip(*(columns[i] for i in inputs)):
+                indicator.update(*row)
+        self._indicators[key] = indicator
+        self._by_timeframe.setdefault(key[2], []).append((indicator, inputs))
+        return indicator
+
+    def update(self, timeframe, bar):
+        """Feed one closed (ts, o, h, l, c, v) bar of `timeframe` to its indicators."""
+        self.closes[timeframe] = bar[4]
+        for indicator, inputs in self._by_timeframe.get(timeframe, ()):
+            if len(inputs) == 1:
+                indicator.update(bar[inputs[0]])
+            else:
+                indicator.update(*[bar[i] for i in inputs])
+
+
+class Strategy:
+    """
+    Plug-in interface. bind() requests the indicators the strategy reads from an
+    IndicatorRegistry and is called again whenever the registry is rebuilt.
+    signal(close) gets the last closed price of the strategy's timeframe and
+    returns "buy", "sell" or None; should_exit(price, direction) gets the live
+    price for each open position the strategy entered. Both run on every tick
+    under the shard lock, so they should only read their indicators.
+    """
+
+    type = None
+
+    def __init__(self, name=None, timeframe="1"):
+        self.name = name or self.type
+        self.timeframe = str(timeframe)
+
+    def bind(self, indicators):
+        raise NotImplementedError
+
+    def signal(self, close):
+        return None
+
+    def should_exit(self, price, direction):
+        return False
+
+
+def register_strategy(type_name):
+    """Class decorator making a Strategy available to build_strategies() as {"type": type_name}."""
+    def register(cls):
+        cls.type = type_name
+        STRATEGY_TYPES[type_name] = cls
+        return cls
+    return register
+
+
+def build_strategies(specs, **defaults):
+    """
+    Strategy instances from config dicts. `defaults` (e.g. timeframe) fill in
+    parameters a spec leaves out. Names must be unique per symbol.
+    """
+    strategies = []
+    for spec in specs:
+        params = dict(spec)
+        type_name = params.pop("type", None)
+        if type_name not in STRATEGY_TYPES:
+            raise ValueError(f"unknown strategy type {type_name!r}; expected one of {', '.join(STRATEGY_TYPES)}")
+        cls = STRATEGY_TYPES[type_name]
+        strategies.append(cls(**{**{k: v for k, v in defaults.items() if k not in params}, **params}))
+    names = [strategy.name for strategy in strategies]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate strategy names: {', '.join(duplicates)}")
+    return strategies
+
+
+@register_strategy("triple_ma")
+class TripleMA(Strategy):
+    """
+    The original rule: price above short > medium > long MAs right after a
+    short/medium crossover buys (mirrored for sell); a position is stopped when
+    price crosses the long MA. Exposes short/medium/long/extra_long so
+    detect_signal() and check_stop_loss() read it like an IndicatorState.
+    """
+
+    def __init__(self, short=11, medium=23, long=50, extra_long=89, name=None, timeframe="1"):
+        super().__init__(name, timeframe)
+        self.windows = (int(short), int(medium), int(long), int(extra_long))
+
+    def bind(self, indicators):
+        self.short, self.medium, self.long, self.extra_long = (
+            indicators.get("sma", window, self.timeframe) for window in self.windows)
+
+    def signal(self, close):
+        return detect_signal(close, self)
+
+    def should_exit(self, price, direction):
+        return check_stop_loss(price, self, direction)
+
+
+@register_strategy("mean_reversion")
+class MeanReversion(Strategy):
+    """
+    Fades stretches away from a long MA: buys when the close drops more than
+    `band` (a fraction) below it, sells when it rises more than `band` above.
+    Exits once price is back at the MA, or at a stop `stop` beyond it.
+    """
+
+    def __init__(self, window=89, band=0.01, stop=0.02, name=None, timeframe="1"):
+        super().__init__(name, timeframe)
+        self.window = int(window)
+        self.band = float(band)
+        self.stop = float(stop)
+
+    def bind(self, indicators):
+        self.mean = indicators.get("sma", self.window, self.timeframe)
+
+    def signal(self, close):
+        mean = self.mean.value
+        if close < mean * (1 - self.band):
+            return "buy"
+        if close > mean * (1 + self.band):
+            return "sell"
+        return None
+
+    def should_exit(self, price, direction):
+        mean = self.mean.value
+        if direction == "buy":
+            return price >= mean or price <= mean * (1 - self.stop)
+        return price <= mean or price >= mean * (1 + self.stop)
+
+
+@register_strategy("filtered")
+class Filtered(Strategy):
+    """
+    Another strategy's entries, kept only on the right side of a trend filter:
+    buys need the close above the filter (an EMA or VWAP, say), sells below it.
+    No entries while the filter has no value yet. Exits are the inner strategy's.
+
+        {"type": "filtered", "name": "ma_above_vwap", "strategy": {"type": "triple_ma"},
+         "filter": "vwap", "window": 20}
+    """
+
+    def __init__(self, strategy, filter="ema", window=200, name=None, timeframe="1"):
+        self.inner = build_strategies([strategy], timeframe=timeframe)[0]
+        super().__init__(name or f"{self.inner.name}_{filter}{int(window)}", timeframe)
+        self.filter_kind = filter
+        self.window = int(window)
+
+    def bind(self, indicators):
+        self.inner.bind(indicators)
+        self.filter = indicators.get(self.filter_kind, self.window, self.timeframe)
+
+    def signal(self, close):
+        signal = self.inner.signal(close)
+        if signal == "buy" and close > self.filter.value:
+            return signal
+        if signal == "sell" and close < self.filter.value:
+            return signal
+        return None
+
+    def should_exit(self, price, direction):
+        return self.inner.should_exit(price, direction)
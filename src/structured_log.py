@@ -0,0 +1,108 @@
+"""
+Asynchronous JSON-lines logging for the bot, in the same record format the
+Fyers SDK writes to fyersApi.log:
+
+    {"level": "INFO", "location": "[on_message:212] engine", "message": {...},
+     "timestamp": "2026-01-02 10:25:53,048+0530", "service": "TradingEngine"}
+
+Loggers under "trading_bot" hand records to a bounded queue; a listener thread
+formats and writes them. Nothing is formatted on the calling thread, and when
+the queue is full, DEBUG and INFO records are dropped (and counted) instead of
+blocking the WebSocket thread. Warnings and errors still wait for space.
+"""
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import traceback
+
+ROOT_LOGGER = "trading_bot"
+DEFAULT_LOG_FILE = os.path.join("data", "trading_bot.log")
+
+_listener = None
+_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """fyers*.log-compatible JSON line; dict messages are kept as JSON objects."""
+
+    def __init__(self, service="TradingEngine"):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        message = record.msg if isinstance(record.msg, dict) and not record.args else record.getMessage()
+        timestamp = datetime.datetime.fromtimestamp(record.created).astimezone()
+        entry = {
+            "level": record.levelname,
+            "location": f"[{record.funcName}:{record.lineno}] {record.module}",
+            "message": message,
+            "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S,") + f"{int(record.msecs):03d}" + timestamp.strftime("%z"),
+            "service": self.service,
+        }
+        if record.exc_info:
+            entry["exception"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            entry["exception_name"] = record.exc_info[0].__name__
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread and, on a full
+    queue, drops records below WARNING instead of blocking.
+    """
+
+    def __init__(self, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+
+    def prepare(self, record):
+        # the listener formats; callers must not mutate objects they passed in a record
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.WARNING:
+                self.dropped += 1
+            else:
+                self.queue.put(record)
+
+
+def setup_logging(path=DEFAULT_LOG_FILE, level="INFO", queue_size=10000, service="TradingEngine"):
+    """
+    Route the "trading_bot" loggers through a background writer to `path` (JSON
+    lines). Safe to call again, e.g. on a Streamlit rerun: only the level changes.
+    Returns the queue handler, whose `dropped` counts discarded records.
+    """
+    global _listener, _handler
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    if _listener is not None:
+        return _handler
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    file_handler = logging.FileHandler(path, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter(service))
+    _handler = DroppingQueueHandler(queue_size)
+    root.addHandler(_handler)
+    root.propagate = False
+    _listener = logging.handlers.QueueListener(_handler.queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    return _handler
+
+
+def shutdown_logging():
+    """Write out everything still queued and stop the writer thread."""
+    global _listener, _handler
+    if _listener is None:
+        return
+    root = logging.getLogger(ROOT_LOGGER)
+    _listener.stop()
+    root.removeHandler(_handler)
+    for handler in _listener.handlers:
+        handler.close()
+    root.propagate = True
+    _listener = _handler = None
@@ -0,0 +1,176 @@
+"""
+Parameter sweep over MA periods and timeframes using the vectorized backtester.
+
+Candles for each timeframe are copied once into multiprocessing shared memory;
+workers attach to those blocks instead of receiving pickled arrays with every
+task. Each worker caches rolling means per (timeframe, window), so a window
+length shared by many combinations is only computed once per process. Since the
+extra-long MA does not drive entries or exits, combinations that differ only in
+extra_long are evaluated once and the result is reused.
+
+    python -m src.sweep --candles 5=nifty_5m.json --candles 15=nifty_15m.json \
+        --short 5:20:2 --medium 15:40:4 --long 40:100:10 --extra-long 89 --out sweep.csv
+"""
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.backtest import candles_to_arrays, simulate, summarize
+from src.trading_logic import rolling_mean
+
+# metrics where a smaller value is better; everything else ranks highest first
+LOWER_IS_BETTER = frozenset({"max_drawdown"})
+
+RESULT_COLUMNS = ["timeframe", "short", "medium", "long", "extra_long",
+                  "pnl", "num_trades", "win_rate", "max_drawdown"]
+
+# per-process state, filled in by _init_worker
+_bars = {}
+_ma_cache = {}
+_shm_handles = []
+
+
+def param_grid(short, medium, long, extra_long, timeframes):
+    """All (timeframe, short, medium, long, extra_long) with short < medium < long."""
+    return [
+        (str(tf), int(s), int(m), int(l), int(x))
+        for tf, s, m, l, x in itertools.product(timeframes, short, medium, long, extra_long)
+        if s < m < l
+    ]
+
+
+def _init_worker(shm_specs):
+    _bars.clear()
+    _ma_cache.clear()
+    for tf, (name, shape) in shm_specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _shm_handles.append(shm)
+        _bars[tf] = candles_to_arrays(np.ndarray(shape, dtype=np.float64, buffer=shm.buf))
+
+
+def _ma(tf, window):
+    key = (tf, window)
+    if key not in _ma_cache:
+        _ma_cache[key] = rolling_mean(_bars[tf]["close"], window)
+    return _ma_cache[key]
+
+
+def _run_chunk(args):
+    combos, max_trades, quantity = args
+    rows = []
+    for tf, s, m, l in combos:
+        sim = simulate(_bars[tf], _ma(tf, s), _ma(tf, m), _ma(tf, l), max_trades, quantity)
+        rows.append((tf, s, m, l, summarize(sim)))
+    return rows
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def run_sweep(candles_by_timeframe, grid, max_trades=10, quantity=1, processes=None,
+              chunk_size=200, sort_by="pnl"):
+    """
+    Backtest every combination in `grid` (see param_grid) and return a DataFrame
+    ranked by `sort_by`, best first. `candles_by_timeframe` maps timeframe -> Fyers
+    candles. processes=1 runs in-process, which is handy for small grids and tests.
+    """
+    grid = [tuple(g) for g in grid]
+    core = sorted({(tf, s, m, l) for tf, s, m, l, _ in grid})
+    missing = {tf for tf, *_ in core} - set(map(str, candles_by_timeframe))
+    if missing:
+        raise ValueError(f"no candles for timeframe(s): {sorted(missing)}")
+
+    blocks = []
+    specs = {}
+    try:
+        for tf, candles in candles_by_timeframe.items():
+            arr = np.ascontiguousarray(np.asarray(candles, dtype=np.float64).reshape(-1, 6))
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=np.float64, buffer=shm.buf)[:] = arr
+            blocks.append(shm)
+            specs[str(tf)] = (shm.name, arr.shape)
+
+        # keep each timeframe's combos together so worker MA caches get hits
+        tasks = [(chunk, max_trades, quantity) for chunk in _chunks(core, chunk_size)]
+        if processes == 1:
+            _init_worker(specs)
+            results = [_run_chunk(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(specs,)) as pool:
+                results = list(pool.map(_run_chunk, tasks))
+    finally:
+        _bars.clear()
+        _ma_cache.clear()
+        for shm in _shm_handles + blocks:
+            shm.close()
+        _shm_handles.clear()
+        for shm in blocks:
+            shm.unlink()
+
+    stats = {(tf, s, m, l): summary for chunk in results for tf, s, m, l, summary in chunk}
+    rows = [
+        {"timeframe": tf, "short": s, "medium": m, "long": l, "extra_long": x, **stats[(tf, s, m, l)]}
+        for tf, s, m, l, x in grid
+    ]
+    table = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    ascending = sort_by in LOWER_IS_BETTER
+    return table.sort_values(sort_by, ascending=ascending, kind="stable").reset_index(drop=True)
+
+
+def _parse_range(text):
+    """'11' -> [11], '5,8,13' -> [5, 8, 13], '5:20:5' -> [5, 10, 15, 20] (inclusive)."""
+    if ":" in text:
+        parts = [int(p) for p in text.split(":")]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1
+        return list(range(start, stop + 1, step))
+    return [int(p) for p in text.split(",")]
+
+
+def _load_candles(path):
+    if path.endswith(".npy"):
+        return np.load(path)
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("candles", []) if isinstance(data, dict) else data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep MA periods / timeframes over historical candles.")
+    parser.add_argument("--candles", action="append", required=True, metavar="TF=PATH",
+                        help="timeframe and a /history JSON response or .npy candle array")
+    parser.add_argument("--short", default="11")
+    parser.add_argument("--medium", default="23")
+    parser.add_argument("--long", default="50")
+    parser.add_argument("--extra-long", default="89")
+    parser.add_argument("--max-trades", type=int, default=10)
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="write the full ranked table to this CSV")
+    args = parser.parse_args(argv)
+
+    candles = {}
+    for item in args.candles:
+        tf, path = item.split("=", 1)
+        candles[tf] = _load_candles(path)
+
+    grid = param_grid(_parse_range(args.short), _parse_range(args.medium), _parse_range(args.long),
+                      _parse_range(args.extra_long), list(candles))
+    table = run_sweep(candles, grid, args.max_trades, args.quantity, args.processes)
+    if args.out:
+        table.to_csv(args.out, index=False)
+    print(table.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Raw tick log: every SymbolUpdate message written to an append-only file of
+fixed-width binary records, and a replay driver that feeds a log back through
+an on_message callback.
+
+The file is a 16-byte header (magic, record count) followed by TICK_DTYPE
+records. It is grown in chunks and written through a memory map, so recording a
+tick is one struct.pack_into of the record's bytes. The count in the header is bumped
+after each record, which means a log cut short by a crash still reads back
+cleanly up to the last complete tick.
+
+    recorder = TickRecorder("data/ticks/2026-01-02.ticks")
+    recorder.record(msg)                     # in the WebSocket callback
+    replay_ticks("data/ticks/2026-01-02.ticks", engine.on_message, speed=None)
+"""
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"FYTICK01"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("count", "<u8")])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+# numeric SymbolUpdate fields, in the order the Fyers data socket documents them
+FLOAT_FIELDS = ("ltp", "bid_price", "ask_price", "avg_trade_price", "low_price", "high_price",
+                "Yhigh", "Ylow", "lower_ckt", "upper_ckt", "open_price", "prev_close_price")
+INT_FIELDS = ("vol_traded_today", "last_traded_time", "exch_feed_time", "bid_size", "ask_size",
+              "last_traded_qty", "tot_buy_qty", "tot_sell_qty", "OI")
+FIELDS = FLOAT_FIELDS + INT_FIELDS
+
+TICK_DTYPE = np.dtype(
+    [("recv_ns", "<i8"), ("present", "<u4"), ("type", "S4"), ("symbol", "S40")]
+    + [(name, "<f8") for name in FLOAT_FIELDS]
+    + [(name, "<i8") for name in INT_FIELDS]
+)
+
+# TICK_DTYPE is packed (no alignment padding), so this struct writes identical bytes
+_RECORD = struct.Struct("<qI4s40s" + "d" * len(FLOAT_FIELDS) + "q" * len(INT_FIELDS))
+_COUNT = struct.Struct("<Q")
+assert _RECORD.size == TICK_DTYPE.itemsize
+
+# bit i of `present` is set when FIELDS[i] was in the message, so replay can
+# rebuild index ticks (which carry fewer fields) exactly
+_FIELD_BITS = [(name, 1 << i) for i, name in enumerate(FIELDS)]
+_SLOTS = {name: (i, 1 << i) for i, name in enumerate(FIELDS)}
+_ZEROS = [0] * len(FIELDS)
+
+
+class TickRecorder:
+    """
+    Appends ticks to `path` (created if missing, continued if it already holds a
+    log). Single writer: call record() from one thread only, as the WebSocket
+    callback does.
+    """
+
+    def __init__(self, path, chunk_records=1 << 16):
+        self.path = path
+        self.chunk_records = chunk_records
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._map_capacity(chunk_records)
+            self._map[:len(MAGIC)] = MAGIC
+            _COUNT.pack_into(self._map, len(MAGIC), 0)
+        else:
+            self._map_capacity((size - HEADER_SIZE) // TICK_DTYPE.itemsize)
+            if self._map[:len(MAGIC)] != MAGIC:
+                self._map.close()
+                self._file.close()
+                raise ValueError(f"{path} is not a tick log")
+        self.count = _COUNT.unpack_from(self._map, len(MAGIC))[0]
+
+    def _map_capacity(self, capacity):
+        self._file.truncate(HEADER_SIZE + capacity * TICK_DTYPE.itemsize)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def record(self, msg, recv_ns=None):
+        """Append one data-socket message; control messages without an ltp are skipped."""
+        if msg.get("ltp") is None:
+            return
+        if self.count == self.capacity:
+            self._map.flush()
+            self._map.close()
+            self._map_capacity(self.capacity + self.chunk_records)
+        values = _ZEROS.copy()
+        present = 0
+        for name, value in msg.items():
+            slot = _SLOTS.get(name)
+            if slot is not None and value is not None:
+                values[slot[0]] = value
+                present |= slot[1]
+        head = (time.time_ns() if recv_ns is None else recv_ns, present,
+                str(msg.get("type", "")).encode(), str(msg.get("symbol", "")).encode())
+        offset = HEADER_SIZE + self.count * _RECORD.size
+        try:
+            _RECORD.pack_into(self._map, offset, *head, *values)
+        except struct.error:
+            # e.g. a volume sent as 1.0e5; coerce only on this rare path
+            values = [float(v) for v in values[:len(FLOAT_FIELDS)]] + [int(v) for v in values[len(FLOAT_FIELDS):]]
+            _RECORD.pack_into(self._map, offset, *head, *values)
+        self.count += 1
+        _COUNT.pack_into(self._map, len(MAGIC), self.count)
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        """Flush and trim the unused tail of the last chunk."""
+        if self._file.closed:
+            return
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(HEADER_SIZE + self.count * TICK_DTYPE.itemsize)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_ticks(path):
+    """Recorded ticks as a read-only memory-mapped TICK_DTYPE array."""
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header[0]["magic"] != MAGIC:
+        raise ValueError(f"{path} is not a tick log")
+    count = int(header[0]["count"])
+    if count == 0:
+        return np.empty(0, dtype=TICK_DTYPE)
+    return np.memmap(path, dtype=TICK_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def to_message(row):
+    """Rebuild the data-socket message dict from a recorded row."""
+    present = int(row["present"])
+    msg = {name: row[name].item() for name, bit in _FIELD_BITS if present & bit}
+    msg["type"] = row["type"].decode()
+    msg["symbol"] = row["symbol"].decode()
+    return msg
+
+
+def replay_ticks(path, on_message, speed=None, sleep=time.sleep, clock=time.monotonic):
+    """
+    Feed a recorded log through on_message(msg). speed=None replays as fast as
+    possible; speed=1.0 keeps the recorded inter-arrival times, 10.0 runs ten
+    times faster. Returns the number of ticks delivered.
+    """
+    ticks = load_ticks(path)
+    if len(ticks) == 0:
+        return 0
+    first_ns = int(ticks[0]["recv_ns"])
+    started = clock()
+    for row in ticks:
+        if speed:
+            wait = (int(row["recv_ns"]) - first_ns) / 1e9 / speed - (clock() - started)
+            if wait > 0:
+                sleep(wait)
+        on_message(to_message(row))
+    return len(ticks)
@@ -0,0 +1,137 @@
+"""
+Encrypted on-disk cache of the Fyers access token.
+
+A restart during the trading day reuses the saved token instead of sending the
+user through the browser auth-code round trip again. The token is only ever
+stored encrypted and authenticated: the key is derived from the app's secret key
+and a random key file created next to the store (mode 0600), so neither the
+store, nor the key file, nor the secret alone is enough to read it. The cipher is
+HMAC-SHA256 in counter mode with an encrypt-then-MAC tag, built from the
+standard library so no new dependency is needed.
+
+A saved token is dropped once it expires: at the `exp` claim of the token (Fyers
+access tokens are JWTs), or at the next IST midnight when it has none.
+
+    save_token(token, client_id, secret_key)
+    token = load_token(client_id, secret_key)     # None: missing, expired, wrong app or secret, or tampered with
+"""
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import struct
+import time
+
+DEFAULT_TOKEN_FILE = os.path.join("data", "access_token.enc")
+
+MAGIC = b"FTK1"
+NONCE_SIZE = 16
+TAG_SIZE = 32
+# treat a token as expired this long before it does, so it does not lapse mid-startup
+EXPIRY_MARGIN = 60
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+log = logging.getLogger("trading_bot.token_store")
+
+
+def key_path(path):
+    return path + ".key"
+
+
+def token_expiry(token, now=None):
+    """Epoch seconds at which `token` expires: its JWT `exp`, else the next IST midnight."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, ValueError, KeyError, TypeError):
+        pass
+    today = datetime.datetime.fromtimestamp(time.time() if now is None else now, IST).date()
+    midnight = datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time(), IST)
+    return midnight.timestamp()
+
+
+def _keys(path, secret_key, create):
+    """(encryption key, MAC key) from the key file and the app secret; None if there is no key file."""
+    try:
+        with open(key_path(path), "rb") as f:
+            machine_key = f.read()
+    except FileNotFoundError:
+        if not create:
+            return None
+        machine_key = secrets.token_bytes(32)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd = os.open(key_path(path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(machine_key)
+    master = hmac.new(machine_key, secret_key.encode(), hashlib.sha256).digest()
+    return (hmac.new(master, b"encrypt", hashlib.sha256).digest(),
+            hmac.new(master, b"authenticate", hashlib.sha256).digest())
+
+
+def _keystream_xor(key, nonce, data):
+    out = bytearray(len(data))
+    for block, start in enumerate(range(0, len(data), 32)):
+        pad = hmac.new(key, nonce + struct.pack(">Q", block), hashlib.sha256).digest()
+        chunk = data[start:start + 32]
+        out[start:start + len(chunk)] = bytes(a ^ b for a, b in zip(chunk, pad))
+    return bytes(out)
+
+
+def save_token(token, client_id, secret_key, path=DEFAULT_TOKEN_FILE, expires_at=None):
+    """Encrypt and atomically write `token` for `client_id`; expires_at defaults to token_expiry()."""
+    enc_key, mac_key = _keys(path, secret_key, create=True)
+    document = json.dumps({"client_id": client_id, "token": token,
+                           "expires_at": token_expiry(token) if expires_at is None else expires_at}).encode()
+    nonce = secrets.token_bytes(NONCE_SIZE)
+    body = MAGIC + nonce + _keystream_xor(enc_key, nonce, document)
+    tmp = path + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(body + hmac.new(mac_key, body, hashlib.sha256).digest())
+    os.replace(tmp, path)
+
+
+def load_token(client_id, secret_key, path=DEFAULT_TOKEN_FILE, now=None):
+    """
+    The saved token for `client_id`, or None if there is none, it has expired,
+    or the file cannot be authenticated with `secret_key` (other secret, tampering).
+    Expired stores and ones that are not a token store at all (unknown format
+    or version, no key file) are removed. A store that fails authentication is
+    kept: a mistyped secret must not cost the token saved with the right one.
+    """
+    try:
+        with open(path, "rb") as f:
+            blob = f.read()
+    except FileNotFoundError:
+        return None
+    keys = _keys(path, secret_key, create=False)
+    body, tag = blob[:-TAG_SIZE], blob[-TAG_SIZE:]
+    if keys is None or not body.startswith(MAGIC) or len(body) < len(MAGIC) + NONCE_SIZE:
+        log.warning({"event": "token_store_unreadable", "path": path})
+        clear_token(path)
+        return None
+    if not hmac.compare_digest(tag, hmac.new(keys[1], body, hashlib.sha256).digest()):
+        log.warning({"event": "token_store_unauthenticated", "path": path})
+        return None
+    nonce = body[len(MAGIC):len(MAGIC) + NONCE_SIZE]
+    saved = json.loads(_keystream_xor(keys[0], nonce, body[len(MAGIC) + NONCE_SIZE:]))
+    if saved["client_id"] != client_id:
+        return None
+    if (time.time() if now is None else now) >= saved["expires_at"] - EXPIRY_MARGIN:
+        log.info({"event": "token_expired", "path": path, "expires_at": saved["expires_at"]})
+        clear_token(path)
+        return None
+    return saved["token"]
+
+
+def clear_token(path=DEFAULT_TOKEN_FILE):
+    """Forget the saved token (the key file stays, for the next save)."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
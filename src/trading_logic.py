@@ -1,7 +1,11 @@
-import pandas as pd
+import math
+
 import numpy as np
 
 def calculate_moving_averages(prices, short_window, medium_window, long_window,extra_long_window):
+    # pandas is only needed here, off the live path; importing it lazily keeps engine startup fast
+    import pandas as pd
+
     prices_series = pd.Series(prices)
     short_ma = prices_series.rolling(window=short_window).mean()
     medium_ma = prices_series.rolling(window=medium_window).mean()
@@ -9,14 +13,164 @@ def calculate_moving_averages(prices, short_window, medium_window, long_window,e
     extra_long_ma = prices_series.rolling(window=extra_long_window).mean()
     return short_ma, medium_ma, long_ma, extra_long_ma
 
-def detect_signal(prices, short_ma, medium_ma, long_ma):
-    latest_price = prices[-1]
-    latest_short_ma = short_ma.iloc[-1]
-    latest_medium_ma = medium_ma.iloc[-1]
-    latest_long_ma = long_ma.iloc[-1]
+def rolling_mean(values, window):
+    """
+    Vectorized simple moving average along the last axis (works for 1-D and 2-D input).
+    Leading positions without a full window are NaN, same as calculate_moving_averages.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    window = int(window)
+    out = np.full(values.shape, np.nan)
+    n = values.shape[-1]
+    if window < 1 or window > n:
+        return out
+    # centre on the first value so the cumulative sum stays small and precise
+    csum = np.cumsum(values - values[..., :1], axis=-1)
+    out[..., window - 1] = csum[..., window - 1]
+    out[..., window:] = csum[..., window:] - csum[..., :-window]
+    out[..., window - 1:] /= window
+    out[..., window - 1:] += values[..., :1]
+    return out
+
+
+class RollingMA:
+    """
+    Simple moving average over the last `window` candle closes.
+    update() is O(1): it keeps a running sum over a fixed-size circular window
+    instead of recomputing the mean. `value` / `previous` are NaN until the
+    window is full, same as pandas' rolling().mean().
+    """
+
+    def __init__(self, window):
+        self.window = int(window)
+        if self.window < 1:
+            raise ValueError(f"window must be >= 1, got {window}")
+        self._values = [0.0] * self.window
+        self._idx = 0
+        self._count = 0
+        self._total = 0.0
+        self.value = math.nan
+        self.previous = math.nan
+
+    def update(self, price):
+        price = float(price)
+        if self._count == self.window:
+            self._total -= self._values[self._idx]
+        else:
+            self._count += 1
+        self._values[self._idx] = price
+        self._total += price
+        self._idx += 1
+        if self._idx == self.window:
+            self._idx = 0
+            # re-sum exactly once per full cycle so float drift can't accumulate
+            self._total = math.fsum(self._values[:self._count])
+
+        self.previous = self.value
+        self.value = self._total / self.window if self._count == self.window else math.nan
+        return self.value
+
+
+class RollingEMA:
+    """
+    Exponential moving average with alpha = 2 / (window + 1), started from the
+    simple average of the first `window` closes. NaN until then, like RollingMA.
+    """
+
+    def __init__(self, window):
+        self.window = int(window)
+        if self.window < 1:
+            raise ValueError(f"window must be >= 1, got {window}")
+        self._alpha = 2.0 / (self.window + 1)
+        self._count = 0
+        self._total = 0.0
+        self.value = math.nan
+        self.previous = math.nan
+
+    def update(self, price):
+        price = float(price)
+        self.previous = self.value
+        if self._count < self.window:
+            self._count += 1
+            self._total += price
+            if self._count == self.window:
+                self.value = self._total / self.window
+        else:
+            self.value += self._alpha * (price - self.value)
+        return self.value
+
 
-    previous_short_ma = short_ma.iloc[-2]
-    previous_medium_ma = medium_ma.iloc[-2]
+class RollingVWAP:
+    """
+    Volume-weighted average close over the last `window` candles. NaN until the
+    window is full, and while it holds no volume (index feeds carry none).
+    """
+
+    def __init__(self, window):
+        self.window = int(window)
+        if self.window < 1:
+            raise ValueError(f"window must be >= 1, got {window}")
+        self._turnover = [0.0] * self.window
+        self._volume = [0.0] * self.window
+        self._idx = 0
+        self._count = 0
+        self.value = math.nan
+        self.previous = math.nan
+
+    def update(self, price, volume):
+        self._turnover[self._idx] = float(price) * float(volume)
+        self._volume[self._idx] = float(volume)
+        self._idx = self._idx + 1 if self._idx + 1 < self.window else 0
+        if self._count < self.window:
+            self._count += 1
+        self.previous = self.value
+        # windows are short; an exact re-sum avoids drift without a running total
+        volume = math.fsum(self._volume)
+        if self._count == self.window and volume > 0:
+            self.value = math.fsum(self._turnover) / volume
+        else:
+            self.value = math.nan
+        return self.value
+
+
+class IndicatorState:
+    """
+    Stateful short / medium / long / extra-long moving averages.
+    Call update() once per closed candle; detect_signal() and check_stop_loss()
+    read the current and previous values from here.
+    """
+
+    def __init__(self, short_window, medium_window, long_window, extra_long_window):
+        self.short = RollingMA(short_window)
+        self.medium = RollingMA(medium_window)
+        self.long = RollingMA(long_window)
+        self.extra_long = RollingMA(extra_long_window)
+        self.last_price = None
+
+    @property
+    def periods(self):
+        return (self.short.window, self.medium.window, self.long.window, self.extra_long.window)
+
+    def update(self, price):
+        price = float(price)
+        self.short.update(price)
+        self.medium.update(price)
+        self.long.update(price)
+        self.extra_long.update(price)
+        self.last_price = price
+
+    def seed(self, prices):
+        for price in prices:
+            self.update(price)
+        return self
+
+def detect_signal(latest_price, indicators):
+    latest_short_ma = indicators.short.value
+    latest_medium_ma = indicators.medium.value
+    latest_long_ma = indicators.long.value
+
+    previous_short_ma = indicators.short.previous
+    previous_medium_ma = indicators.medium.previous
 
     if (latest_price > latest_short_ma and
         latest_price > latest_medium_ma and
@@ -33,11 +187,31 @@ def detect_signal(prices, short_ma, medium_ma, long_ma):
     else:
         return None
 
-def check_stop_loss(current_price, long_ma, side):
-    latest_long_ma = long_ma.iloc[-1]
+def check_stop_loss(current_price, indicators, side):
+    latest_long_ma = indicators.long.value
     if side == "buy" and current_price <= latest_long_ma:
         return True
     elif side == "sell" and current_price >= latest_long_ma:
         return True
     else:
         return False
+
+def detect_signals(close, short_ma, medium_ma, long_ma):
+    """
+    Vectorized detect_signal over whole arrays (last axis is time).
+    Returns an int8 array: 1 for "buy", -1 for "sell", 0 for no signal.
+    Bar i sees the same values detect_signal would after candle i closed.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    prev_short = np.roll(short_ma, 1, axis=-1)
+    prev_medium = np.roll(medium_ma, 1, axis=-1)
+    prev_short[..., 0] = np.nan
+    prev_medium[..., 0] = np.nan
+
+    buy = ((close > short_ma) & (close > medium_ma) &
+           (short_ma > medium_ma) & (medium_ma > long_ma) &
+           (prev_short <= prev_medium))
+    sell = ((close < short_ma) & (close < medium_ma) &
+            (short_ma < medium_ma) & (medium_ma < long_ma) &
+            (prev_short >= prev_medium))
+    return buy.astype(np.int8) - sell.astype(np.int8)
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+
+def _make_candles(n, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 22000 + np.cumsum(rng.normal(0, 10, n))
+    open_ = np.concatenate(([close[0]], close[:-1])) + rng.normal(0, 2, n)
+    high = np.maximum(open_, close) + rng.uniform(0, 8, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 8, n)
+    ts = 1_700_000_000 + 60 * np.arange(n)
+    return np.column_stack([ts, open_, high, low, close, rng.integers(100, 1000, n)])
+
+
+@pytest.fixture
+def make_candles():
+    """Synthetic Fyers-style [ts, open, high, low, close, volume] 1-minute candles."""
+    return _make_candles
@@ -0,0 +1,129 @@
+import json
+import logging
+
+import pytest
+
+from src.api_profiler import LogAnalyzer, ProfiledFyers, analyze, main
+from src.candle_store import CandleStore
+from src.engine import TradingEngine
+from src.fake_broker import FakeBroker
+from src.fyers_client import place_order
+from src.structured_log import JsonFormatter
+
+def sdk_request(api, status, ts):
+    return json.dumps({"level": "DEBUG", "location": "[post_call:81] fyersModel",
+                       "message": {"Status Code": status, "API": api},
+                       "timestamp": f"2026-01-02 10:25:{ts},000+0530", "service": "FyersAPIRequest"})
+
+def sdk_error(api, code, message, ts):
+    return json.dumps({"level": "ERROR", "location": "[post_call:89] fyersModel",
+                       "message": {"API": api, "Error": {"code": code, "message": message, "s": "error"}},
+                       "timestamp": f"2026-01-02 10:25:{ts},000+0530", "service": "FyersAPI"})
+
+def test_wrapper_records_latency_status_and_error_codes(caplog):
+    broker = FakeBroker(lot_sizes={"NSE:NIFTY": 75})
+    fyers = ProfiledFyers(broker)
+    with caplog.at_level(logging.INFO, logger="trading_bot.api"):
+        assert place_order(fyers, "NSE:NIFTY24DEC24000CE", 75, "buy", "market")["s"] == "ok"
+        assert place_order(fyers, "NSE:NIFTY24DEC24000CE", 1, "buy", "market")["code"] == -50
+        fyers.positions()
+    assert fyers.orders is broker.orders        # non-callables pass through
+
+    stats = fyers.snapshot()
+    assert stats["place_order"]["calls"] == 2 and stats["place_order"]["errors"] == 1
+    assert stats["place_order"]["codes"] == {"-50": 1}
+    assert stats["place_order"]["latency"]["count"] == 2
+    assert stats["positions"]["errors"] == 0
+    records = [r.msg for r in caplog.records if r.msg.get("event") == "api_call"]
+    assert [r["API"] for r in records] == ["place_order", "place_order", "positions"]
+    assert records[1]["s"] == "error" and records[1]["code"] == -50 and records[1]["latency_ms"] >= 0
+    assert records[0]["request"] != records[1]["request"]
+
+def test_wrapper_counts_and_reraises_exceptions():
+    class Broken:
+        def history(self, data):
+            raise ConnectionError("reset by peer")
+
+    fyers = ProfiledFyers(Broken())
+    with pytest.raises(ConnectionError):
+        fyers.history(data={})
+    assert fyers.snapshot()["history"]["codes"] == {"ConnectionError": 1}
+
+def test_engine_runs_on_the_wrapper(tmp_path):
+    broker = FakeBroker()
+    fyers = ProfiledFyers(broker)
+    config = {"ticker": "NSE:SBIN-EQ", "trade_type": "Equity", "quantity": 1}
+    engine = TradingEngine(fyers, config, candle_store=CandleStore(tmp_path),
+                           data_socket_factory=broker.data_socket, order_socket_factory=broker.order_socket)
+    engine.start("FAKE-APP:token")
+    for socket in broker.data_sockets:
+        socket.close_connection()
+    engine.stop()
+    history = fyers.snapshot()["history"]
+    assert history["calls"] >= 1 and history["errors"] == 0
+    assert history["latency"]["count"] == history["calls"]
+
+def test_analyzer_reports_calls_errors_and_bursts(tmp_path):
+    requests, errors = tmp_path / "fyersRequests.log", tmp_path / "fyersApi.log"
+    lines = [sdk_request("/history", 200, "00")]
+    lines += [sdk_request("/orders/sync", 400, f"{10 + i // 2:02d}") for i in range(6)]   # a 6-call burst
+    lines += [sdk_request("/orders/sync", 200, "40"), "not json", ""]
+    requests.write_text("\n".join(lines) + "\n")
+    errors.write_text("\n".join(sdk_error("/orders/sync", -50, "1 not a multiple of minimum lot size 75", "10")
+                                for _ in range(6)) + "\n")
+
+    report = analyze([str(requests), str(errors)])
+    orders = report["endpoints"]["/orders/sync"]
+    assert orders["calls"] == 7 and orders["errors"] == 6
+    assert orders["statuses"] == {"400": 6, "200": 1}
+    assert orders["error_codes"]["-50"]["count"] == 6
+    assert orders["peak_calls_per_second"] == 2 and orders["latency"] is None
+    assert report["endpoints"]["/history"]["calls"] == 1
+    assert report["skipped"] == 1
+    assert report["bursts"]["count"] == 1 and report["bursts"]["duplicate_calls"] == 5
+    assert report["bursts"]["largest"][0]["count"] == 6
+
+def test_analyzer_reads_bot_records_with_latency(tmp_path):
+    log_file = tmp_path / "trading_bot.log"
+    formatter = JsonFormatter()
+    fyers = ProfiledFyers(FakeBroker())
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(formatter)
+    logger = logging.getLogger("trading_bot.api")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        for _ in range(4):
+            fyers.positions()
+        fyers.orderbook()
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+        handler.close()
+
+    report = analyze([str(log_file)])
+    positions = report["endpoints"]["positions"]
+    assert positions["calls"] == 4 and positions["latency"]["count"] == 4
+    assert report["endpoints"]["orderbook"]["calls"] == 1
+    # the same request four times within the window is one burst of identical calls
+    assert report["bursts"]["largest"][0]["API"] == "positions"
+    assert report["bursts"]["largest"][0]["count"] == 4
+
+def test_analyzer_state_stays_bounded():
+    analyzer = LogAnalyzer(window=0.5, top=3)
+    for i in range(20_000):
+        ts = f"2026-01-02 10:{i // 600 % 60:02d}:{i // 10 % 60:02d},{i % 10}00+0530"
+        analyzer.feed({"message": {"event": "api_call", "API": "history", "s": "ok", "latency_ms": 1.5,
+                                   "request": f"{i:08x}"}, "timestamp": ts})
+    assert len(analyzer._runs) <= 1001
+    report = analyzer.report()
+    assert report["endpoints"]["history"]["calls"] == 20_000
+    assert report["bursts"]["count"] == 0
+
+def test_cli_prints_a_report(tmp_path, capsys):
+    requests = tmp_path / "fyersRequests.log"
+    requests.write_text(sdk_request("/history", 200, "00") + "\n")
+    assert main([str(requests)]) == 0
+    assert "/history" in capsys.readouterr().out
+    assert main([str(requests), "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["endpoints"]["/history"]["calls"] == 1
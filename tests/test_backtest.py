@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+from src.backtest import run_backtest
+from src.trading_logic import IndicatorState, detect_signal, check_stop_loss
+from tests.test_engine import make_engine
+
+def reference_backtest(candles, windows, max_trades, quantity):
+    """Bar-by-bar replay using the live functions, for comparison."""
+    state = IndicatorState(*windows)
+    positions, trades, signals = [], [], []
+    for ts, o, h, l, c, v in candles:
+        # ticks of this bar see the indicators of the previous closed bar;
+        # a position still open at its first tick blocks this bar's entry
+        flat = not positions
+        for pos in list(positions):
+            stop_price = l if pos["side"] == "buy" else h
+            if check_stop_loss(stop_price, state, pos["side"]):
+                level = state.long.value
+                gapped = check_stop_loss(o, state, pos["side"])
+                pos["exit_price"] = o if gapped else level
+                positions.remove(pos)
+        if flat and signals and signals[-1] and len(trades) < max_trades:
+            pos = {"side": signals[-1], "entry_price": o}
+            if check_stop_loss(l if pos["side"] == "buy" else h, state, pos["side"]):
+                pos["exit_price"] = o if check_stop_loss(o, state, pos["side"]) else state.long.value
+            else:
+                positions.append(pos)
+            trades.append(pos)
+        state.update(c)
+        signals.append(detect_signal(c, state))
+    for pos in positions:
+        pos["exit_price"] = candles[-1][4]
+    pnl = sum((p["exit_price"] - p["entry_price"]) * (1 if p["side"] == "buy" else -1) * quantity
+              for p in trades)
+    return signals, trades, pnl
+
+def test_signals_match_live_logic_bar_for_bar(make_candles):
+    candles = make_candles(3000)
+    result = run_backtest(candles, 5, 13, 34, 89, max_trades=10_000, quantity=1)
+    signals, _, _ = reference_backtest(candles, (5, 13, 34, 89), 10_000, 1)
+    expected = [{"buy": 1, "sell": -1, None: 0}[s] for s in signals]
+    assert result["signals"].tolist() == expected
+    assert any(expected)
+
+def test_trades_and_pnl_match_reference(make_candles):
+    candles = make_candles(3000, seed=11)
+    for max_trades in (3, 10_000):
+        result = run_backtest(candles, 5, 13, 34, max_trades=max_trades, quantity=65)
+        _, trades, pnl = reference_backtest(candles, (5, 13, 34, 89), max_trades, 65)
+        assert result["num_trades"] == len(trades)
+        assert result["trades"]["side"].tolist() == [t["side"] for t in trades]
+        np.testing.assert_allclose(result["trades"]["exit_price"], [t["exit_price"] for t in trades])
+        assert np.isclose(result["pnl"], pnl)
+
+def test_trades_match_the_live_engine(tmp_path, make_candles):
+    candles = make_candles(400, seed=8)     # signals that fire while a position is open
+    candles[:, 0] += 1_700_000_040 - candles[0, 0]      # minute-aligned like the engine's buckets
+    result = run_backtest(candles, 2, 3, 4, 5, max_trades=10_000)
+    assert result["num_trades"] > 5
+
+    engine = make_engine(tmp_path, max_trades=10_000)
+    executor = engine.order_executor
+    orders = []     # (bar ts, price, side) of every order, in submission order
+    for ts, o, h, l, c, _ in candles:
+        # the open first, then both extremes, then the close
+        for i, price in enumerate((o, l, h, c)):
+            engine.on_message({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": price, "exch_feed_time": int(ts) + 15 * i})
+            orders += [(int(ts), price, side) for _, _, side in executor.submitted[len(orders):]]
+            executor.run_pending()
+
+    entries, exits = orders[0::2], orders[1::2]
+    trades = result["trades"]
+    assert [(ts, price, side) for ts, price, side in entries] == list(
+        zip(trades["entry_time"].tolist(), trades["entry_price"].tolist(), trades["side"].tolist()))
+    closed = trades[~trades["open"]]
+    assert [ts for ts, _, _ in exits] == closed["exit_time"].tolist()
+    assert len(exits) == len(closed) and trades["open"].sum() == len(entries) - len(exits)
+
+def test_no_trades_without_enough_history(make_candles):
+    result = run_backtest(make_candles(20), 5, 13, 34)
+    assert result["num_trades"] == 0
+    assert result["pnl"] == 0.0
+    assert result["trades"].empty
+
+def test_100_days_of_minute_bars_under_a_second(make_candles):
+    candles = make_candles(100 * 375)
+    start = time.perf_counter()
+    run_backtest(candles, 11, 23, 50, 89, max_trades=10_000)
+    assert time.perf_counter() - start < 1.0
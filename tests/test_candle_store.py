@@ -0,0 +1,71 @@
+import threading
+
+import numpy as np
+from src.candle_store import CandleStore, DAY
+from src.fyers_client import get_historical_data
+
+START = 1_700_000_040  # minute-aligned
+
+class HistoryServer:
+    """Serves 1-minute candles from START up to `now`, recording each /history call."""
+
+    def __init__(self, now):
+        self.now = now
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def history(self, data):
+        lo, hi = int(data["range_from"]), min(int(data["range_to"]), self.now)
+        with self.lock:
+            self.calls.append((lo, hi))
+        ts = np.arange(max(lo, START) // 60 * 60, hi + 1, 60)
+        ts = ts[ts >= lo]
+        candles = [[t, 1.0, 2.0, 0.5, float(t % 997), 10] for t in ts]
+        return {"s": "ok", "candles": candles}
+
+def test_second_request_only_fetches_tail(tmp_path):
+    server = HistoryServer(now=START + 3 * DAY)
+    store = CandleStore(tmp_path)
+    first = store.history(server, "NSE:SBIN-EQ", "1", START, START + 3 * DAY)["candles"]
+    assert len(first) == 3 * 24 * 60 + 1
+
+    server.now += 600
+    server.calls.clear()
+    second = store.history(server, "NSE:SBIN-EQ", "1", START, START + 3 * DAY + 600)["candles"]
+    assert server.calls == [(int(first[-1, 0]), START + 3 * DAY + 600)]
+    assert len(second) == len(first) + 10
+    assert np.all(np.diff(second[:, 0]) == 60)
+
+def test_long_range_is_chunked(tmp_path):
+    server = HistoryServer(now=START + 250 * DAY)
+    store = CandleStore(tmp_path)
+    candles = store.history(server, "NSE:SBIN-EQ", "1", START, START + 250 * DAY)["candles"]
+    assert len(server.calls) == 3
+    assert all(hi - lo < 100 * DAY for lo, hi in server.calls)
+    assert len(np.unique(candles[:, 0])) == len(candles) == 250 * 24 * 60 + 1
+
+def test_error_response_is_passed_through(tmp_path):
+    class Failing:
+        def history(self, data):
+            return {"s": "error", "code": -300, "message": "invalid symbol"}
+    store = CandleStore(tmp_path)
+    assert store.history(Failing(), "NSE:BAD-EQ", "5", START, START + DAY)["code"] == -300
+    assert len(store.load("NSE:BAD-EQ", "5")) == 0
+
+def test_get_historical_data_goes_through_store(tmp_path):
+    server = HistoryServer(now=START + DAY)
+    store = CandleStore(tmp_path)
+    response = get_historical_data(server, "NSE:SBIN-EQ", "1", 0, START, START + DAY, store=store)
+    assert response["s"] == "ok"
+    assert len(store.load("NSE:SBIN-EQ", "1")) == len(response["candles"])
+
+def test_date_range_covers_whole_ist_end_day(tmp_path):
+    import datetime
+    server = HistoryServer(now=START + 2 * DAY)
+    store = CandleStore(tmp_path)
+    response = get_historical_data(server, "NSE:SBIN-EQ", "1", 1, "2023-11-15", "2023-11-15", store=store)
+    candles = response["candles"]
+    assert isinstance(candles, list)
+    end_of_day = datetime.datetime(2023, 11, 15, 23, 59, tzinfo=datetime.timezone(datetime.timedelta(hours=5, minutes=30)))
+    assert candles[0][0] == START
+    assert candles[-1][0] == end_of_day.timestamp()
@@ -0,0 +1,90 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from src.candles import CandleAggregator, CandleBuilder, bucket_start, build_bars, timeframe_seconds
+
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+def ist(h, m, s=0, day=2):
+    return int(datetime.datetime(2025, 1, day, h, m, s, tzinfo=IST).timestamp())
+
+def test_buckets_align_with_fyers_candles():
+    assert bucket_start(ist(10, 20, 30), timeframe_seconds("1")) == ist(10, 20)
+    assert bucket_start(ist(10, 22), timeframe_seconds("5")) == ist(10, 20)
+    assert bucket_start(ist(10, 14, 59), timeframe_seconds("60")) == ist(9, 15)
+    assert bucket_start(ist(10, 15), timeframe_seconds("60")) == ist(10, 15)
+    assert bucket_start(ist(15, 29), timeframe_seconds("D")) == ist(0, 0)
+    with pytest.raises(ValueError):
+        timeframe_seconds("W")
+
+def test_builder_makes_ohlcv_bars():
+    builder = CandleBuilder("5")
+    ticks = [(ist(9, 15, 1), 100, 1000), (ist(9, 16), 103, 1010), (ist(9, 18), 99, 1025), (ist(9, 19, 59), 101, 1030)]
+    assert all(builder.update(t, p, v) is None for t, p, v in ticks)
+    assert builder.update(ist(9, 14), 50, 1030) is None          # late tick from an older bucket
+    closed = builder.update(ist(9, 20), 102, 1040)
+    assert closed == (ist(9, 15), 100, 103, 99, 101, 30)
+    assert builder.current() == (ist(9, 20), 102, 102, 102, 102, 10)
+    assert builder.bars.last()["close"].tolist() == [101]
+
+def test_daily_bars_only_take_session_ticks():
+    builder = CandleBuilder("D")
+    builder.update(ist(9, 7), 90)        # pre-open
+    builder.update(ist(9, 15), 100)
+    builder.update(ist(15, 30), 104)
+    builder.update(ist(16, 0), 200)      # after the close
+    assert builder.current()[1:5] == (100, 104, 100, 104)
+    assert builder.update(ist(9, 15, day=3), 105) == (ist(0, 0), 100, 104, 100, 104, 0.0)
+
+def test_aggregator_closes_each_timeframe_on_its_boundary():
+    closed = []
+    aggregator = CandleAggregator(["1", "5", "D"], on_bar=lambda tf, bar: closed.append((tf, bar[0])))
+    for minute in range(16, 26):
+        aggregator.on_tick({"ltp": 100.0 + minute, "exch_feed_time": ist(9, minute)})
+    assert [tf for tf, _ in closed].count("1") == 9
+    assert [(tf, ts) for tf, ts in closed if tf != "1"] == [("5", ist(9, 15)), ("5", ist(9, 20))]
+
+def test_seeded_builder_continues_the_forming_history_bar():
+    history = [[ist(9, 15), 10, 12, 9, 11, 100], [ist(9, 20), 11, 13, 10, 12, 50]]
+    builder = CandleBuilder("5").seed(history)
+    assert builder.bars.last()["ts"].tolist() == [ist(9, 15)]
+    builder.update(ist(9, 23), 14)
+    closed = builder.update(ist(9, 25), 13)
+    assert closed == (ist(9, 20), 11, 14, 10, 14, 50)
+
+def test_build_bars_matches_streaming_builder():
+    rng = np.random.default_rng(1)
+    ts = np.sort(rng.integers(ist(9, 15), ist(15, 30), 5000))
+    price = 100 + rng.standard_normal(5000).cumsum()
+    builder = CandleBuilder("15")
+    streamed = [bar for bar in (builder.update(int(t), float(p)) for t, p in zip(ts, price)) if bar]
+    streamed.append(builder.current())
+    np.testing.assert_allclose(build_bars(ts, price, timeframe="15"), np.array(streamed, dtype=np.float64))
+
+def test_engine_candles_see_every_tick_with_conflation_on(tmp_path):
+    import time
+    from src.conflation import TickConflator
+    from tests.test_engine import make_engine
+
+    engine = make_engine(tmp_path, timeframe="5", strategies=[
+        {"type": "triple_ma", "short": 2, "medium": 3, "long": 4, "extra_long": 5},
+        {"type": "mean_reversion", "window": 3, "band": 0.05, "timeframe": "1"},
+    ])
+    # a strategy slow enough that most ticks are superseded before it sees them
+    engine.conflator = TickConflator(lambda msg: time.sleep(0.0005) or engine.evaluate(msg),
+                                     bucket=engine.candle_bucket).start()
+    rng = np.random.default_rng(7)
+    ts = np.sort(rng.integers(ist(9, 15), ist(10, 15), 2000))
+    price = 100 + rng.standard_normal(2000).cumsum()
+    reference = CandleAggregator(["1", "5"])
+    for t, p in zip(ts.tolist(), price.tolist()):
+        engine.receive({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": p, "exch_feed_time": t})
+        reference.update(t, p)
+    engine.stop()
+    assert engine.status()["conflation"]["dropped"] > 0
+    for timeframe in ("1", "5"):
+        builder = engine.shard().candles[timeframe]
+        np.testing.assert_array_equal(builder.bars.last(), reference[timeframe].bars.last())
+        assert builder.current() == reference[timeframe].current()
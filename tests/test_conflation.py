@@ -0,0 +1,62 @@
+import threading
+
+from src.conflation import TickConflator
+
+def tick(ltp, t, symbol="NSE:SBIN-EQ"):
+    return {"type": "sf", "symbol": symbol, "ltp": ltp, "exch_feed_time": t}
+
+def minute(msg):
+    return msg["exch_feed_time"] // 60 * 60
+
+class BlockingHandler:
+    """Holds the worker on its first tick until released, so later ticks pile up."""
+
+    def __init__(self):
+        self.seen = []
+        self.busy = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, msg):
+        self.seen.append(msg)
+        self.busy.set()
+        self.release.wait(5)
+
+def test_superseded_ticks_are_dropped_but_bucket_closes_kept():
+    handler = BlockingHandler()
+    conflator = TickConflator(handler, bucket=minute).start()
+    conflator.put(tick(100, 0))
+    assert handler.busy.wait(5)
+    # while the worker is busy: three ticks in minute 0, then two in minute 1
+    for ltp, t in [(101, 10), (102, 20), (103, 59), (104, 61), (105, 70)]:
+        conflator.put(tick(ltp, t))
+    conflator.put({"type": "cn", "code": 200})
+    handler.release.set()
+    conflator.stop()
+    assert [m.get("ltp") for m in handler.seen] == [100, 103, 105, None]
+    stats = conflator.stats()
+    assert stats["received"] == 7 and stats["processed"] == 4 and stats["dropped"] == 3
+
+def test_symbols_are_conflated_independently():
+    handler = BlockingHandler()
+    conflator = TickConflator(handler, bucket=minute).start()
+    conflator.put(tick(1, 0, "NSE:A-EQ"))
+    assert handler.busy.wait(5)
+    for ltp in (2, 3):
+        conflator.put(tick(ltp, ltp, "NSE:A-EQ"))
+        conflator.put(tick(ltp * 10, ltp, "NSE:B-EQ"))
+    handler.release.set()
+    conflator.stop()
+    assert [m["ltp"] for m in handler.seen] == [1, 3, 30]
+    assert conflator.max_backlog == 2
+
+def test_handler_errors_do_not_stop_the_worker():
+    seen = []
+    def handler(msg):
+        seen.append(msg["ltp"])
+        if msg["ltp"] == 1:
+            raise RuntimeError("boom")
+    conflator = TickConflator(handler).start()
+    conflator.put(tick(1, 0))
+    conflator.put(tick(2, 60))
+    conflator.stop()
+    assert seen == [1, 2]
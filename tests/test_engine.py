@@ -0,0 +1,271 @@
+import pytest
+
+from src.candle_store import CandleStore
+from src.engine import TradingEngine, load_config
+from src.runner import main as runner_main
+
+class RecordingExecutor:
+    """Fills every order at its reference price once the submitting tick has finished."""
+
+    def __init__(self):
+        self.submitted = []
+        self.batches = []
+        self._queued = []
+
+    def submit(self, symbol, qty, side, order_type="market", ref_price=None, meta=None,
+               on_fill=None, on_reject=None, **kwargs):
+        self.submitted.append((symbol, qty, side))
+        intent = {"symbol": symbol, "qty": qty, "side": side, "ref_price": ref_price, "meta": meta}
+        self._queued.append(lambda: on_fill(intent, ref_price, {"s": "ok"}))
+
+    def run_pending(self):
+        while self._queued:
+            self._queued.pop(0)()
+
+    def submit_batch(self, orders):
+        self.batches.append([order["symbol"] for order in orders])
+        for order in orders:
+            self.submit(**order)
+
+    def shutdown(self, wait=True):
+        self.run_pending()
+
+def make_engine(tmp_path, **config):
+    config = dict({"ticker": "NSE:SBIN-EQ", "trade_type": "Equity", "timeframe": "1",
+                   "short_ma_period": 2, "medium_ma_period": 3, "long_ma_period": 4,
+                   "extra_long_ma_period": 5, "quantity": 1}, **config)
+    return TradingEngine(None, config, candle_store=CandleStore(tmp_path), order_executor=RecordingExecutor())
+
+def feed(engine, prices, start=1_700_000_040, symbol="NSE:SBIN-EQ"):
+    for i, price in enumerate(prices):
+        engine.on_message({"type": "sf", "symbol": symbol, "ltp": price, "exch_feed_time": start + 60 * i})
+        engine.order_executor.run_pending()
+
+def test_candle_close_updates_indicators_and_enters(tmp_path):
+    engine = make_engine(tmp_path)
+    # each tick opens a new 1m candle and closes the previous one at its price
+    feed(engine, [100, 102, 101, 103, 105, 105])
+    assert engine.shard().live_data["prices"].last().tolist() == [100, 102, 101, 103, 105]
+    assert engine.shard().live_data["short_ma"] == 104.0
+    assert engine.order_executor.submitted == [("NSE:SBIN-EQ", 1, "buy")]
+    assert engine.shard().open_positions == {"NSE:SBIN-EQ": {"qty": 1, "side": "buy", "direction": "buy",
+                                                             "strategy": "triple_ma"}}
+
+def test_one_entry_per_signal_bar(tmp_path):
+    engine = make_engine(tmp_path, max_trades=5)
+    # the signal holds for every tick of the bar that opens at 105
+    feed(engine, [100, 102, 101, 103, 105])
+    signal_bar_open = 1_700_000_040 + 5 * 60
+    for i, price in enumerate([105, 106, 105.5, 107, 106]):
+        engine.on_message({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": price,
+                           "exch_feed_time": signal_bar_open + 10 * i})
+        engine.order_executor.run_pending()
+    assert engine.order_executor.submitted == [("NSE:SBIN-EQ", 1, "buy")]
+    # stopped out within the same bar: the signal that was already traded is not taken again
+    for i, price in enumerate([90, 105]):
+        engine.on_message({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": price,
+                           "exch_feed_time": signal_bar_open + 55 + i})
+        engine.order_executor.run_pending()
+    assert engine.order_executor.submitted == [("NSE:SBIN-EQ", 1, "buy"), ("NSE:SBIN-EQ", 1, "sell")]
+
+def test_fills_add_to_an_open_position(tmp_path):
+    shard = make_engine(tmp_path).shard()
+    intent = {"symbol": "NSE:SBIN-EQ", "qty": 1, "side": "buy", "ref_price": 100.0,
+              "meta": {"direction": "buy", "strategy": "triple_ma", "signal_bar": 0}}
+    shard.on_entry_fill(intent, 100.0, {"s": "ok"})
+    shard.on_entry_fill(dict(intent, qty=2), 101.0, {"s": "ok"})
+    assert shard.open_positions["NSE:SBIN-EQ"]["qty"] == 3
+    assert len(shard.executed_trades) == 2
+
+def test_stop_loss_exits_position(tmp_path):
+    engine = make_engine(tmp_path)
+    feed(engine, [100, 102, 101, 103, 105, 105])
+    feed(engine, [90], start=1_700_000_040 + 6 * 60)
+    assert engine.order_executor.submitted[-1] == ("NSE:SBIN-EQ", 1, "sell")
+    assert engine.shard().open_positions == {}
+
+def test_status_is_plain_data(tmp_path):
+    engine = make_engine(tmp_path)
+    feed(engine, [100, 101])
+    status = engine.status()
+    sbin = status["symbols"]["NSE:SBIN-EQ"]
+    assert sbin["closes"] == [100.0]
+    assert sbin["short_ma"] is None
+    assert sbin["live_price"] == 101.0
+
+def test_load_config_reads_upper_case_settings(tmp_path):
+    path = tmp_path / "config.py"
+    path.write_text('TICKER = "NSE:SBIN-EQ"\nSHORT_MA_PERIOD = 7\nCLIENT_ID = "abc"\n')
+    config = load_config(str(path), quantity=3)
+    assert config["ticker"] == "NSE:SBIN-EQ"
+    assert config["short_ma_period"] == 7
+    assert config["client_id"] == "abc"
+    assert config["quantity"] == 3
+    assert config["long_ma_period"] == 50
+
+def test_runner_rejects_config_without_credentials(tmp_path, capsys):
+    path = tmp_path / "config.py"
+    path.write_text('TICKER = "NSE:SBIN-EQ"\n')
+    with pytest.raises(SystemExit):
+        runner_main(["--config", str(path), "--access-token", "x"])
+    assert "CLIENT_ID" in capsys.readouterr().err
+
+def test_sell_signal_position_is_stopped_on_its_own_side(tmp_path):
+    engine = make_engine(tmp_path)
+    feed(engine, [105, 103, 104, 102, 100, 100])
+    assert engine.order_executor.submitted == [("NSE:SBIN-EQ", 1, "sell")]
+    assert engine.shard().open_positions["NSE:SBIN-EQ"]["direction"] == "sell"
+    # still below the long MA: the short must stay open
+    feed(engine, [99], start=1_700_000_040 + 6 * 60)
+    assert "NSE:SBIN-EQ" in engine.shard().open_positions
+    feed(engine, [110], start=1_700_000_040 + 7 * 60)
+    assert engine.order_executor.submitted[-1] == ("NSE:SBIN-EQ", 1, "buy")
+    assert engine.shard().open_positions == {}
+
+def test_option_sell_signal_buys_put_with_sell_direction(tmp_path):
+    engine = make_engine(tmp_path, trade_type="Options", ticker="NSE:NIFTY50-INDEX",
+                         expiry_date="2026-01-06", symbol_master_path=None)
+    engine.prepare_options()
+    feed(engine, [105, 103, 104, 102, 100, 100], symbol="NSE:NIFTY50-INDEX")
+    symbol, _, side = engine.order_executor.submitted[0]
+    assert symbol.endswith("PE") and side == "buy"
+    assert engine.shard().open_positions[symbol] == {"qty": 1, "side": "buy", "direction": "sell",
+                                                     "strategy": "triple_ma"}
+
+def test_pending_exits_do_not_block_entries(tmp_path):
+    engine = make_engine(tmp_path, max_trades=2)
+    engine.shard().executed_trades.append({"ticker": "NSE:OLD-EQ"})
+    engine.shard().pending_orders["NSE:OLD-EQ"] = "exit"
+    feed(engine, [100, 102, 101, 103, 105, 105])
+    assert engine.order_executor.submitted == [("NSE:SBIN-EQ", 1, "buy")]
+
+def test_quantity_off_lot_size_refuses_to_start(tmp_path):
+    from tests.test_instruments import write_master
+    engine = make_engine(tmp_path, trade_type="Options", ticker="NSE:NIFTY50-INDEX", expiry_date="2025-01-02",
+                         symbol_master_path=write_master(tmp_path), quantity=50)
+    with pytest.raises(ValueError, match="lot size 75"):
+        engine.start("app:token")
+    assert not engine.started
+
+def test_engine_records_raw_ticks(tmp_path):
+    from src.tick_recorder import load_ticks
+    engine = make_engine(tmp_path, tick_log=str(tmp_path / "ticks" / "run.ticks"))
+    for i, price in enumerate([100, 101, 102]):
+        engine.receive({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": price, "exch_feed_time": 1_700_000_040 + i})
+    engine.stop()
+    assert load_ticks(str(tmp_path / "ticks" / "run.ticks"))["ltp"].tolist() == [100, 101, 102]
+
+def test_tick_state_is_only_logged_when_sampled(tmp_path, caplog):
+    caplog.set_level("DEBUG", logger="trading_bot")
+    feed(make_engine(tmp_path), [100, 101, 102, 103])
+    assert not [r for r in caplog.records if r.msg.get("event") == "tick"]
+    feed(make_engine(tmp_path, debug_tick_sample=2), [100, 101, 102, 103])
+    assert len([r for r in caplog.records if r.msg.get("event") == "tick"]) == 2
+
+def test_status_reports_stage_latencies(tmp_path):
+    engine = make_engine(tmp_path)
+    feed(engine, [100, 102, 101, 103, 105, 105])
+    latency = engine.status()["latency"]
+    assert latency["lock_wait"]["count"] == 6
+    assert latency["tick_to_submit"]["count"] == 1
+
+def test_conflated_feed_closes_the_same_candles(tmp_path):
+    from src.conflation import TickConflator
+    engine = make_engine(tmp_path)
+    engine.conflator = TickConflator(engine.evaluate, bucket=engine.candle_bucket)
+    # queue a burst before the worker starts: only the last tick of each minute survives
+    for i, price in enumerate([100, 101, 102, 103, 104, 105]):
+        engine.receive({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": price, "exch_feed_time": 1_700_000_040 + 20 * i})
+    engine.conflator.start()
+    engine.stop()
+    assert engine.shard().live_data["prices"].last().tolist() == [102]
+    assert engine.shard().live_data["live_price"] == 105.0
+    assert engine.status()["conflation"]["dropped"] == 4
+
+def test_conflation_never_drops_ticks_from_candles(tmp_path):
+    from src.conflation import TickConflator
+    engine = make_engine(tmp_path, timeframe="5", strategies=[
+        {"type": "triple_ma", "short": 2, "medium": 3, "long": 4, "extra_long": 5},
+        {"type": "mean_reversion", "window": 3, "band": 0.05, "timeframe": "1"},
+    ])
+    engine.conflator = TickConflator(engine.evaluate, bucket=engine.candle_bucket)
+    prices = [100, 107, 101, 95, 102, 103, 104, 99, 105, 106, 100, 101]
+    # four minutes of one 5m bucket, queued before the worker starts: the strategy sees only the last tick
+    for i, price in enumerate(prices):
+        engine.receive({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": price, "exch_feed_time": 1_700_000_100 + 20 * i})
+    engine.conflator.start()
+    engine.stop()
+    assert engine.status()["conflation"]["dropped"] == len(prices) - 1
+    candles = engine.shard().candles
+    assert candles["5"].current()[1:5] == (100, 107, 95, 101)
+    assert candles["1"].bars.last()["close"].tolist() == [101, 103, 105]
+    assert engine.shard().live_data["live_price"] == 101.0
+
+def test_ticks_are_routed_to_per_symbol_shards(tmp_path):
+    engine = make_engine(tmp_path, tickers=["NSE:SBIN-EQ", "NSE:TCS-EQ"], quantity={"NSE:SBIN-EQ": 1, "NSE:TCS-EQ": 3})
+    feed(engine, [100, 102, 101, 103, 105, 105])
+    feed(engine, [50, 49, 48, 47], symbol="NSE:TCS-EQ")
+    feed(engine, [70], symbol="NSE:UNKNOWN-EQ")
+    assert engine.shard("NSE:TCS-EQ").live_data["prices"].last().tolist() == [50, 49, 48]
+    assert engine.order_executor.submitted == [("NSE:SBIN-EQ", 1, "buy")]
+    status = engine.status()
+    assert set(status["symbols"]) == {"NSE:SBIN-EQ", "NSE:TCS-EQ"}
+    assert status["executed_trades"][0]["underlying"] == "NSE:SBIN-EQ"
+
+def test_daily_timeframe_trades_on_session_bars(tmp_path):
+    engine = make_engine(tmp_path, timeframe="D")
+    # 09:15 IST on consecutive days
+    for day in range(6):
+        engine.on_message({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": [100, 102, 101, 103, 105, 105][day],
+                           "exch_feed_time": 1_735_789_500 + day * 86400})
+        engine.order_executor.run_pending()
+    assert engine.shard().live_data["prices"].last().tolist() == [100, 102, 101, 103, 105]
+    assert engine.order_executor.submitted == [("NSE:SBIN-EQ", 1, "buy")]
+
+def test_positions_exit_by_the_strategy_that_entered_them(tmp_path):
+    engine = make_engine(tmp_path, strategies=[
+        {"type": "mean_reversion", "window": 3, "band": 0.05},
+        {"type": "triple_ma", "short": 2, "medium": 3, "long": 4, "extra_long": 5},
+    ])
+    # the triple-MA rule would sell on the last close; the mean-reversion rule is listed first and buys
+    feed(engine, [100, 100, 100, 100, 90, 90])
+    assert engine.order_executor.submitted == [("NSE:SBIN-EQ", 1, "buy")]
+    assert engine.shard().open_positions["NSE:SBIN-EQ"]["strategy"] == "mean_reversion"
+    # back above the 3-bar mean; the triple-MA stop (the 4-bar MA, 95) would not fire yet
+    feed(engine, [96], start=1_700_000_040 + 6 * 60)
+    assert engine.order_executor.submitted[-1] == ("NSE:SBIN-EQ", 1, "sell")
+    # both strategies read the same 3-bar MA
+    assert len(engine.shard().indicators) == 4
+
+def test_entry_is_confirmed_by_the_order_socket(tmp_path):
+    from src.order_manager import OrderManager, StubOrderSocket
+
+    class Broker:
+        def place_order(self, data):
+            return {"s": "ok", "id": "N1"}
+
+    manager = OrderManager()
+    socket = manager.connect("app:token", socket_factory=StubOrderSocket)
+    config = {"ticker": "NSE:SBIN-EQ", "trade_type": "Equity", "short_ma_period": 2, "medium_ma_period": 3,
+              "long_ma_period": 4, "extra_long_ma_period": 5, "quantity": 1}
+    engine = TradingEngine(Broker(), config, candle_store=CandleStore(tmp_path), order_manager=manager)
+    for i, price in enumerate([100, 102, 101, 103, 105, 105]):
+        engine.on_message({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": price, "exch_feed_time": 1_700_000_040 + 60 * i})
+    engine.order_executor.shutdown()
+    assert engine.shard().open_positions == {}
+    assert engine.shard().pending_orders == {"NSE:SBIN-EQ": "entry"}
+    socket.push_order(id="N1", symbol="NSE:SBIN-EQ", status=2, filledQty=1, tradedPrice=105.2)
+    socket.push_position(symbol="NSE:SBIN-EQ", netQty=1, netAvg=105.2)
+    assert engine.shard().open_positions["NSE:SBIN-EQ"]["qty"] == 1
+    assert engine.status()["executed_trades"][0]["executed_price"] == 105.2
+    assert engine.status()["broker"]["positions"]["NSE:SBIN-EQ"]["netQty"] == 1
+
+def test_simultaneous_stop_losses_exit_in_one_batch(tmp_path):
+    engine = make_engine(tmp_path)
+    feed(engine, [100, 102, 101, 103, 105, 105])
+    engine.shard().open_positions["NSE:SBIN-EQ-2"] = {"qty": 2, "side": "buy", "direction": "buy",
+                                                      "strategy": "triple_ma"}
+    feed(engine, [90], start=1_700_000_040 + 6 * 60)
+    assert engine.order_executor.batches == [["NSE:SBIN-EQ", "NSE:SBIN-EQ-2"]]
+    assert engine.order_executor.submitted[-2:] == [("NSE:SBIN-EQ", 1, "sell"), ("NSE:SBIN-EQ-2", 2, "sell")]
+    assert engine.shard().open_positions == {}
@@ -0,0 +1,62 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.engine_view import bars_drawn, new_bars
+from test_engine import feed, make_engine
+
+def test_view_tracks_ticks_and_closed_bars(tmp_path):
+    engine = make_engine(tmp_path)
+    feed(engine, [100, 101, 102, 103, 104, 105])
+    view = engine.shard().view
+    assert view.live_price == 105
+    assert view.ticks == 6
+    assert view.bars["close"].tolist() == [100, 101, 102, 103, 104]
+    assert view.bars["short_ma"][-1] == pytest.approx(103.5)
+    assert np.isnan(view.bars["long_ma"][0]) and view.bars["long_ma"][-1] == pytest.approx(102.5)
+    assert view.bar_seq == 5
+
+def test_view_is_immutable(tmp_path):
+    engine = make_engine(tmp_path)
+    feed(engine, [100, 101, 102, 103, 104, 105, 106])
+    view = engine.shard().view
+    with pytest.raises(ValueError):
+        view.bars["close"][0] = 1.0
+    with pytest.raises(TypeError):
+        view.open_positions["NSE:SBIN-EQ"] = {}
+    with pytest.raises(AttributeError):
+        view.live_price = 1.0
+    feed(engine, [107], start=1_700_000_040 + 60 * 7)
+    assert view.live_price == 106 and engine.shard().view.live_price == 107
+
+def test_readers_do_not_wait_for_the_shard_lock(tmp_path):
+    engine = make_engine(tmp_path)
+    feed(engine, [100, 102, 101, 103, 105, 105])
+    shard = engine.shard()
+    result = {}
+    with shard.lock:
+        reader = threading.Thread(target=lambda: result.update(view=engine.view(), status=engine.status()))
+        reader.start()
+        reader.join(2)
+        assert not reader.is_alive()
+    assert result["view"].symbols["NSE:SBIN-EQ"] is shard.view
+    assert result["status"]["open_positions"] == {
+        "NSE:SBIN-EQ": {"qty": 1, "side": "buy", "direction": "buy", "strategy": "triple_ma"}}
+
+def test_new_bars_appends_only_undrawn_bars(tmp_path):
+    engine = make_engine(tmp_path)
+    feed(engine, [100, 101, 102])
+    rows, redraw = new_bars(engine.shard().view, None)
+    assert redraw and rows["close"].tolist() == [100, 101]
+    drawn = bars_drawn(engine.shard().view)
+
+    feed(engine, [103, 104], start=1_700_000_040 + 60 * 3)
+    rows, redraw = new_bars(engine.shard().view, drawn)
+    assert not redraw and rows["close"].tolist() == [102, 103]
+    drawn = bars_drawn(engine.shard().view)
+    assert len(new_bars(engine.shard().view, drawn)[0]) == 0
+
+    engine.set_periods(2, 3, 4, 6)
+    rows, redraw = new_bars(engine.shard().view, drawn)
+    assert redraw and rows["close"].tolist() == [100, 101, 102, 103]
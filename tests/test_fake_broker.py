@@ -0,0 +1,133 @@
+import threading
+import time
+
+from src.fake_broker import LOT_SIZE_ERROR, TRANSIENT_ERROR, FakeBroker, FakeDataSocket, run_load_test
+from src.fyers_client import order_data, place_order, subscribe_to_live_data
+from src.candle_store import CandleStore
+from src.engine import TradingEngine
+from src.order_manager import OrderManager
+from src.tick_recorder import TickRecorder, load_ticks
+
+def order(symbol="NSE:SBIN-EQ", qty=1, side="buy"):
+    return order_data(symbol, qty, side, "market")
+
+def test_history_is_one_candle_per_bucket_and_repeatable():
+    broker = FakeBroker()
+    request = {"symbol": "NSE:SBIN-EQ", "resolution": "5", "range_from": 1_700_000_000, "range_to": 1_700_003_000}
+    candles = broker.history(request)["candles"]
+    assert len(candles) == 10
+    assert all(b[0] - a[0] == 300 for a, b in zip(candles, candles[1:]))
+    assert all(low <= min(o, c) and high >= max(o, c) for _, o, high, low, c, _ in candles)
+    assert FakeBroker(seed=7).history(request)["candles"] == candles
+
+def test_orders_off_the_lot_size_are_rejected():
+    broker = FakeBroker(lot_sizes={"NSE:NIFTY": 75, "NSE:NIFTYBANK": 30})
+    assert broker.place_order(order("NSE:NIFTY24DEC24000CE", qty=50))["code"] == LOT_SIZE_ERROR
+    assert broker.place_order(order("NSE:NIFTYBANK24DEC52000CE", qty=60))["s"] == "ok"
+    assert broker.place_order(order("NSE:NIFTY24DEC24000CE", qty=150))["s"] == "ok"
+
+def test_transient_errors_and_latency_are_injected():
+    slept = []
+    broker = FakeBroker(error_rate=1.0, latency=0.25, sleep=slept.append)
+    response = broker.place_order(order())
+    assert response["code"] == TRANSIENT_ERROR
+    assert slept == [0.25]
+    assert broker.orderbook()["orderBook"] == []
+
+def test_fills_reach_the_order_manager_and_positions():
+    broker = FakeBroker()
+    manager = OrderManager()
+    manager.connect("app:token", socket_factory=broker.order_socket)
+    broker.prices["NSE:SBIN-EQ"] = 101.5
+    fills = []
+    order_id = place_order(broker, "NSE:SBIN-EQ", 10, "buy", "market")["id"]
+    manager.track(order_id, {"symbol": "NSE:SBIN-EQ", "qty": 10, "ref_price": 100.0},
+                  on_fill=lambda intent, price, o: fills.append((intent["qty"], price)))
+    assert fills == [(10, 101.5)]
+    assert manager.net_qty("NSE:SBIN-EQ") == 10
+    broker.prices["NSE:SBIN-EQ"] = 103.0
+    broker.place_order(order(qty=4, side="sell"))
+    assert broker.positions()["netPositions"] == [{"symbol": "NSE:SBIN-EQ", "netQty": 6, "netAvg": 101.5}]
+    assert manager.net_qty("NSE:SBIN-EQ") == 6
+
+def test_basket_reports_each_leg():
+    broker = FakeBroker(lot_sizes={"NSE:NIFTY": 75})
+    response = broker.place_basket_orders([order(), order("NSE:NIFTY24DEC24000CE", qty=1)])
+    assert [leg["body"]["s"] for leg in response["data"]] == ["ok", "error"]
+    assert broker.place_basket_orders([order()] * 11)["s"] == "error"
+
+def test_data_socket_streams_and_reconnects_after_injected_disconnects():
+    broker = FakeBroker()
+    messages, closes = [], []
+    done = threading.Event()
+
+    def on_message(msg):
+        messages.append(msg)
+        if len([m for m in messages if "ltp" in m]) == 50:
+            done.set()
+
+    socket = FakeDataSocket(broker, on_message=on_message, on_close=closes.append, rate=20000,
+                            disconnect_every=20, reconnect_delay=0.0, max_ticks=50)
+    socket.connect()
+    socket.subscribe(["NSE:SBIN-EQ", "NSE:TCS-EQ"])
+    assert done.wait(5)
+    socket.join(5)
+    ticks = [m for m in messages if "ltp" in m]
+    assert {m["symbol"] for m in ticks} == {"NSE:SBIN-EQ", "NSE:TCS-EQ"}
+    assert socket.disconnects == 2 and len(closes) == 2
+    assert [m["type"] for m in messages].count("cn") == 3
+    assert broker.prices["NSE:TCS-EQ"] == [m["ltp"] for m in ticks if m["symbol"] == "NSE:TCS-EQ"][-1]
+
+def test_data_socket_replays_a_recorded_log(tmp_path):
+    path = str(tmp_path / "ticks.bin")
+    with TickRecorder(path) as recorder:
+        for i in range(3):
+            recorder.record({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": 100.0 + i, "exch_feed_time": 1_700_000_000 + i})
+    broker = FakeBroker(socket_options={"rate": 10000, "ticks": path, "max_ticks": 7})
+    prices = []
+    socket = subscribe_to_live_data("app:token", ["NSE:SBIN-EQ"],
+                                    lambda msg: prices.append(msg["ltp"]) if "ltp" in msg else None,
+                                    socket_factory=broker.data_socket)
+    socket.join(5)
+    assert prices == [100.0, 101.0, 102.0, 100.0, 101.0, 102.0, 100.0]
+
+def test_load_test_drives_the_engine():
+    result = run_load_test(["NSE:SBIN-EQ", "NSE:TCS-EQ"], rate=5000, seconds=0.5, time_scale=600)
+    assert result["ticks_sent"] > 1000
+    assert result["conflation"]["processed"] > 0
+    assert result["latency"]["indicators"]["count"] > 0
+
+def test_engine_reports_time_to_first_tick(tmp_path):
+    broker = FakeBroker(socket_options={"rate": 1000})
+    config = {"ticker": "NSE:SBIN-EQ", "trade_type": "Equity", "quantity": 1, "launched_at": time.time() - 2}
+    engine = TradingEngine(broker, config, candle_store=CandleStore(tmp_path),
+                           data_socket_factory=broker.data_socket, order_socket_factory=broker.order_socket)
+    engine.start("FAKE-APP:token")
+    deadline = time.time() + 5
+    while "time_to_first_tick_ms" not in engine.startup and time.time() < deadline:
+        time.sleep(0.01)
+    for socket in broker.data_sockets:
+        socket.close_connection()
+    engine.stop()
+    startup = engine.status()["startup"]
+    assert startup["time_to_first_tick_ms"] >= 2000
+    assert 0 <= startup["start_to_first_tick_ms"] < startup["time_to_first_tick_ms"]
+    assert startup["launch_to_start_ms"] >= 2000
+
+def test_stop_closes_the_data_socket_before_the_tick_log(tmp_path):
+    broker = FakeBroker(socket_options={"rate": 5000})
+    config = {"ticker": "NSE:SBIN-EQ", "trade_type": "Equity", "quantity": 1,
+              "tick_log": str(tmp_path / "run.ticks")}
+    engine = TradingEngine(broker, config, candle_store=CandleStore(tmp_path),
+                           data_socket_factory=broker.data_socket, order_socket_factory=broker.order_socket)
+    engine.start("FAKE-APP:token")
+    deadline = time.time() + 5
+    while engine.shard().tick_count < 50 and time.time() < deadline:
+        time.sleep(0.01)
+    # the socket is still streaming: stop() must shut it before closing the tick log
+    engine.stop()
+    assert not any(socket._thread.is_alive() for socket in broker.data_sockets)
+    received = engine.conflator.received
+    engine.receive({"type": "sf", "symbol": "NSE:SBIN-EQ", "ltp": 100.0, "exch_feed_time": int(time.time())})
+    assert engine.conflator.received == received
+    assert len(load_ticks(str(tmp_path / "run.ticks"))) == engine.shard().tick_count
@@ -0,0 +1,53 @@
+import threading
+
+from src.fyers_client import place_basket_orders
+
+class BasketBroker:
+    """Accepts every leg except symbols listed in `reject`; fails whole requests holding `fail`."""
+
+    def __init__(self, reject=(), fail=None):
+        self.reject = set(reject)
+        self.fail = fail
+        self.requests = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def place_basket_orders(self, data):
+        with self._lock:
+            self.requests.append([leg["symbol"] for leg in data])
+            self.threads.add(threading.get_ident())
+        if any(leg["symbol"] == self.fail for leg in data):
+            return {"s": "error", "code": -429, "message": "request limit reached"}
+        legs = []
+        for leg in data:
+            if leg["symbol"] in self.reject:
+                body = {"s": "error", "code": -50, "message": "not a multiple of lot size"}
+            else:
+                body = {"s": "ok", "code": 1101, "id": "id-" + leg["symbol"]}
+            legs.append({"statusCode": 200, "body": body, "statusDescription": "OK"})
+        return {"s": "ok", "code": 200, "data": legs}
+
+def orders(n):
+    return [(f"NSE:S{i}-EQ", 1, "sell", "market") for i in range(n)]
+
+def test_basket_is_chunked_to_the_broker_limit_and_answers_in_order():
+    broker = BasketBroker(reject={"NSE:S12-EQ"})
+    responses = place_basket_orders(broker, orders(25))
+    assert sorted(len(request) for request in broker.requests) == [5, 10, 10]
+    assert len(broker.threads) > 1
+    assert [r.get("id") for r in responses[:2]] == ["id-NSE:S0-EQ", "id-NSE:S1-EQ"]
+    assert responses[12]["code"] == -50
+    assert responses[24]["id"] == "id-NSE:S24-EQ"
+
+def test_failed_request_fails_each_of_its_legs_only():
+    broker = BasketBroker(fail="NSE:S3-EQ")
+    responses = place_basket_orders(broker, orders(12))
+    assert [r["s"] for r in responses] == ["error"] * 10 + ["ok"] * 2
+    assert responses[0]["code"] == -429
+
+def test_exception_becomes_an_error_response_per_leg():
+    class Down:
+        def place_basket_orders(self, data):
+            raise ConnectionError("reset by peer")
+    assert place_basket_orders(Down(), orders(2)) == [{"s": "error", "code": None, "message": "reset by peer"}] * 2
+    assert place_basket_orders(Down(), []) == []
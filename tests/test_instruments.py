@@ -0,0 +1,75 @@
+import datetime
+import logging
+
+from src.instruments import InstrumentMaster, OptionChain, build_option_chain, is_lot_multiple, underlying_from_ticker
+
+# expiry epochs are 15:30 IST on the expiry date
+JAN_02 = 1735812000   # 2025-01-02
+JAN_30 = 1738231200   # 2025-01-30
+ROWS = [
+    f"101,NIFTY 02 Jan 25 24000 CE,14,75,0.05,,0915-1530|1815-1915:,2024-12-27,{JAN_02},NSE:NIFTY2510224000CE,10,11,1,NIFTY,26000,24000.0,CE,101000000026000,None,0,0.0",
+    f"102,NIFTY 02 Jan 25 24050 PE,14,75,0.05,,0915-1530|1815-1915:,2024-12-27,{JAN_02},NSE:NIFTY2510224050PE,10,11,2,NIFTY,26000,24050.0,PE,101000000026000,None,0,0.0",
+    f"103,NIFTY 30 Jan 25 24000 CE,14,75,0.05,,0915-1530|1815-1915:,2024-12-27,{JAN_30},NSE:NIFTY25JAN24000CE,10,11,3,NIFTY,26000,24000.0,CE,101000000026000,None,0,0.0",
+    f"104,NIFTY 25 JAN FUT,11,75,0.05,,0915-1530|1815-1915:,2024-12-27,{JAN_30},NSE:NIFTY25JANFUT,10,11,4,NIFTY,26000,-1.0,XX,101000000026000,None,0,0.0",
+]
+
+def write_master(tmp_path):
+    path = tmp_path / "NSE_FO.csv"
+    path.write_text("\n".join(ROWS) + "\n")
+    return str(path)
+
+def test_load_indexes_options_only(tmp_path):
+    master = InstrumentMaster.load(write_master(tmp_path))
+    assert len(master.contracts) == 3
+    assert master.lookup("NIFTY", datetime.date(2025, 1, 2), 24000, "Call") == ("NSE:NIFTY2510224000CE", 75)
+    assert master.lot_size("NSE:NIFTY25JAN24000CE") == 75
+
+def test_cached_index_is_reused(tmp_path):
+    path = write_master(tmp_path)
+    InstrumentMaster.load(path)
+    assert (tmp_path / "NSE_FO.csv.idx.json").exists()
+    master = InstrumentMaster.load(path)
+    assert master.expiries["NIFTY"] == [datetime.date(2025, 1, 2), datetime.date(2025, 1, 30)]
+
+def test_session_chain_resolves_itm_contracts(tmp_path):
+    master = InstrumentMaster.load(write_master(tmp_path))
+    chain = build_option_chain("NSE:NIFTY50-INDEX", "2025-01-02", "Weekly", 50, master)
+    assert chain.lot_size == 75
+    assert chain.resolve(24012.4, "Call") == ("NSE:NIFTY2510224000CE", 75)
+    assert chain.resolve(24012.4, "Put") == ("NSE:NIFTY2510224050PE", 75)
+    assert chain.resolve(25012.4, "Call") is None
+
+    monthly = build_option_chain("NSE:NIFTY50-INDEX", "2025-01-02", "Monthly", 50, master)
+    assert monthly.expiry == datetime.date(2025, 1, 30)
+
+def test_format_fallback_matches_previous_symbols():
+    weekly = OptionChain.from_format("NSE:NIFTY50-INDEX", "2026-01-06", "Weekly", 50)
+    assert weekly.resolve(26012, "Call") == ("NSE:NIFTY2610626000CE", None)
+    monthly = OptionChain.from_format("NSE:NIFTYBANK-INDEX", "2026-01-27", "Monthly", 100)
+    assert monthly.resolve(59930, "Put") == ("NSE:BANKNIFTY26JAN60000PE", None)
+
+def test_helpers():
+    assert underlying_from_ticker("NSE:SBIN-EQ") == "SBIN"
+    assert is_lot_multiple(150, 75)
+    assert not is_lot_multiple(1, 750)
+    assert is_lot_multiple(1, None)
+
+def test_cache_is_json_and_stale_cache_is_rebuilt(tmp_path):
+    import json, os
+    path = write_master(tmp_path)
+    InstrumentMaster.load(path)
+    with open(path + ".idx.json") as f:
+        cached = json.load(f)
+    assert len(cached["contracts"]) == 3
+    with open(path, "a") as f:
+        f.write(ROWS[0].replace("24000", "24100") + "\n")
+    os.utime(path, ns=(0, 0))
+    assert len(InstrumentMaster.load(path).contracts) == 4
+
+def test_unreadable_cache_is_logged_and_rebuilt(tmp_path, caplog):
+    path = write_master(tmp_path)
+    with open(path + ".idx.json", "w") as f:
+        f.write("{not json")
+    with caplog.at_level(logging.WARNING, logger="trading_bot.instruments"):
+        assert len(InstrumentMaster.load(path).contracts) == 3
+    assert [r.msg["event"] for r in caplog.records] == ["symbol_master_cache_unreadable"]
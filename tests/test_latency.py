@@ -0,0 +1,37 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.latency import LatencyHistogram, LatencyStats
+
+def test_percentiles_are_within_bucket_precision():
+    rng = np.random.default_rng(7)
+    values = rng.lognormal(11, 1.5, 20_000).astype(np.int64)
+    histogram = LatencyHistogram()
+    for v in values.tolist():
+        histogram.record(v)
+    stats = histogram.snapshot()
+    assert stats["count"] == len(values)
+    for p in (50, 90, 99):
+        assert stats[f"p{p}_us"] == pytest.approx(np.percentile(values, p) / 1000, rel=0.05)
+    assert stats["max_us"] == values.max() / 1000
+
+def test_small_negative_and_huge_values():
+    histogram = LatencyHistogram()
+    for v in (-5, 0, 3, 1 << 60):
+        histogram.record(v)
+    stats = histogram.snapshot()
+    assert stats["count"] == 4
+    assert stats["p50_us"] == 0.0
+
+def test_stats_snapshot_and_dump(tmp_path):
+    stats = LatencyStats()
+    assert stats.snapshot() == {}
+    stats.record("signal", 1500)
+    stats.record("signal", 2500)
+    stats.dump(str(tmp_path / "latency.json"))
+    dumped = json.loads((tmp_path / "latency.json").read_text())
+    assert dumped["signal"]["count"] == 2
+    stats.reset()
+    assert stats.snapshot()["signal"]["count"] == 0
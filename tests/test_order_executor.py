@@ -0,0 +1,78 @@
+import threading
+
+from src.order_executor import OrderExecutor
+from src.order_manager import OrderManager, StubOrderSocket
+
+class StubFyers:
+    def __init__(self, response, traded_price=101.5):
+        self.response = response
+        self.traded_price = traded_price
+        self.placed = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def place_order(self, data):
+        self.release.wait(5)
+        self.placed.append(data)
+        return self.response
+
+    def orderbook(self, data):
+        raise AssertionError("fills must come from the order socket, not orderbook polling")
+
+def test_fill_callback_gets_order_socket_price():
+    fyers = StubFyers({"s": "ok", "id": "42"})
+    manager = OrderManager()
+    socket = manager.connect("app:token", socket_factory=StubOrderSocket)
+    executor = OrderExecutor(fyers, order_manager=manager)
+    fills = []
+    executor.submit("NSE:SBIN-EQ", 1, "buy", ref_price=100.0, meta={"tag": 1},
+                    on_fill=lambda intent, price, resp: fills.append((intent, price))).result(5)
+    assert fills == []
+    socket.push_order(id="42", symbol="NSE:SBIN-EQ", status=2, filledQty=1, tradedPrice=101.5)
+    executor.shutdown()
+    intent, price = fills[0]
+    assert price == 101.5
+    assert intent["meta"] == {"tag": 1}
+    assert fyers.placed[0]["symbol"] == "NSE:SBIN-EQ"
+    assert fyers.placed[0]["side"] == 1
+
+def test_reject_callback_on_error_response():
+    fyers = StubFyers({"s": "error", "code": -50, "message": "not a multiple of lot size"})
+    executor = OrderExecutor(fyers)
+    rejects = []
+    executor.submit("NSE:SBIN-EQ", 1, "sell",
+                    on_reject=lambda intent, resp: rejects.append(resp["code"])).result(5)
+    executor.shutdown()
+    assert rejects == [-50]
+
+def test_submit_does_not_wait_for_broker():
+    fyers = StubFyers({"s": "ok", "id": "1"})
+    fyers.release.clear()
+    executor = OrderExecutor(fyers)
+    future = executor.submit("NSE:SBIN-EQ", 1, "buy")
+    assert not future.done()
+    fyers.release.set()
+    assert future.result(5)["s"] == "ok"
+    executor.shutdown()
+
+def test_accepted_order_fills_at_reference_price_without_order_manager():
+    executor = OrderExecutor(StubFyers({"s": "ok", "id": "7"}))
+    fills = []
+    executor.submit("NSE:SBIN-EQ", 1, "buy", ref_price=100.0,
+                    on_fill=lambda intent, price, resp: fills.append(price)).result(5)
+    executor.shutdown()
+    assert fills == [100.0]
+
+def test_batch_legs_are_reconciled_individually():
+    def place_basket(fyers, orders):
+        return [{"s": "ok", "id": "1"}, {"s": "error", "code": -50, "message": "lot size"}]
+
+    executor = OrderExecutor(None, place_basket=place_basket)
+    events = []
+    legs = [{"symbol": symbol, "qty": 1, "side": "sell", "ref_price": 99.0,
+             "on_fill": lambda intent, price, resp: events.append(("fill", intent["symbol"], price)),
+             "on_reject": lambda intent, resp: events.append(("reject", intent["symbol"], resp["code"]))}
+            for symbol in ("NSE:A-EQ", "NSE:B-EQ")]
+    executor.submit_batch(legs).result(5)
+    executor.shutdown()
+    assert events == [("fill", "NSE:A-EQ", 99.0), ("reject", "NSE:B-EQ", -50)]
@@ -0,0 +1,124 @@
+from src.order_gate import OrderGate, TokenBucket, CircuitBreaker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class RecordingPlace:
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def __call__(self, fyers, symbol, qty, side, order_type, **kwargs):
+        self.calls += 1
+        return self.response
+
+LOT_SIZE_REJECT = {"s": "error", "code": -50, "message": "1 not a multiple of minimum lot size 750"}
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.now = 0.5
+    assert bucket.try_acquire()
+
+def test_rejected_order_is_not_resent_every_tick():
+    clock = FakeClock()
+    place = RecordingPlace(LOT_SIZE_REJECT)
+    gate = OrderGate(place=place, reject_cooldown=30, clock=clock)
+    assert gate.place_order(None, "NSE:NIFTY25JAN24000CE", 1, "buy", "market")["code"] == -50
+    for _ in range(20):
+        assert gate.place_order(None, "NSE:NIFTY25JAN24000CE", 1, "buy", "market")["gate"] == "duplicate"
+    assert place.calls == 1
+    clock.now = 31
+    gate.place_order(None, "NSE:NIFTY25JAN24000CE", 1, "buy", "market")
+    assert place.calls == 2
+
+def test_rate_limit_per_second():
+    clock = FakeClock()
+    place = RecordingPlace({"s": "ok", "id": "1"})
+    gate = OrderGate(per_second=3, place=place, clock=clock)
+    responses = [gate.place_order(None, f"NSE:S{i}-EQ", 1, "buy", "market") for i in range(5)]
+    assert [r.get("gate") for r in responses] == [None, None, None, "rate_limited", "rate_limited"]
+    assert gate.blocked["rate_limited"] == 2
+
+def test_circuit_breaker_opens_on_repeated_deterministic_errors():
+    clock = FakeClock()
+    place = RecordingPlace(LOT_SIZE_REJECT)
+    gate = OrderGate(place=place, breaker=CircuitBreaker(threshold=3, cooldown=60, clock=clock), clock=clock)
+    for i in range(3):
+        gate.place_order(None, f"NSE:S{i}-EQ", 1, "buy", "market")
+    assert gate.breaker.is_open
+    assert gate.place_order(None, "NSE:OTHER-EQ", 1, "buy", "market")["gate"] == "circuit_open"
+    clock.now = 61
+    place.response = {"s": "ok", "id": "9"}
+    assert gate.place_order(None, "NSE:OTHER-EQ", 1, "buy", "market")["s"] == "ok"
+    assert not gate.breaker.is_open
+
+def test_exits_bypass_open_breaker_and_reject_cooldown():
+    clock = FakeClock()
+    place = RecordingPlace(LOT_SIZE_REJECT)
+    gate = OrderGate(place=place, breaker=CircuitBreaker(threshold=3, cooldown=60, clock=clock), clock=clock)
+    for i in range(3):
+        gate.place_order(None, f"NSE:S{i}-EQ", 1, "buy", "market")
+    assert gate.breaker.is_open
+    place.response = {"s": "error", "code": -50, "message": "rejected"}
+    assert gate.place_order(None, "NSE:HELD-EQ", 1, "sell", "market", reduce_only=True)["code"] == -50
+    # the exit is retried on the next tick instead of waiting out the cooldown
+    place.response = {"s": "ok", "id": "2"}
+    assert gate.place_order(None, "NSE:HELD-EQ", 1, "sell", "market", reduce_only=True)["s"] == "ok"
+    assert gate.breaker.is_open
+
+def test_transient_errors_do_not_start_reject_cooldown():
+    clock = FakeClock()
+    place = RecordingPlace({"s": "error", "code": -1, "message": "timeout"})
+    gate = OrderGate(place=place, clock=clock)
+    gate.place_order(None, "NSE:SBIN-EQ", 1, "buy", "market")
+    place.response = {"s": "ok", "id": "3"}
+    assert gate.place_order(None, "NSE:SBIN-EQ", 1, "buy", "market")["s"] == "ok"
+
+def test_half_open_breaker_admits_one_trial():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, cooldown=10, clock=clock)
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock.now = 11
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+    clock.now = 22
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+def test_basket_blocks_duplicate_legs_and_takes_one_token_per_request():
+    clock = FakeClock()
+    sent = []
+
+    def place_basket(fyers, orders, chunk_size=10):
+        sent.append(list(orders))
+        return [{"s": "ok", "id": str(i)} for i in range(len(orders))]
+
+    gate = OrderGate(per_second=2, per_minute=200, place_basket=place_basket, clock=clock)
+    legs = [(f"NSE:S{i}-EQ", 1, "sell", "market") for i in range(12)]
+    responses = gate.place_basket(None, legs + [legs[0]])
+    assert [r["s"] for r in responses] == ["ok"] * 12 + ["error"]
+    assert responses[-1]["gate"] == "duplicate"
+    assert len(sent[0]) == 12
+    # two requests' worth of tokens used: the next basket is rate limited
+    assert all(r["gate"] == "rate_limited" for r in gate.place_basket(None, legs[:1]))
+
+def test_one_accepted_order_per_signal_bar():
+    place = RecordingPlace({"s": "ok", "id": "1"})
+    gate = OrderGate(place=place, clock=FakeClock())
+    assert gate.place_order(None, "NSE:SBIN-EQ", 1, "buy", "market", signal_bar=("5", 300))["s"] == "ok"
+    # a different qty is not an in-flight duplicate, but it is the same signal
+    assert gate.place_order(None, "NSE:SBIN-EQ", 2, "buy", "market", signal_bar=("5", 300))["gate"] == "duplicate"
+    assert gate.place_order(None, "NSE:SBIN-EQ", 1, "sell", "market", reduce_only=True)["s"] == "ok"
+    assert gate.place_order(None, "NSE:SBIN-EQ", 1, "buy", "market", signal_bar=("5", 600))["s"] == "ok"
+    assert place.calls == 3
@@ -0,0 +1,65 @@
+import pytest
+
+from src.order_manager import OrderManager, StubOrderSocket
+
+@pytest.fixture
+def book():
+    manager = OrderManager()
+    socket = manager.connect("app:token", socket_factory=StubOrderSocket)
+    events = []
+    return manager, socket, events
+
+def track(manager, events, order_id, qty=10):
+    intent = {"symbol": "NSE:SBIN-EQ", "qty": qty, "side": "buy", "ref_price": 100.0}
+    manager.track(order_id, intent,
+                  on_fill=lambda intent, price, order: events.append(("fill", intent["qty"], price)),
+                  on_reject=lambda intent, order: events.append(("reject", order.get("message"))))
+
+def test_connect_subscribes_to_orders_trades_and_positions(book):
+    manager, socket, _ = book
+    assert socket.connected
+    assert socket.subscribed == "OnOrders,OnTrades,OnPositions"
+    manager.close()
+    assert not socket.connected
+
+def test_partial_fills_are_reported_once_the_order_is_traded(book):
+    manager, socket, events = book
+    track(manager, events, "1")
+    socket.push_trade(orderNumber="1", tradeNumber="t1", tradedQty=4, tradePrice=100.0, symbol="NSE:SBIN-EQ")
+    socket.push_order(id="1", symbol="NSE:SBIN-EQ", status=6, filledQty=4, remainingQuantity=6)
+    assert events == []
+    socket.push_trade(orderNumber="1", tradeNumber="t2", tradedQty=6, tradePrice=105.0, symbol="NSE:SBIN-EQ")
+    socket.push_trade(orderNumber="1", tradeNumber="t2", tradedQty=6, tradePrice=105.0, symbol="NSE:SBIN-EQ")
+    socket.push_order(id="1", symbol="NSE:SBIN-EQ", status=2, filledQty=10, remainingQuantity=0)
+    assert events == [("fill", 10, 103.0)]
+    assert manager.pending() == []
+
+def test_rejection_calls_on_reject(book):
+    manager, socket, events = book
+    track(manager, events, "2")
+    socket.push_order(id="2", symbol="NSE:SBIN-EQ", status=5, filledQty=0, message="RMS: margin shortfall")
+    assert events == [("reject", "RMS: margin shortfall")]
+
+def test_cancel_after_partial_fill_fills_what_traded(book):
+    manager, socket, events = book
+    track(manager, events, "3")
+    socket.push_order(id="3", symbol="NSE:SBIN-EQ", status=1, filledQty=4, tradedPrice=99.5)
+    assert events == [("fill", 4, 99.5)]
+
+def test_update_before_track_is_applied_on_track(book):
+    manager, socket, events = book
+    socket.push_order(id="4", symbol="NSE:SBIN-EQ", status=2, filledQty=10, tradedPrice=101.0)
+    track(manager, events, "4")
+    assert events == [("fill", 10, 101.0)]
+
+def test_positions_and_orders_are_indexed_by_symbol(book):
+    manager, socket, _ = book
+    socket.push_order(id="5", symbol="NSE:SBIN-EQ", status=6)
+    socket.push_position(symbol="NSE:SBIN-EQ", netQty=10, netAvg=101.0)
+    socket.push_position(symbol="NSE:TCS-EQ", netQty=0, netAvg=0.0)
+    assert manager.orders_by_symbol == {"NSE:SBIN-EQ": ["5"]}
+    assert manager.net_qty("NSE:SBIN-EQ") == 10
+    assert manager.net_qty("NSE:INFY-EQ") == 0
+    snapshot = manager.snapshot()
+    assert set(snapshot["positions"]) == {"NSE:SBIN-EQ"}
+    assert snapshot["open_orders"] == ["5"]
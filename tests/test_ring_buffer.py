@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from src.ring_buffer import RingBuffer
+
+def test_append_wraps_and_keeps_newest():
+    buf = RingBuffer(3)
+    for v in [1, 2, 3, 4, 5]:
+        buf.append(v)
+    assert len(buf) == 3
+    assert buf.last().tolist() == [3.0, 4.0, 5.0]
+    assert buf.last(2).tolist() == [4.0, 5.0]
+    assert buf[-1] == 5.0
+
+def test_last_is_zero_copy_view():
+    buf = RingBuffer(4)
+    buf.extend([1, 2, 3, 4, 5, 6])
+    view = buf.last(3)
+    assert np.shares_memory(view, buf._data)
+    with pytest.raises(ValueError):
+        view[0] = 0
+
+def test_extend_matches_repeated_append():
+    rng = np.random.default_rng(1)
+    bulk = RingBuffer(50, dtype=np.int64)
+    single = RingBuffer(50, dtype=np.int64)
+    for chunk in [7, 30, 1, 80, 12]:
+        values = rng.integers(0, 1_000_000, chunk)
+        bulk.extend(values)
+        for v in values:
+            single.append(v)
+        assert bulk.last().tolist() == single.last().tolist()
+
+def test_empty_buffer():
+    buf = RingBuffer(5)
+    assert len(buf) == 0
+    assert not buf
+    assert buf.last().size == 0
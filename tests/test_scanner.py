@@ -0,0 +1,111 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.candle_store import CandleStore
+from src.fake_broker import FakeBroker
+from src.scanner import UniverseScanner, history_days_for, load_closes, main, scan_closes
+from src.trading_logic import IndicatorState, detect_signal
+
+PERIODS = (3, 5, 8, 13)
+
+def walks(n_symbols, n_bars, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_symbols, n_bars)), axis=1))
+
+def expected_signals(closes, periods):
+    signals = {}
+    for i, row in enumerate(closes):
+        state = IndicatorState(*periods).seed(row)
+        signal = detect_signal(row[-1], state)
+        if signal:
+            signals[f"S{i}"] = signal
+    return signals
+
+def test_scan_matches_detect_signal_per_symbol():
+    closes = walks(300, 120)
+    scanner = UniverseScanner([f"S{i}" for i in range(300)], *PERIODS, capacity=120)
+    scanner.load(closes)
+    hits = scanner.scan()
+    assert hits
+    assert {hit.symbol: hit.signal for hit in hits} == expected_signals(closes, PERIODS)
+    assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+    assert all(hit.score > 0 for hit in hits)
+    first = hits[0]
+    row = closes[int(first.symbol[1:])]
+    assert first.close == row[-1]
+    assert first.long_ma == pytest.approx(row[-8:].mean())
+    assert first.extra_long_ma == pytest.approx(row[-13:].mean())
+
+def test_append_rolls_the_window_like_a_fresh_load():
+    closes = walks(20, 60, seed=3)
+    rolled = UniverseScanner([f"S{i}" for i in range(20)], *PERIODS, capacity=25)
+    rolled.load(closes[:, :30])
+    for bar in range(30, 60):
+        rolled.append(closes[:, bar], ts=bar)
+    fresh = UniverseScanner([f"S{i}" for i in range(20)], *PERIODS, capacity=25)
+    fresh.load(closes)
+    np.testing.assert_array_equal(rolled.closes(), closes[:, -25:])
+    assert rolled.scan() == [hit._replace(ts=59) for hit in fresh.scan()]
+
+    rolled.append(np.full(20, np.nan))
+    np.testing.assert_array_equal(rolled.closes()[:, -1], closes[:, -1])
+    with pytest.raises(ValueError):
+        rolled.closes()[0, 0] = 1.0
+
+def test_short_or_missing_history_never_signals():
+    closes = walks(2, 40)
+    closes[1, :33] = np.nan     # 7 closes: enough for the medium MA, not the long one
+    signals, mas = scan_closes(closes, *PERIODS)
+    assert signals[1] == 0 and np.isnan(mas[2, 1]) and not np.isnan(mas[1, 1])
+    assert UniverseScanner(["A"], *PERIODS).scan() == []
+
+def test_history_loads_through_the_cache(tmp_path):
+    broker = FakeBroker()
+    calls = []
+    history = broker.history
+    broker.history = lambda data: calls.append(data["symbol"]) or history(data)
+    store = CandleStore(tmp_path)
+    symbols = ["NSE:SBIN-EQ", "NSE:TCS-EQ", "NSE:INFY-EQ"]
+    now = 1_735_816_500      # 2025-01-02 16:45 IST
+    names, closes, last_ts = load_closes(broker, symbols, "15", 200, store=store, now=now)
+    assert names == symbols and closes.shape == (3, 200) and not np.isnan(closes).any()
+    assert closes[0, -1] == store.load("NSE:SBIN-EQ", "15")[-1, 4]
+
+    first_calls = len(calls)
+    scanner = UniverseScanner.from_history(broker, symbols, "15", *PERIODS, bars=200, store=store, now=now)
+    assert scanner.last_ts == last_ts and len(scanner) == 200
+    # the second load only re-fetches the tail each symbol's cache may be missing
+    assert len(calls) - first_calls <= len(symbols)
+    assert history_days_for("15", 200) >= 200 // 25 and history_days_for("D", 200) > 280
+
+def test_failed_and_stale_symbols_are_dropped(tmp_path):
+    broker = FakeBroker()
+    history = broker.history
+
+    def flaky(data):
+        if data["symbol"] == "NSE:BAD-EQ":
+            return {"s": "error", "code": -300, "message": "invalid symbol"}
+        if data["symbol"] == "NSE:OLD-EQ":
+            data = dict(data, range_to=str(int(data["range_to"]) - 86_400))
+        return history(data)
+
+    broker.history = flaky
+    names, closes, _ = load_closes(broker, ["NSE:SBIN-EQ", "NSE:BAD-EQ", "NSE:OLD-EQ"], "D", 50,
+                                   store=CandleStore(tmp_path), now=1_735_816_500)
+    assert names == ["NSE:SBIN-EQ"] and closes.shape == (1, 50)
+
+def test_scan_of_200_symbols_takes_milliseconds():
+    scanner = UniverseScanner([f"S{i}" for i in range(200)], 11, 23, 50, 89, capacity=500)
+    scanner.load(walks(200, 500))
+    scanner.scan()
+    started = time.perf_counter()
+    for _ in range(20):
+        scanner.scan()
+    assert (time.perf_counter() - started) / 20 < 0.02
+
+def test_cli_scans_the_fake_broker(capsys):
+    assert main(["--config", "", "--fake", "--symbols", "NSE:SBIN-EQ,NSE:TCS-EQ", "--timeframe", "5",
+                 "--bars", "100"]) == 0
+    assert "of 2 symbols signalling" in capsys.readouterr().out
@@ -0,0 +1,82 @@
+import os
+import time
+
+import numpy as np
+
+from src.snapshot import read_snapshot, write_snapshot
+from test_engine import feed, make_engine
+
+class TailServer:
+    """/history stand-in serving three more 1m bars from range_from on, and a positions book."""
+
+    def __init__(self, net_positions=()):
+        self.calls = []
+        self.net_positions = list(net_positions)
+
+    def history(self, data):
+        lo = int(data["range_from"])
+        self.calls.append((data["symbol"], data["resolution"], lo))
+        return {"s": "ok", "candles": [[lo + 60 * i, 110, 110, 110, 110, 0] for i in range(3)]}
+
+    def positions(self):
+        return {"s": "ok", "netPositions": self.net_positions}
+
+def test_snapshot_round_trip_is_atomic(tmp_path):
+    path = str(tmp_path / "snap.npz")
+    write_snapshot(path, {"a": 1}, {"x": np.arange(6.0).reshape(1, 6)})
+    write_snapshot(path, {"a": 2}, {"x": np.zeros((0, 6))})
+    meta, arrays = read_snapshot(path)
+    assert meta["a"] == 2 and arrays["x"].shape == (0, 6)
+    assert os.listdir(tmp_path) == ["snap.npz"]
+
+def test_missing_or_corrupt_snapshot_is_ignored(tmp_path):
+    assert read_snapshot(str(tmp_path / "none.npz")) is None
+    (tmp_path / "bad.npz").write_bytes(b"PK\x03\x04 truncated")
+    assert read_snapshot(str(tmp_path / "bad.npz")) is None
+
+def test_restart_restores_state_and_fetches_only_missed_bars(tmp_path):
+    path = str(tmp_path / "snap.npz")
+    engine = make_engine(tmp_path, snapshot_path=path)
+    # a session that was running until a few minutes ago
+    feed(engine, [100, 102, 101, 103, 105, 105], start=int(time.time()) // 60 * 60 - 600)
+    engine.save_snapshot()
+    before = engine.status()["symbols"]["NSE:SBIN-EQ"]
+
+    server = TailServer(net_positions=[{"symbol": "NSE:SBIN-EQ", "netQty": 1}])
+    restarted = make_engine(tmp_path, snapshot_path=path)
+    restarted.fyers = server
+    started = time.perf_counter()
+    since = restarted.restore_snapshot()
+    assert restarted.reconcile_positions() == []
+    restarted.seed_history(since)
+    assert time.perf_counter() - started < 1.0
+
+    shard = restarted.shard()
+    assert shard.open_positions == engine.shard().open_positions
+    assert len(shard.executed_trades) == 1
+    # only from the forming bar of the snapshot on
+    assert server.calls == [("NSE:SBIN-EQ", "1", before["current_candle_ts"])]
+    assert shard.live_data["prices"].last().tolist() == before["closes"] + [110, 110]
+    assert shard.current_candle_ts == before["current_candle_ts"] + 120
+
+def test_positions_closed_while_down_are_dropped_and_unknown_ones_reported(tmp_path):
+    path = str(tmp_path / "snap.npz")
+    engine = make_engine(tmp_path, snapshot_path=path)
+    feed(engine, [100, 102, 101, 103, 105, 105])
+    engine.save_snapshot()
+
+    restarted = make_engine(tmp_path, snapshot_path=path)
+    restarted.fyers = TailServer(net_positions=[{"symbol": "NSE:TCS-EQ", "netQty": -5}])
+    restarted.restore_snapshot()
+    problems = restarted.reconcile_positions()
+    assert restarted.shard().open_positions == {}
+    assert problems == ["Broker position NSE:TCS-EQ (net qty -5) is not tracked by the bot."]
+
+def test_snapshot_from_another_day_is_not_restored(tmp_path):
+    path = str(tmp_path / "snap.npz")
+    engine = make_engine(tmp_path, snapshot_path=path)
+    feed(engine, [100, 102, 101, 103, 105, 105])
+    engine.save_snapshot()
+    restarted = make_engine(tmp_path, snapshot_path=path)
+    assert restarted.restore_snapshot(now=time.time() + 2 * 86400) == {}
+    assert restarted.shard().open_positions == {}
@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.candles import CandleAggregator
+from src.strategies import IndicatorRegistry, Strategy, build_strategies, register_strategy
+from src.trading_logic import RollingEMA, RollingVWAP
+
+def bars(closes, start=1_700_000_040, volume=10.0):
+    return [(start + 60 * i, c, c, c, c, volume) for i, c in enumerate(closes)]
+
+def test_overlapping_strategies_share_indicators():
+    registry = IndicatorRegistry()
+    strategies = build_strategies([
+        {"type": "triple_ma", "short": 2, "medium": 3, "long": 4, "extra_long": 5},
+        {"type": "triple_ma", "name": "fast", "short": 2, "medium": 3, "long": 5, "extra_long": 5},
+        {"type": "mean_reversion", "window": 5},
+        {"type": "filtered", "strategy": {"type": "triple_ma", "short": 2, "medium": 3, "long": 4, "extra_long": 5},
+         "filter": "ema", "window": 4},
+    ], timeframe="1")
+    for strategy in strategies:
+        strategy.bind(registry)
+    assert len(registry) == 5    # sma 2, 3, 4, 5 and ema 4
+    assert strategies[0].extra_long is strategies[2].mean
+
+    fifth = build_strategies([{"type": "triple_ma", "name": "fifth", "short": 3, "medium": 4, "long": 5,
+                               "extra_long": 5}], timeframe="1")[0]
+    fifth.bind(registry)
+    assert len(registry) == 5
+
+def test_registry_updates_each_indicator_once_per_bar():
+    registry = IndicatorRegistry()
+    sma = registry.get("sma", 3, "1")
+    assert registry.get("sma", 3, "1") is sma
+    other = registry.get("sma", 3, "5")
+    for bar in bars([1, 2, 3, 4]):
+        registry.update("1", bar)
+    assert sma.value == 3.0 and sma.previous == 2.0
+    assert math.isnan(other.value)
+    assert registry.closes == {"1": 4}
+
+def test_registry_seeds_new_indicators_from_closed_bars():
+    candles = CandleAggregator(["1"])
+    candles.seed("1", bars([1, 2, 3, 4, 5]))
+    registry = IndicatorRegistry(candles)
+    # the last seeded candle is still forming
+    assert registry.get("sma", 2, "1").value == 3.5
+    assert registry.closes == {"1": 4.0}
+
+def test_unknown_names_are_rejected():
+    with pytest.raises(ValueError, match="unknown strategy"):
+        build_strategies([{"type": "nope"}])
+    with pytest.raises(ValueError, match="duplicate"):
+        build_strategies([{"type": "mean_reversion"}, {"type": "mean_reversion"}])
+    with pytest.raises(ValueError, match="unknown indicator"):
+        IndicatorRegistry().get("rsi", 14, "1")
+
+def test_registered_plugin_is_buildable():
+    @register_strategy("always_buy")
+    class AlwaysBuy(Strategy):
+        def bind(self, indicators):
+            pass
+
+        def signal(self, close):
+            return "buy"
+
+    strategy = build_strategies([{"type": "always_buy"}], timeframe="5")[0]
+    assert (strategy.name, strategy.timeframe, strategy.signal(1.0)) == ("always_buy", "5", "buy")
+
+def test_mean_reversion_enters_on_stretch_and_exits_at_mean():
+    registry = IndicatorRegistry()
+    strategy = build_strategies([{"type": "mean_reversion", "window": 4, "band": 0.05, "stop": 0.1}])[0]
+    strategy.bind(registry)
+    for bar in bars([100, 100, 100, 100]):
+        registry.update("1", bar)
+    assert strategy.signal(99) is None
+    assert strategy.signal(94) == "buy"
+    assert strategy.signal(106) == "sell"
+    assert not strategy.should_exit(95, "buy")
+    assert strategy.should_exit(100, "buy")
+    assert strategy.should_exit(89, "buy")
+
+def test_filter_blocks_entries_against_the_trend():
+    registry = IndicatorRegistry()
+    strategy = build_strategies([{"type": "filtered", "strategy": {"type": "mean_reversion", "window": 2},
+                                  "filter": "sma", "window": 3}])[0]
+    strategy.bind(registry)
+    assert strategy.name == "mean_reversion_sma3"
+    for bar in bars([100, 110, 120]):
+        registry.update("1", bar)
+    # mean_reversion sells above its 2-bar mean; the close must also be below the 3-bar filter
+    assert strategy.inner.signal(130) == "sell"
+    assert strategy.signal(130) is None
+
+def test_rolling_ema_matches_pandas():
+    prices = 100 + np.cumsum(np.random.default_rng(3).normal(0, 1, 300))
+    ema = RollingEMA(10)
+    values = [ema.update(p) for p in prices]
+    seeded = np.concatenate(([prices[:10].mean()], prices[10:]))
+    expected = pd.Series(seeded).ewm(span=10, adjust=False).mean().to_numpy()
+    assert all(math.isnan(v) for v in values[:9])
+    np.testing.assert_allclose(values[9:], expected, rtol=1e-12)
+
+def test_rolling_vwap_weights_by_volume_and_needs_volume():
+    vwap = RollingVWAP(2)
+    vwap.update(100, 1)
+    assert math.isnan(vwap.value)
+    assert vwap.update(110, 3) == pytest.approx(107.5)
+    assert vwap.update(120, 1) == pytest.approx(112.5)
+    vwap.update(130, 0)
+    assert math.isnan(vwap.update(130, 0))
@@ -0,0 +1,36 @@
+import json
+import logging
+
+from src.structured_log import DroppingQueueHandler, JsonFormatter, setup_logging, shutdown_logging
+
+def make_record(level, msg, args=()):
+    return logging.LogRecord("trading_bot.engine", level, "/src/engine.py", 42, msg, args, None, func="on_message")
+
+def test_json_lines_match_fyers_log_format():
+    line = json.loads(JsonFormatter().format(make_record(logging.INFO, {"event": "entry", "symbol": "NSE:SBIN-EQ"})))
+    assert set(line) == {"level", "location", "message", "timestamp", "service"}
+    assert line["location"] == "[on_message:42] engine"
+    assert line["message"] == {"event": "entry", "symbol": "NSE:SBIN-EQ"}
+    assert line["timestamp"][19] == ","    # 2026-01-02 10:25:53,048+0530
+    assert json.loads(JsonFormatter().format(make_record(logging.INFO, "%s filled", ("x",))))["message"] == "x filled"
+
+def test_full_queue_drops_debug_but_keeps_errors():
+    handler = DroppingQueueHandler(maxsize=2)
+    for _ in range(3):
+        handler.emit(make_record(logging.DEBUG, "tick"))
+    assert handler.dropped == 1
+    handler.queue.get_nowait()
+    handler.emit(make_record(logging.ERROR, "boom"))
+    assert handler.queue.qsize() == 2 and handler.dropped == 1
+
+def test_setup_writes_records_from_background_thread(tmp_path):
+    path = tmp_path / "bot.log"
+    setup_logging(str(path), level="INFO")
+    try:
+        log = logging.getLogger("trading_bot.engine")
+        log.debug({"event": "tick"})
+        log.info({"event": "candle_close", "ts": 60})
+    finally:
+        shutdown_logging()
+    lines = [json.loads(l) for l in path.read_text().splitlines()]
+    assert [l["message"] for l in lines] == [{"event": "candle_close", "ts": 60}]
@@ -0,0 +1,32 @@
+import numpy as np
+from src.backtest import run_backtest
+from src.sweep import param_grid, run_sweep
+
+def test_param_grid_keeps_ordered_windows():
+    grid = param_grid([5, 20], [10], [15, 30], [89], ["5"])
+    assert grid == [("5", 5, 10, 15, 89), ("5", 5, 10, 30, 89)]
+
+def test_sweep_matches_single_backtests(make_candles):
+    candles = {"1": make_candles(2000, seed=5), "5": make_candles(600, seed=6)}
+    grid = param_grid([5, 8], [13, 21], [34, 55], [89, 144], ["1", "5"])
+    table = run_sweep(candles, grid, max_trades=20, quantity=2, processes=2, chunk_size=3)
+
+    assert len(table) == len(grid)
+    assert table["pnl"].is_monotonic_decreasing
+    for row in table.itertuples():
+        expected = run_backtest(candles[row.timeframe], row.short, row.medium, row.long,
+                                max_trades=20, quantity=2)
+        assert row.num_trades == expected["num_trades"]
+        assert np.isclose(row.pnl, expected["pnl"])
+
+def test_sweep_in_process(make_candles):
+    candles = {"5": make_candles(800)}
+    grid = param_grid([5], [13], [34], [89], ["5"])
+    table = run_sweep(candles, grid, processes=1)
+    assert table.loc[0, "pnl"] == run_backtest(candles["5"], 5, 13, 34)["pnl"]
+
+def test_drawdown_ranks_smallest_first(make_candles):
+    candles = {"1": make_candles(2000, seed=5)}
+    grid = param_grid([5, 8], [13, 21], [34, 55], [89], ["1"])
+    table = run_sweep(candles, grid, max_trades=20, processes=1, sort_by="max_drawdown")
+    assert table["max_drawdown"].is_monotonic_increasing
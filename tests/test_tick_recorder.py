@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src.tick_recorder import TickRecorder, load_ticks, replay_ticks
+
+def stock_tick(i):
+    return {"ltp": 100.0 + i, "vol_traded_today": 1000 + i, "exch_feed_time": 1_700_000_000 + i,
+            "bid_price": 99.5 + i, "ask_price": 100.5 + i, "last_traded_qty": 5,
+            "type": "sf", "symbol": "NSE:SBIN-EQ"}
+
+INDEX_TICK = {"ltp": 24000.5, "prev_close_price": 23900.0, "exch_feed_time": 1_700_000_100,
+              "high_price": 24010.0, "low_price": 23950.0, "open_price": 23960.0,
+              "type": "if", "symbol": "NSE:NIFTY50-INDEX"}
+
+def test_replay_reproduces_recorded_messages(tmp_path):
+    path = str(tmp_path / "day.ticks")
+    messages = [stock_tick(i) for i in range(5)] + [INDEX_TICK]
+    with TickRecorder(path, chunk_records=4) as recorder:
+        recorder.record({"type": "cn", "code": 200})
+        for msg in messages:
+            recorder.record(msg)
+    replayed = []
+    assert replay_ticks(path, replayed.append) == 6
+    assert replayed == messages
+
+def test_reopening_appends_and_readers_see_only_complete_ticks(tmp_path):
+    path = str(tmp_path / "day.ticks")
+    with TickRecorder(path) as recorder:
+        recorder.record(stock_tick(0))
+    recorder = TickRecorder(path, chunk_records=2)
+    assert len(recorder) == 1
+    for i in range(1, 4):
+        recorder.record(stock_tick(i))
+    recorder.flush()
+    # not closed yet: the file has spare capacity, but the header counts four ticks
+    ticks = load_ticks(path)
+    assert ticks["ltp"].tolist() == [100.0, 101.0, 102.0, 103.0]
+    del ticks
+    recorder.close()
+
+def test_replay_keeps_recorded_pacing(tmp_path):
+    path = str(tmp_path / "day.ticks")
+    with TickRecorder(path) as recorder:
+        for i, at in enumerate([0, 500_000_000, 2_000_000_000]):
+            recorder.record(stock_tick(i), recv_ns=at)
+    sleeps = []
+    replay_ticks(path, lambda msg: None, speed=2.0, sleep=sleeps.append, clock=lambda: 0.0)
+    assert sleeps == pytest.approx([0.25, 1.0])
+
+def test_rejects_foreign_files(tmp_path):
+    path = tmp_path / "not.ticks"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        load_ticks(str(path))
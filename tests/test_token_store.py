@@ -0,0 +1,64 @@
+import base64
+import json
+import os
+import stat
+import time
+
+from src.token_store import key_path, load_token, save_token, token_expiry
+
+def jwt(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).rstrip(b"=").decode()
+    return f"eyJhbGciOiJIUzI1NiJ9.{payload}.signature"
+
+def test_round_trip_is_encrypted(tmp_path):
+    path = str(tmp_path / "token.enc")
+    token = jwt(time.time() + 3600)
+    save_token(token, "APP-100", "secret", path)
+    assert load_token("APP-100", "secret", path) == token
+    with open(path, "rb") as f:
+        blob = f.read()
+    assert b"APP-100" not in blob and token.encode() not in blob
+    assert stat.S_IMODE(os.stat(key_path(path)).st_mode) == 0o600
+
+def test_expired_token_is_dropped(tmp_path):
+    path = str(tmp_path / "token.enc")
+    save_token(jwt(time.time() + 30), "APP-100", "secret", path)
+    assert load_token("APP-100", "secret", path) is None
+    assert not os.path.exists(path)
+
+def test_wrong_secret_or_tampering_is_rejected(tmp_path):
+    path = str(tmp_path / "token.enc")
+    save_token(jwt(time.time() + 3600), "APP-100", "secret", path)
+    assert load_token("APP-100", "other secret", path) is None
+
+    save_token(jwt(time.time() + 3600), "APP-100", "secret", path)
+    blob = bytearray(open(path, "rb").read())
+    blob[30] ^= 1
+    open(path, "wb").write(bytes(blob))
+    assert load_token("APP-100", "secret", path) is None
+
+def test_wrong_secret_keeps_the_saved_token(tmp_path):
+    path = str(tmp_path / "token.enc")
+    token = jwt(time.time() + 3600)
+    save_token(token, "APP-100", "secret A", path)
+    assert load_token("APP-100", "secret B", path) is None
+    assert load_token("APP-100", "secret A", path) == token
+
+def test_unknown_format_is_removed(tmp_path):
+    path = str(tmp_path / "token.enc")
+    save_token(jwt(time.time() + 3600), "APP-100", "secret", path)
+    blob = open(path, "rb").read()
+    open(path, "wb").write(b"FTK0" + blob[4:])
+    assert load_token("APP-100", "secret", path) is None
+    assert not os.path.exists(path)
+
+def test_token_of_another_app_is_ignored(tmp_path):
+    path = str(tmp_path / "token.enc")
+    save_token(jwt(time.time() + 3600), "APP-100", "secret", path)
+    assert load_token("APP-200", "secret", path) is None
+    assert load_token("APP-100", "secret", path) is not None
+
+def test_expiry_falls_back_to_ist_midnight():
+    assert token_expiry(jwt(1_700_000_000)) == 1_700_000_000
+    # 2023-11-14 10:00 IST -> 2023-11-15 00:00 IST
+    assert token_expiry("not-a-jwt", now=1_699_936_200) == 1_699_986_600
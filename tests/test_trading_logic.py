@@ -1,41 +1,85 @@
+import math
+
+import numpy as np
 import pandas as pd
-from src.trading_logic import calculate_moving_averages, detect_signal, check_stop_loss
+from src.trading_logic import (
+    calculate_moving_averages, detect_signal, check_stop_loss, IndicatorState, RollingMA
+)
 
 def test_calculate_moving_averages():
     prices = [10, 12, 15, 14, 16, 18, 20]
     short_window = 3
     medium_window = 4
     long_window = 5
+    extra_long_window = 6
 
-    short_ma, medium_ma, long_ma = calculate_moving_averages(prices, short_window, medium_window, long_window)
+    short_ma, medium_ma, long_ma, extra_long_ma = calculate_moving_averages(
+        prices, short_window, medium_window, long_window, extra_long_window
+    )
 
     # Expected values calculated manually
     expected_short_ma = pd.Series([None, None, 12.333333, 13.666667, 15.0, 16.0, 18.0])
     expected_medium_ma = pd.Series([None, None, None, 12.75, 14.25, 15.75, 17.0])
     expected_long_ma = pd.Series([None, None, None, None, 13.4, 15.0, 16.6])
+    expected_extra_long_ma = pd.Series([None, None, None, None, None, 14.166667, 15.833333])
 
     pd.testing.assert_series_equal(short_ma, expected_short_ma, rtol=1e-5)
     pd.testing.assert_series_equal(medium_ma, expected_medium_ma, rtol=1e-5)
     pd.testing.assert_series_equal(long_ma, expected_long_ma, rtol=1e-5)
+    pd.testing.assert_series_equal(extra_long_ma, expected_extra_long_ma, rtol=1e-5)
+
+def test_rolling_ma_matches_pandas():
+    rng = np.random.default_rng(7)
+    prices = 22000 + np.cumsum(rng.normal(0, 15, 5000))
+    windows = (11, 23, 50, 89)
+    expected = calculate_moving_averages(prices, *windows)
+
+    state = IndicatorState(*windows)
+    mas = (state.short, state.medium, state.long, state.extra_long)
+    for i, price in enumerate(prices):
+        state.update(price)
+        for ma, series in zip(mas, expected):
+            if math.isnan(series.iloc[i]):
+                assert math.isnan(ma.value)
+            else:
+                assert math.isclose(ma.value, series.iloc[i], rel_tol=1e-12)
+            if i > 0 and not math.isnan(series.iloc[i - 1]):
+                assert math.isclose(ma.previous, series.iloc[i - 1], rel_tol=1e-12)
+
+def test_rolling_ma_not_ready_until_window_full():
+    ma = RollingMA(3)
+    ma.update(1)
+    ma.update(2)
+    assert math.isnan(ma.value)
+    ma.update(3)
+    assert ma.value == 2.0
+    assert math.isnan(ma.previous)
 
 def test_detect_buy_signal():
     prices = [100, 102, 101, 103, 105]
-    short_ma, medium_ma, long_ma = calculate_moving_averages(prices, 2, 3, 4)
-    assert detect_signal(prices, short_ma, medium_ma, long_ma) == "buy"
+    state = IndicatorState(2, 3, 4, 5).seed(prices)
+    assert detect_signal(prices[-1], state) == "buy"
 
 def test_detect_sell_signal():
     prices = [105, 103, 104, 102, 100]
-    short_ma, medium_ma, long_ma = calculate_moving_averages(prices, 2, 3, 4)
-    assert detect_signal(prices, short_ma, medium_ma, long_ma) == "sell"
+    state = IndicatorState(2, 3, 4, 5).seed(prices)
+    assert detect_signal(prices[-1], state) == "sell"
+
+def test_detect_signal_needs_full_windows():
+    prices = [100, 102, 101, 103, 105]
+    state = IndicatorState(2, 3, 4, 10).seed(prices)
+    assert detect_signal(prices[-1], state) == "buy"
+    state = IndicatorState(2, 3, 6, 10).seed(prices)
+    assert detect_signal(prices[-1], state) is None
 
 def test_check_stop_loss_buy():
     prices = [100, 102, 101, 103, 105]
-    _, _, long_ma = calculate_moving_averages(prices, 2, 3, 4)
-    assert check_stop_loss(95, long_ma, "buy") == True
-    assert check_stop_loss(110, long_ma, "buy") == False
+    state = IndicatorState(2, 3, 4, 5).seed(prices)
+    assert check_stop_loss(95, state, "buy") == True
+    assert check_stop_loss(110, state, "buy") == False
 
 def test_check_stop_loss_sell():
     prices = [105, 103, 104, 102, 100]
-    _, _, long_ma = calculate_moving_averages(prices, 2, 3, 4)
-    assert check_stop_loss(110, long_ma, "sell") == True
-    assert check_stop_loss(95, long_ma, "sell") == False
+    state = IndicatorState(2, 3, 4, 5).seed(prices)
+    assert check_stop_loss(110, state, "sell") == True
+    assert check_stop_loss(95, state, "sell") == False